@@ -1,10 +1,23 @@
-from fastapi import FastAPI, HTTPException, Request, Response, Depends, Header
+from fastapi import FastAPI, HTTPException, Request, Response, Depends, Header, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from vector_service import search_similar, add_pokemon, search_pokemon_by_name, get_all_pokemon, get_top_pokemon, search_moves, get_move_details
-from battle_service import simulate_battle, simulate_battle_advanced
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from vector_service import search_similar_batch, similarity_filter, search_similar_hybrid, HYBRID_TYPE_WEIGHT, search_similar_radius, search_stat_box, add_pokemon, search_pokemon_by_name, fuzzy_search_pokemon_by_name, get_all_pokemon, search_moves, search_similar_moves, sync_move_collection, get_move_details, load_similarity_index, load_name_index, load_rank_index, get_pokemon_rank, load_pairwise_distances, get_pokemon_neighbours, get_unique_pokemon, get_closest_pairs, load_archetypes, build_archetypes, ARCHETYPE_COUNT, get_archetypes, get_archetype_members, init_vector_store, refresh_roster
+from vector_service import search_similar_async, search_pokemon_by_name_async, get_pokemon_page_async, iter_pokemon_async, get_top_pokemon_async, rank_pokemon_by_weights_async, close_async_client, publish_pending_artifacts
+from battle_service import simulate_battle, simulate_battle_advanced, simulate_battle_trials
+from tournament_service import get_tournament, update_tournament, TOURNAMENT_TRIALS
+from team_battle_service import simulate_team_battle, close_pool
+from job_service import JobQueue, JobQueueFull, FINISHED_STATES, SUCCEEDED
+from pydantic import BaseModel
+from typing import List
 from security_fixes import SecurityValidator, RateLimiter, get_security_headers
+import asyncio
+import base64
+import json
 import logging
 import os
+import re
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -17,9 +30,16 @@ logger = logging.getLogger(__name__)
 # Initialize rate limiter
 rate_limiter = RateLimiter()
 
+# Batch endpoints are charged per query from their own, larger budget
+batch_rate_limiter = RateLimiter(max_requests_per_minute=20000, max_requests_per_hour=200000)
+BATCH_PATHS = {"/search_similar/batch"}
+
 # Get API key from environment
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
 
+# Background simulation jobs (tournaments, team battles, Monte Carlo runs)
+job_queue = JobQueue()
+
 # API Key Authentication for write operations
 async def verify_api_key(x_api_key: str = Header(None)):
     """
@@ -43,10 +63,63 @@ async def verify_api_key(x_api_key: str = Header(None)):
     logger.info("API key verified for write operation")
     return True
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Connect to the vector store and load in-memory indexes before serving requests"""
+    try:
+        # Connection and collection checks happen here rather than at import time
+        init_vector_store()
+    except Exception as e:
+        # Requests retry the connection lazily on first use
+        logger.error(f"Vector store not available at startup: {str(e)}")
+
+    try:
+        load_similarity_index()
+    except Exception as e:
+        # Searches fall back to Qdrant until the index is loaded
+        logger.warning(f"Similarity index not loaded: {str(e)}")
+
+    try:
+        load_name_index()
+    except Exception as e:
+        # Name searches fall back to scanning Qdrant until the index is loaded
+        logger.warning(f"Name index not loaded: {str(e)}")
+
+    try:
+        load_rank_index()
+    except Exception as e:
+        # Rankings are scored from the roster until the index is loaded
+        logger.warning(f"Rank index not loaded: {str(e)}")
+
+    try:
+        load_pairwise_distances()
+    except Exception as e:
+        # Distance queries build the matrix on first use instead
+        logger.warning(f"Pairwise distances not loaded: {str(e)}")
+
+    try:
+        load_archetypes()
+    except Exception as e:
+        # Archetype endpoints load (or fit) the clusters on first use instead
+        logger.warning(f"Archetypes not loaded: {str(e)}")
+
+    try:
+        sync_move_collection()
+    except Exception as e:
+        # Move search uses the local feature matrix either way
+        logger.warning(f"Moves collection not synced: {str(e)}")
+    yield
+    # Writes since the last batch would otherwise be recomputed by the next worker
+    publish_pending_artifacts()
+    job_queue.close()
+    close_pool()
+    await close_async_client()
+
 app = FastAPI(
     title="Pokemon Search and Sim API",
     description="Secure API for Pokemon search and battle simulation",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware with restricted origins
@@ -68,13 +141,15 @@ async def security_middleware(request: Request, call_next):
     # Get client IP
     client_ip = request.client.host
 
-    # Rate limiting
-    if rate_limiter.is_rate_limited(client_ip):
+    # Rate limiting (batch endpoints are charged one unit here, the rest per query once validated)
+    limiter = batch_rate_limiter if request.url.path in BATCH_PATHS else rate_limiter
+    if limiter.is_rate_limited(client_ip):
         logger.warning(f"Rate limit exceeded for IP: {client_ip}")
-        raise HTTPException(status_code=429, detail="Rate limit exceeded. Please try again later.")
-
-    # Process request
-    response = await call_next(request)
+        # Exceptions raised in middleware bypass FastAPI's handlers, so answer directly
+        response = JSONResponse(status_code=429, content={"detail": "Rate limit exceeded. Please try again later."})
+    else:
+        # Process request
+        response = await call_next(request)
 
     # Add security headers
     for header, value in get_security_headers().items():
@@ -92,6 +167,7 @@ def add_pokemon_endpoint(
     id: int,
     name: str,
     stats: str,
+    background_tasks: BackgroundTasks,
     authenticated: bool = Depends(verify_api_key)
 ):
     """
@@ -109,6 +185,10 @@ def add_pokemon_endpoint(
         # Add Pokemon (only if authenticated)
         add_pokemon(validated_id, validated_name, validated_stats)
 
+        # Recompute the affected tournament rows once a matrix has been published
+        if get_tournament() is not None:
+            background_tasks.add_task(refresh_tournament)
+
         logger.info(f"Authenticated user added Pokemon: {validated_name} (ID: {validated_id})")
         return {
             "status": "added",
@@ -122,22 +202,166 @@ def add_pokemon_endpoint(
         logger.error(f"Error adding Pokemon: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+def refresh_tournament(trials=None):
+    """Incrementally update the tournament matrix from the current roster"""
+    current = get_tournament()
+    if trials is None:
+        trials = current.trials if current is not None else TOURNAMENT_TRIALS
+
+    try:
+        matrix, summary = update_tournament(get_all_pokemon(1000), trials)
+        logger.info(f"Tournament matrix v{matrix.version}: simulated {summary['simulated_pairs']} pairings")
+        return summary
+    except Exception as e:
+        logger.error(f"Error refreshing tournament: {str(e)}")
+        raise
+
+@app.post("/roster/refresh")
+def roster_refresh_endpoint(authenticated: bool = Depends(verify_api_key)):
+    """
+    Reload the shared roster snapshot from the database now
+
+    Requires X-API-Key header. Use after editing the collection outside the API.
+    """
+    try:
+        snapshot = refresh_roster()
+        return {"version": snapshot.version, "count": len(snapshot)}
+
+    except Exception as e:
+        logger.error(f"Error refreshing roster: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@app.get("/tournament/")
+def tournament_endpoint():
+    """Get the latest published tournament win-rate matrix"""
+    matrix = get_tournament()
+    if matrix is None:
+        raise HTTPException(status_code=404, detail="Tournament has not been computed yet")
+
+    return matrix.to_dict()
+
+@app.post("/tournament/refresh")
+def tournament_refresh_endpoint(trials: int = TOURNAMENT_TRIALS, authenticated: bool = Depends(verify_api_key)):
+    """
+    Queue a tournament recompute for new or changed Pokemon only and return the job ID to poll
+
+    Requires X-API-Key header. The first run simulates the full round robin,
+    so it always runs as a background job rather than inside the request.
+    """
+    try:
+        if not (1 <= trials <= 100):
+            raise HTTPException(status_code=400, detail="Trials must be between 1 and 100")
+
+        job = submit_job("tournament", {"trials": trials})
+        logger.info(f"Queued tournament job {job.id}")
+        return {"job_id": job.id, "status": job.status}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in tournament refresh: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 @app.get("/search_similar/")
-def search_endpoint(stats: str):
-    """Search for similar Pokemon with input validation"""
+async def search_endpoint(stats: str = None, mode: str = "knn", top_k: int = 5, radius: float = None,
+                    min_stats: str = None, max_stats: str = None, types: str = None, abilities: str = None,
+                    metric: str = "euclidean", query_types: str = None, type_weight: float = HYBRID_TYPE_WEIGHT,
+                    archetype: int = None):
+    """
+    Search for similar Pokemon with input validation (knn, radius or box mode)
+    - types / abilities: comma-separated, results must have at least one of each list
+    - min_stats / max_stats: per-stat bounds (required for box mode, optional filters otherwise)
+    - metric: euclidean, standardized (z-scored stats) or mahalanobis (knn mode only)
+    - query_types / type_weight: hybrid knn that also compares type matchups, weighted in stat points
+    - archetype: only consider Pokemon in this stat archetype (see /archetypes/)
+    """
     try:
+        validated_mode = SecurityValidator.validate_search_mode(mode)
+        validated_limit = SecurityValidator.validate_limit(top_k)
+        validated_types = SecurityValidator.validate_type_list(types)
+        validated_abilities = SecurityValidator.validate_ability_list(abilities)
+        validated_metric = SecurityValidator.validate_metric(metric)
+        validated_archetype = SecurityValidator.validate_archetype_id(archetype) if archetype is not None else None
+        if validated_metric != "euclidean" and validated_mode != "knn":
+            raise HTTPException(status_code=400, detail="Standardized and mahalanobis metrics support knn search only")
+        if query_types and validated_mode != "knn":
+            raise HTTPException(status_code=400, detail="Hybrid type search supports knn search only")
+
+        validated_min = SecurityValidator.validate_stats_string(min_stats) if min_stats or validated_mode == "box" else None
+        validated_max = SecurityValidator.validate_stats_string(max_stats) if max_stats or validated_mode == "box" else None
+        if validated_min and validated_max and any(low > high for low, high in zip(validated_min, validated_max)):
+            raise HTTPException(status_code=400, detail="min_stats must not exceed max_stats")
+
+        if validated_mode == "box":
+            # Every stat must fall inside [min_stats, max_stats]
+            results = await run_in_threadpool(search_stat_box, validated_min, validated_max, validated_limit,
+                                              validated_types, validated_abilities, validated_archetype)
+            return {"mode": validated_mode, "results": results}
+
         # Validate stats input
         validated_stats = SecurityValidator.validate_stats_string(stats)
+        query_filter = similarity_filter(validated_types, validated_abilities, validated_min, validated_max)
+
+        if validated_metric != "euclidean" and (query_filter is not None or validated_archetype is not None):
+            raise HTTPException(status_code=400, detail="Standardized and mahalanobis metrics cannot be combined with filters")
+
+        if query_types:
+            # Hybrid stats + type search runs in the in-memory index
+            validated_query_types = SecurityValidator.validate_type_list(query_types)
+            if len(validated_query_types) > SecurityValidator.MAX_POKEMON_TYPES:
+                raise HTTPException(status_code=400, detail=f"A Pokemon has at most {SecurityValidator.MAX_POKEMON_TYPES} types")
+            if validated_metric != "euclidean" or query_filter is not None or validated_archetype is not None:
+                raise HTTPException(status_code=400, detail="Hybrid type search cannot be combined with metrics or filters")
+            validated_type_weight = SecurityValidator.validate_type_weight(type_weight)
+            results = await run_in_threadpool(search_similar_hybrid, validated_stats, validated_query_types,
+                                              validated_type_weight, validated_limit)
+            return {"mode": "hybrid", "metric": validated_metric, "type_weight": validated_type_weight, "results": results}
+
+        if validated_mode == "radius":
+            if radius is None:
+                raise HTTPException(status_code=400, detail="Radius is required for radius search")
+            validated_radius = SecurityValidator.validate_radius(radius)
+            if validated_archetype is not None:
+                query_filter = similarity_filter(validated_types, validated_abilities, validated_min, validated_max, validated_archetype)
+            results = await run_in_threadpool(search_similar_radius, validated_stats, validated_radius, validated_limit, query_filter)
+        else:
+            # Perform search
+            results = await search_similar_async(validated_stats, validated_limit, query_filter, validated_metric, validated_archetype)
+
+        return {"mode": validated_mode, "metric": validated_metric, "results": results}
 
-        # Perform search
-        results = search_similar(validated_stats)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in similarity search: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
 
-        return {"results": results}
+class SimilarityBatchRequest(BaseModel):
+    """Bulk similarity search: one stats vector per query"""
+    stats: List[List[int]]
+    top_k: int = 5
+
+@app.post("/search_similar/batch")
+def search_batch_endpoint(batch: SimilarityBatchRequest, request: Request):
+    """Search for similar Pokemon for many stat vectors in a single pass"""
+    try:
+        validated_queries = SecurityValidator.validate_stats_batch(batch.stats)
+        validated_top_k = SecurityValidator.validate_limit(batch.top_k)
+
+        # Charge one unit per query against the batch budget (the middleware already charged one)
+        extra_cost = len(validated_queries) - 1
+        if extra_cost > 0 and batch_rate_limiter.is_rate_limited(request.client.host, cost=extra_cost):
+            logger.warning(f"Batch rate limit exceeded for IP: {request.client.host}")
+            raise HTTPException(status_code=429, detail="Batch rate limit exceeded. Please try again later.")
+
+        results = search_similar_batch(validated_queries, validated_top_k)
+
+        return {"top_k": validated_top_k, "count": len(results), "results": results}
 
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error in similarity search: {str(e)}")
+        logger.error(f"Error in batch similarity search: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.get("/simulate_battle/")
@@ -160,20 +384,27 @@ def battle_endpoint(stats_a: str, stats_b: str):
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.get("/battle_advanced/")
-def advanced_battle_endpoint(pokemon_a_name: str, pokemon_b_name: str, level_a: int = 50, level_b: int = 50):
-    """Enhanced battle simulation with movesets, status effects, and levels"""
+async def advanced_battle_endpoint(pokemon_a_name: str, pokemon_b_name: str, level_a: int = 50, level_b: int = 50, ai: str = "random"):
+    """
+    Enhanced battle simulation with movesets, status effects, and levels
+    - ai=random: strongest moves first, then random picks (default)
+    - ai=greedy: always use the move with the highest expected damage
+    """
     try:
         # Validate Pokemon names
         validated_name_a = SecurityValidator.validate_pokemon_name(pokemon_a_name)
         validated_name_b = SecurityValidator.validate_pokemon_name(pokemon_b_name)
+        validated_ai = SecurityValidator.validate_battle_ai(ai)
 
         # Validate levels (1-100)
         if not (1 <= level_a <= 100) or not (1 <= level_b <= 100):
             raise HTTPException(status_code=400, detail="Pokemon levels must be between 1 and 100")
 
-        # Get Pokemon data
-        pokemon_a_results = search_pokemon_by_name(validated_name_a, 1)
-        pokemon_b_results = search_pokemon_by_name(validated_name_b, 1)
+        # Get Pokemon data (both lookups in flight at once)
+        pokemon_a_results, pokemon_b_results = await asyncio.gather(
+            search_pokemon_by_name_async(validated_name_a, 1),
+            search_pokemon_by_name_async(validated_name_b, 1)
+        )
 
         if not pokemon_a_results:
             raise HTTPException(status_code=404, detail=f"Pokemon '{validated_name_a}' not found")
@@ -184,7 +415,7 @@ def advanced_battle_endpoint(pokemon_a_name: str, pokemon_b_name: str, level_a:
         pokemon_b = pokemon_b_results[0]
 
         # Simulate enhanced battle
-        battle_result = simulate_battle_advanced(pokemon_a, pokemon_b, level_a, level_b)
+        battle_result = simulate_battle_advanced(pokemon_a, pokemon_b, level_a, level_b, validated_ai)
 
         return {
             "pokemon_a": pokemon_a['name'],
@@ -198,16 +429,224 @@ def advanced_battle_endpoint(pokemon_a_name: str, pokemon_b_name: str, level_a:
         logger.error(f"Error in advanced battle: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+def find_pokemon(name):
+    """Look up a single Pokemon by name or raise a 404"""
+    results = search_pokemon_by_name(name, 1)
+    if not results:
+        raise HTTPException(status_code=404, detail=f"Pokemon '{name}' not found")
+    return results[0]
+
+async def find_pokemon_async(name):
+    """Non-blocking find_pokemon for async handlers"""
+    results = await search_pokemon_by_name_async(name, 1)
+    if not results:
+        raise HTTPException(status_code=404, detail=f"Pokemon '{name}' not found")
+    return results[0]
+
+@app.get("/team_battle/")
+async def team_battle_endpoint(team_a: str, team_b: str, trials: int = 100, level: int = 50, switching: str = "order"):
+    """
+    Monte Carlo team battle between two parties of up to six Pokemon
+    - team_a / team_b: comma-separated Pokemon names in party order
+    - switching=order: replace a fainted Pokemon with the next in party order
+    - switching=matchup: replace it with the best remaining matchup
+    """
+    try:
+        # Validate inputs
+        names_a = SecurityValidator.validate_team_string(team_a)
+        names_b = SecurityValidator.validate_team_string(team_b)
+        validated_trials = SecurityValidator.validate_trials(trials)
+        validated_switching = SecurityValidator.validate_switching(switching)
+
+        if not (1 <= level <= 100):
+            raise HTTPException(status_code=400, detail="Pokemon levels must be between 1 and 100")
+
+        # Get Pokemon data for both parties
+        party_a, party_b = await asyncio.gather(
+            asyncio.gather(*(find_pokemon_async(name) for name in names_a)),
+            asyncio.gather(*(find_pokemon_async(name) for name in names_b))
+        )
+
+        # Simulate all trials in one vectorized batch, off the event loop
+        result = await run_in_threadpool(simulate_team_battle, list(party_a), list(party_b), validated_trials, level, validated_switching)
+
+        return {"battle_result": result}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in team battle: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+class JobRequest(BaseModel):
+    """Simulation job submission"""
+    kind: str
+    params: dict = {}
+    priority: int = 0
+
+def team_param(value):
+    """Accept a team as a list of names or a comma-separated string"""
+    if isinstance(value, list):
+        return ",".join(str(name) for name in value)
+    return str(value)
+
+def validate_job_params(kind, params):
+    """Validate job parameters up front so bad specs fail at submission"""
+    if kind == "tournament":
+        return {"trials": SecurityValidator.validate_trials(params.get("trials", TOURNAMENT_TRIALS))}
+
+    if kind == "team_battle":
+        level = params.get("level", 50)
+        if not isinstance(level, int) or not (1 <= level <= 100):
+            raise HTTPException(status_code=400, detail="Pokemon levels must be between 1 and 100")
+        return {
+            "team_a": SecurityValidator.validate_team_string(team_param(params.get("team_a", ""))),
+            "team_b": SecurityValidator.validate_team_string(team_param(params.get("team_b", ""))),
+            "trials": SecurityValidator.validate_trials(params.get("trials", 100)),
+            "level": level,
+            "switching": SecurityValidator.validate_switching(params.get("switching", "order"))
+        }
+
+    if kind == "battle":
+        levels = [params.get("level_a", 50), params.get("level_b", 50)]
+        if not all(isinstance(level, int) and 1 <= level <= 100 for level in levels):
+            raise HTTPException(status_code=400, detail="Pokemon levels must be between 1 and 100")
+        return {
+            "pokemon_a": SecurityValidator.validate_pokemon_name(str(params.get("pokemon_a", ""))),
+            "pokemon_b": SecurityValidator.validate_pokemon_name(str(params.get("pokemon_b", ""))),
+            "trials": SecurityValidator.validate_trials(params.get("trials", 100)),
+            "level_a": levels[0],
+            "level_b": levels[1],
+            "ai": SecurityValidator.validate_battle_ai(params.get("ai", "random"))
+        }
+
+    raise HTTPException(status_code=400, detail=f"Invalid job kind. Allowed values: {', '.join(job_queue.kinds)}")
+
+def run_tournament_job(job):
+    """Job handler: incremental tournament refresh"""
+    # Runs on the job thread: the published matrix lives in this process
+    matrix, summary = update_tournament(
+        get_all_pokemon(1000),
+        job.params["trials"],
+        progress=lambda done, total: job.report(done / total if total else 1.0)
+    )
+    return {"summary": summary, "tournament": matrix.to_dict()}
+
+def run_team_battle_job(job):
+    """Job handler: Monte Carlo team battle"""
+    params = job.params
+    team_a = [find_pokemon(name) for name in params["team_a"]]
+    team_b = [find_pokemon(name) for name in params["team_b"]]
+    # One job process per battle; the job pool already bounds the parallelism
+    return job_queue.run_in_process(
+        job, simulate_team_battle, team_a, team_b, params["trials"], params["level"], params["switching"], workers=1,
+        on_progress=lambda done, total, partial: job.report(done / total, partial)
+    )
+
+def run_battle_job(job):
+    """Job handler: Monte Carlo 1v1 advanced battle"""
+    params = job.params
+    pokemon_a = find_pokemon(params["pokemon_a"])
+    pokemon_b = find_pokemon(params["pokemon_b"])
+    result = job_queue.run_in_process(
+        job, simulate_battle_trials, pokemon_a, pokemon_b, params["trials"], params["level_a"], params["level_b"], params["ai"],
+        on_progress=lambda done, total, partial: job.report(done / total, partial)
+    )
+    return {"pokemon_a": pokemon_a['name'], "pokemon_b": pokemon_b['name'], **result}
+
+job_queue.register("tournament", run_tournament_job)
+job_queue.register("team_battle", run_team_battle_job)
+job_queue.register("battle", run_battle_job)
+
+# Job IDs are uuid4 hex strings
+JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+def submit_job(kind, params, priority=0):
+    """Queue a job, or raise a 503 when too many jobs are already waiting"""
+    try:
+        return job_queue.submit(kind, params, priority)
+    except JobQueueFull:
+        logger.warning(f"Job queue full, rejected {kind} job")
+        raise HTTPException(status_code=503, detail="Too many jobs waiting, try again later")
+
+def get_job_or_404(job_id):
+    """Look up a job by ID or raise a 404"""
+    job = job_queue.get(job_id) if JOB_ID_PATTERN.match(job_id) else None
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+def job_response(job, include_result=False):
+    """Serialize a job with its error message sanitized"""
+    data = job.to_dict(include_result)
+    if data["error"]:
+        data["error"] = SecurityValidator.sanitize_error_message(data["error"])
+    return data
+
+@app.post("/jobs/")
+async def submit_job_endpoint(request: JobRequest, x_api_key: str = Header(None)):
+    """
+    Submit a long-running simulation job and get a job ID to poll
+    - tournament: {"trials"} (requires X-API-Key, publishes a new matrix)
+    - team_battle: {"team_a", "team_b", "trials", "level", "switching"}
+    - battle: {"pokemon_a", "pokemon_b", "trials", "level_a", "level_b", "ai"}
+    Higher priority jobs run first.
+    """
+    if request.kind == "tournament":
+        await verify_api_key(x_api_key)
+
+    params = validate_job_params(request.kind, request.params)
+
+    if not (-10 <= request.priority <= 10):
+        raise HTTPException(status_code=400, detail="Priority must be between -10 and 10")
+
+    job = submit_job(request.kind, params, request.priority)
+    logger.info(f"Queued {job.kind} job {job.id}")
+    return {"job_id": job.id, "status": job.status}
+
+@app.get("/jobs/{job_id}")
+def job_status_endpoint(job_id: str):
+    """Get job status, progress and partial results"""
+    return job_response(get_job_or_404(job_id))
+
+@app.get("/jobs/{job_id}/result")
+def job_result_endpoint(job_id: str):
+    """Get the final result of a finished job"""
+    job = get_job_or_404(job_id)
+
+    if job.status not in FINISHED_STATES:
+        raise HTTPException(status_code=409, detail=f"Job is still {job.status}")
+    if job.status != SUCCEEDED:
+        raise HTTPException(status_code=409, detail=f"Job {job.status}, no result available")
+
+    return job_response(job, include_result=True)
+
+@app.post("/jobs/{job_id}/cancel")
+def cancel_job_endpoint(job_id: str, authenticated: bool = Depends(verify_api_key)):
+    """Cancel a queued or running job (requires X-API-Key header)"""
+    job = get_job_or_404(job_id)
+    job_queue.cancel(job.id)
+    return {"job_id": job.id, "status": job.status}
+
 @app.get("/search_by_name/")
-def search_by_name_endpoint(name: str, limit: int = 10):
-    """Search Pokemon by name with input validation"""
+async def search_by_name_endpoint(name: str, limit: int = 10, fuzzy: bool = False, max_distance: int = 2):
+    """
+    Search Pokemon by name with input validation
+    - fuzzy=false: prefix, word-start and substring matches (default)
+    - fuzzy=true: typo-tolerant matches within max_distance edits
+    """
     try:
         # Validate inputs
         validated_name = SecurityValidator.validate_pokemon_name(name)
         validated_limit = SecurityValidator.validate_limit(limit)
 
+        if fuzzy:
+            validated_distance = SecurityValidator.validate_max_distance(max_distance)
+            results = await run_in_threadpool(fuzzy_search_pokemon_by_name, validated_name, validated_distance, validated_limit)
+            return {"results": results, "fuzzy": True, "max_distance": validated_distance}
+
         # Perform search
-        results = search_pokemon_by_name(validated_name, validated_limit)
+        results = await search_pokemon_by_name_async(validated_name, validated_limit)
 
         return {"results": results}
 
@@ -217,17 +656,36 @@ def search_by_name_endpoint(name: str, limit: int = 10):
         logger.error(f"Error in name search: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+def encode_cursor(offset):
+    """Wrap a scroll offset in an opaque, URL-safe cursor"""
+    if offset is None:
+        return None
+    return base64.urlsafe_b64encode(json.dumps({"offset": offset}).encode()).decode().rstrip("=")
+
+async def stream_pokemon_ndjson(offset):
+    """One JSON object per line, paging through the roster lazily"""
+    async for pokemon in iter_pokemon_async(offset):
+        yield json.dumps(pokemon) + "\n"
+
 @app.get("/pokemon/")
-def get_all_pokemon_endpoint(limit: int = 1000):
-    """Get all Pokemon with input validation"""
+async def get_all_pokemon_endpoint(limit: int = 1000, cursor: str = None, stream: bool = False):
+    """
+    Get Pokemon in id order with input validation:
+    - cursor: opaque next_cursor from a previous page
+    - stream: return the rest of the roster as NDJSON instead of one page
+    """
     try:
-        # Validate limit
+        # Validate limit and cursor
         validated_limit = SecurityValidator.validate_limit(limit)
+        offset = SecurityValidator.validate_cursor(cursor)
 
-        # Get Pokemon
-        results = get_all_pokemon(validated_limit)
+        if stream:
+            return StreamingResponse(stream_pokemon_ndjson(offset), media_type="application/x-ndjson")
 
-        return {"results": results}
+        # Get one page of Pokemon
+        results, next_offset = await get_pokemon_page_async(validated_limit, offset)
+
+        return {"results": results, "next_cursor": encode_cursor(next_offset)}
 
     except HTTPException:
         raise
@@ -236,7 +694,7 @@ def get_all_pokemon_endpoint(limit: int = 1000):
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.get("/pokemon/top/")
-def get_top_pokemon_endpoint(criteria: str = "power", limit: int = 10):
+async def get_top_pokemon_endpoint(criteria: str = "power", limit: int = 10):
     """
     Get top Pokemon by different criteria with input validation:
     - power: Weighted power score (default)
@@ -251,7 +709,7 @@ def get_top_pokemon_endpoint(criteria: str = "power", limit: int = 10):
         validated_limit = SecurityValidator.validate_limit(limit)
 
         # Get top Pokemon
-        results = get_top_pokemon(validated_criteria, validated_limit)
+        results = await get_top_pokemon_async(validated_criteria, validated_limit)
 
         return {"results": results, "criteria": validated_criteria}
 
@@ -261,9 +719,161 @@ def get_top_pokemon_endpoint(criteria: str = "power", limit: int = 10):
         logger.error(f"Error getting top Pokemon: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@app.get("/pokemon/rank/")
+async def rank_pokemon_by_weights_endpoint(weights: str, constraints: str = None, limit: int = 10):
+    """
+    Rank Pokemon by a custom weighting of their base stats:
+    - weights: six comma-separated weights (HP,Attack,Defense,Special Attack,Special Defense,Speed)
+    - constraints: optional comma-separated linear constraints, e.g. speed>=90,attack+special_attack>200
+    """
+    try:
+        # Validate inputs
+        validated_weights = SecurityValidator.validate_weights(weights)
+        validated_constraints = SecurityValidator.validate_constraints(constraints)
+        validated_limit = SecurityValidator.validate_limit(limit)
+
+        results, matching = await rank_pokemon_by_weights_async(validated_weights, validated_constraints, validated_limit)
+
+        return {"results": results, "weights": validated_weights, "matching": matching}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error ranking Pokemon by weights: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@app.get("/pokemon/top/rank/")
+async def get_pokemon_rank_endpoint(name: str, criteria: str = "power"):
+    """Where a single Pokemon places in the /pokemon/top/ ranking for a criteria"""
+    try:
+        # Validate inputs
+        validated_name = SecurityValidator.validate_pokemon_name(name)
+        validated_criteria = SecurityValidator.validate_criteria(criteria)
+
+        pokemon = await find_pokemon_async(validated_name)
+        ranked = await run_in_threadpool(get_pokemon_rank, pokemon["id"], validated_criteria)
+        if ranked is None:
+            raise HTTPException(status_code=404, detail=f"Pokemon '{validated_name}' has no ranking stats")
+
+        rank, entry = ranked
+        return {"rank": rank, "criteria": validated_criteria, "pokemon": entry}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting Pokemon rank: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@app.get("/pokemon/neighbours/")
+async def get_pokemon_neighbours_endpoint(name: str, k: int = 5):
+    """Nearest and farthest Pokemon to one species by base stat distance"""
+    try:
+        # Validate inputs
+        validated_name = SecurityValidator.validate_pokemon_name(name)
+        validated_k = SecurityValidator.validate_limit(k)
+
+        pokemon = await find_pokemon_async(validated_name)
+        found = await run_in_threadpool(get_pokemon_neighbours, pokemon["id"], validated_k)
+        if found is None:
+            raise HTTPException(status_code=404, detail=f"Pokemon '{validated_name}' has no stat vector")
+
+        nearest, farthest = found
+        return {"pokemon": {"id": pokemon["id"], "name": pokemon["name"]}, "nearest": nearest, "farthest": farthest}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting Pokemon neighbours: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@app.get("/pokemon/unique/")
+async def get_unique_pokemon_endpoint(limit: int = 10, order: str = "most"):
+    """Pokemon ranked by how far their stats sit from their nearest neighbours"""
+    try:
+        # Validate inputs
+        validated_limit = SecurityValidator.validate_limit(limit)
+        validated_order = SecurityValidator.validate_uniqueness_order(order)
+
+        results = await run_in_threadpool(get_unique_pokemon, validated_limit, validated_order == "most")
+
+        return {"results": results, "order": validated_order}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting unique Pokemon: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@app.get("/pokemon/closest_pairs/")
+async def get_closest_pairs_endpoint(limit: int = 10):
+    """The pairs of Pokemon with the most similar base stats"""
+    try:
+        validated_limit = SecurityValidator.validate_limit(limit)
+
+        results = await run_in_threadpool(get_closest_pairs, validated_limit)
+
+        return {"results": results}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting closest pairs: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@app.get("/archetypes/")
+async def get_archetypes_endpoint():
+    """Stat archetypes (k-means clusters of base stats) with their centroids and sizes"""
+    try:
+        results = await run_in_threadpool(get_archetypes)
+
+        return {"results": results}
+
+    except Exception as e:
+        logger.error(f"Error getting archetypes: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@app.get("/archetypes/{archetype_id}")
+async def get_archetype_endpoint(archetype_id: int, limit: int = 100):
+    """One stat archetype and the Pokemon in it"""
+    try:
+        # Validate inputs
+        validated_archetype = SecurityValidator.validate_archetype_id(archetype_id)
+        validated_limit = SecurityValidator.validate_limit(limit)
+
+        summary = await run_in_threadpool(get_archetypes)
+        if validated_archetype >= len(summary):
+            raise HTTPException(status_code=404, detail=f"Archetype {validated_archetype} not found")
+
+        members = await run_in_threadpool(get_archetype_members, validated_archetype, validated_limit)
+        return {**summary[validated_archetype], "members": members}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting archetype: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@app.post("/archetypes/refresh")
+def archetypes_refresh_endpoint(k: int = ARCHETYPE_COUNT, authenticated: bool = Depends(verify_api_key)):
+    """
+    Re-cluster the roster into k stat archetypes
+
+    Requires X-API-Key header. Reassigns every Pokemon and replaces the stored centroids.
+    """
+    try:
+        validated_k = SecurityValidator.validate_archetype_count(k)
+
+        return {"results": build_archetypes(validated_k)}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error refreshing archetypes: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 @app.get("/search_moves/")
 def search_moves_endpoint(query: str, limit: int = 20):
-    """Search for Pokemon moves using vector similarity"""
+    """Search for Pokemon moves by features named in the query (type, power, accuracy, crit, effect) or by name"""
     try:
         # Validate query
         validated_query = SecurityValidator.validate_search_query(query)
@@ -286,6 +896,26 @@ def search_moves_endpoint(query: str, limit: int = 20):
         logger.error(f"Error in move search: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@app.get("/moves/similar/")
+def similar_moves_endpoint(name: str, limit: int = 10):
+    """Moves closest to a move by type, category, power, accuracy, crit ratio and effect"""
+    try:
+        # Validate inputs
+        validated_name = SecurityValidator.validate_pokemon_name(name)  # Reuse Pokemon name validation
+        if not (1 <= limit <= 100):
+            raise HTTPException(status_code=400, detail="Limit must be between 1 and 100")
+
+        results = search_similar_moves(validated_name, limit)
+        if results is None:
+            raise HTTPException(status_code=404, detail=f"Move '{validated_name}' not found")
+
+        return {"move": validated_name, "results": results, "count": len(results)}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error finding similar moves: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 @app.get("/move_details/")
 def move_details_endpoint(name: str):
     """Get detailed information about a specific move"""
@@ -0,0 +1,177 @@
+"""
+Stat archetypes: k-means clusters over base stat vectors.
+
+Clustering runs offline (at startup when nothing is stored, or on refresh);
+the resulting table maps every Pokemon to an archetype and keeps each
+archetype's centroid, label and members, so browsing by archetype is a dict
+lookup. New Pokemon are assigned to the nearest existing centroid without
+refitting. Archetypes are labelled from how their centroid compares to the
+roster average (fast sweeper, wall, glass cannon, ...).
+"""
+
+import threading
+import numpy as np
+
+STAT_KEYS = ('hp', 'attack', 'defense', 'special_attack', 'special_defense', 'speed')
+# Clusters fitted when no count is given
+ARCHETYPE_COUNT = 8
+KMEANS_ITERATIONS = 100
+KMEANS_SEED = 42
+# Centroid z-score above which a trait counts as a strength
+STRENGTH_THRESHOLD = 0.5
+
+def kmeans(vectors, k, iterations=KMEANS_ITERATIONS, seed=KMEANS_SEED):
+    """Lloyd's k-means with k-means++ seeding, as (centroids, labels)"""
+    vectors = np.asarray(vectors, dtype=np.float64)
+    k = min(k, len(vectors))
+    rng = np.random.default_rng(seed)
+
+    # k-means++: each new centroid is drawn proportionally to squared distance
+    centroids = [vectors[rng.integers(len(vectors))]]
+    for _ in range(1, k):
+        squared = np.min([np.einsum('ij,ij->i', vectors - centroid, vectors - centroid) for centroid in centroids], axis=0)
+        total = squared.sum()
+        if total == 0:
+            break
+        centroids.append(vectors[rng.choice(len(vectors), p=squared / total)])
+    centroids = np.array(centroids)
+
+    labels = np.full(len(vectors), -1)
+    for _ in range(iterations):
+        new_labels = nearest_centroids(vectors, centroids)
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        for cluster in range(len(centroids)):
+            members = vectors[labels == cluster]
+            if len(members):
+                centroids[cluster] = members.mean(axis=0)
+
+    return centroids, labels
+
+def nearest_centroids(vectors, centroids):
+    """Index of the closest centroid for every row"""
+    vectors = np.asarray(vectors, dtype=np.float64).reshape(-1, centroids.shape[1])
+    squared = (
+        np.einsum('ij,ij->i', vectors, vectors)[:, None]
+        + np.einsum('ij,ij->i', centroids, centroids)[None, :]
+        - 2.0 * (vectors @ centroids.T)
+    )
+    return np.argmin(squared, axis=1)
+
+def archetype_label(centroid, mean, std):
+    """Human-readable archetype for a centroid relative to the roster"""
+    z = dict(zip(STAT_KEYS, (np.asarray(centroid) - mean) / np.where(std > 0, std, 1.0)))
+    offense = max(z['attack'], z['special_attack'])
+    bulk = (z['hp'] + z['defense'] + z['special_defense']) / 3
+    style = "physical" if z['attack'] >= z['special_attack'] else "special"
+
+    if max(z.values()) < -STRENGTH_THRESHOLD:
+        return "underdeveloped"
+    if z['speed'] > STRENGTH_THRESHOLD and offense > 0:
+        return f"fast {style} sweeper"
+    if offense > STRENGTH_THRESHOLD and bulk > 0:
+        return f"bulky {style} attacker"
+    if offense > STRENGTH_THRESHOLD:
+        return f"{style} glass cannon"
+    if bulk > STRENGTH_THRESHOLD and z['speed'] < 0:
+        return "wall"
+    if bulk > 0:
+        return "tank"
+    if z['speed'] > STRENGTH_THRESHOLD:
+        return "speedster"
+    return "balanced"
+
+def unique_labels(labels):
+    """Number repeated labels ('wall', 'wall 2', ...)"""
+    seen = {}
+    result = []
+    for label in labels:
+        seen[label] = seen.get(label, 0) + 1
+        result.append(label if seen[label] == 1 else f"{label} {seen[label]}")
+    return result
+
+class ArchetypeTable:
+    """Archetype assignments, centroids, labels and member lists"""
+
+    def __init__(self):
+        # (centroids, labels, id -> archetype, archetype -> member ids) swapped as one tuple
+        self._state = (np.empty((0, len(STAT_KEYS))), [], {}, {})
+        self._write_lock = threading.Lock()
+        self.loaded = False
+
+    def __len__(self):
+        return len(self._state[1])
+
+    def fit(self, points, k=ARCHETYPE_COUNT):
+        """Cluster (id, vector) pairs into k archetypes, replacing the table"""
+        points = list(points)
+        if not points:
+            return
+        ids = [point[0] for point in points]
+        vectors = np.array([point[1] for point in points], dtype=np.float64).reshape(len(points), len(STAT_KEYS))
+
+        centroids, assignments = kmeans(vectors, k)
+        # Number archetypes by size so the ordering is stable across refits
+        sizes = np.bincount(assignments, minlength=len(centroids))
+        order = np.lexsort((np.arange(len(centroids)), -sizes))
+        renumber = np.empty(len(order), dtype=np.int64)
+        renumber[order] = np.arange(len(order))
+
+        mean, std = vectors.mean(axis=0), vectors.std(axis=0)
+        centroids = centroids[order]
+        labels = unique_labels(archetype_label(centroid, mean, std) for centroid in centroids)
+        self.load(centroids, labels, zip(ids, renumber[assignments].tolist()))
+
+    def load(self, centroids, labels, assignments):
+        """Replace the table with stored centroids, labels and (id, archetype) pairs"""
+        assigned = {}
+        members = {archetype: [] for archetype in range(len(labels))}
+        for pokemon_id, archetype in assignments:
+            assigned[pokemon_id] = archetype
+            members.setdefault(archetype, []).append(pokemon_id)
+
+        with self._write_lock:
+            self._state = (np.asarray(centroids, dtype=np.float64), list(labels), assigned, members)
+            self.loaded = True
+
+    def assign(self, pokemon_id, vector):
+        """Place a new or changed Pokemon in its nearest archetype, returning the archetype"""
+        with self._write_lock:
+            centroids, labels, assigned, members = self._state
+            archetype = int(nearest_centroids(vector, centroids)[0])
+            assigned = dict(assigned)
+            members = {key: list(value) for key, value in members.items()}
+            previous = assigned.get(pokemon_id)
+            if previous is not None:
+                members[previous].remove(pokemon_id)
+            assigned[pokemon_id] = archetype
+            members[archetype].append(pokemon_id)
+            self._state = (centroids, labels, assigned, members)
+        return archetype
+
+    def archetype_of(self, pokemon_id):
+        return self._state[2].get(pokemon_id)
+
+    def label(self, archetype):
+        return self._state[1][archetype]
+
+    def members(self, archetype):
+        """Ids in an archetype (empty for unknown archetypes)"""
+        return list(self._state[3].get(archetype, []))
+
+    def summary(self):
+        """Every archetype as {id, name, size, centroid}"""
+        centroids, labels, _, members = self._state
+        return [
+            {
+                "id": archetype,
+                "name": label,
+                "size": len(members.get(archetype, [])),
+                "centroid": {key: round(float(value), 1) for key, value in zip(STAT_KEYS, centroids[archetype])}
+            }
+            for archetype, label in enumerate(labels)
+        ]
+
+    def centroids(self):
+        return self._state[0]
@@ -1,5 +1,6 @@
 import random
 import math
+from functools import lru_cache
 
 # Type emojis for battle log
 TYPE_EMOJIS = {
@@ -97,6 +98,17 @@ def get_type_effectiveness(attacking_type, defending_types):
 
     return multiplier
 
+# log2 multiplier standing in for an immunity (one step beyond 1/4x)
+IMMUNITY_LOG_MULTIPLIER = -3.0
+
+def type_profile(defending_types):
+    """log2 damage multiplier of every attacking type against a type combination"""
+    profile = []
+    for attacking_type in TYPE_EFFECTIVENESS:
+        multiplier = get_type_effectiveness(attacking_type, defending_types)
+        profile.append(math.log2(multiplier) if multiplier > 0 else IMMUNITY_LOG_MULTIPLIER)
+    return profile
+
 # Enhanced move database with accuracy, effects, and critical hit ratios
 MOVE_DATABASE = {
     # Electric moves
@@ -263,8 +275,12 @@ def get_pokemon_moveset(pokemon_name, pokemon_types, attacker_stats):
 
     return moveset[:4]  # Limit to 4 moves
 
-def select_move(moveset, turn_number):
+def select_move(moveset, turn_number, damage_table=None):
     """Select a move from the Pokemon's moveset"""
+    # Greedy AI: pick the move with the highest expected damage from the precomputed table
+    if damage_table is not None:
+        return moveset[max(range(len(moveset)), key=damage_table.__getitem__)]
+
     # Simple AI: cycle through moves with some randomness
     if turn_number <= 2:
         # Use strongest moves first
@@ -291,8 +307,8 @@ def apply_status_effect(target_name, move_data, battle_log):
             return move_data["effect"]
     return None
 
-def calculate_damage(attacker_stats, defender_stats, attacker_types, defender_types, move_data, level=50, is_critical=False):
-    """Calculate damage using enhanced Pokemon damage formula"""
+def calculate_base_damage(attacker_stats, defender_stats, attacker_types, defender_types, move_data, level=50):
+    """Calculate the deterministic part of the damage formula (stats, STAB and type effectiveness)"""
     # Choose attack and defense stats based on move category
     if move_data["category"] == "physical":
         attack_stat = attacker_stats[1]  # Attack
@@ -304,17 +320,9 @@ def calculate_damage(attacker_stats, defender_stats, attacker_types, defender_ty
     # Base damage calculation (Pokemon damage formula)
     power = move_data["power"]
 
-    # Critical hits ignore defense boosts and deal 1.5x damage
-    if is_critical:
-        defense_stat = min(defense_stat, defender_stats[2] if move_data["category"] == "physical" else defender_stats[4])
-
     # Damage formula: ((((2 * Level / 5 + 2) * Power * Attack / Defense) / 50) + 2) * Modifiers
     damage = ((((2 * level / 5 + 2) * power * attack_stat / defense_stat) / 50) + 2)
 
-    # Apply critical hit multiplier
-    if is_critical:
-        damage *= 1.5
-
     # Apply STAB (Same Type Attack Bonus) - 1.5x if move type matches Pokemon type
     if move_data["type"] in attacker_types:
         damage *= 1.5
@@ -323,13 +331,64 @@ def calculate_damage(attacker_stats, defender_stats, attacker_types, defender_ty
     type_multiplier = get_type_effectiveness(move_data["type"], defender_types)
     damage *= type_multiplier
 
+    return damage, type_multiplier
+
+def calculate_damage(attacker_stats, defender_stats, attacker_types, defender_types, move_data, level=50, is_critical=False):
+    """Calculate damage using enhanced Pokemon damage formula"""
+    damage, type_multiplier = calculate_base_damage(attacker_stats, defender_stats, attacker_types, defender_types, move_data, level)
+
+    # Critical hits deal 1.5x damage
+    if is_critical:
+        damage *= 1.5
+
     # Add some randomness (85-100% of calculated damage)
     damage *= random.uniform(0.85, 1.0)
 
     return int(damage), type_multiplier, is_critical
 
-def simulate_battle_advanced(pokemon_a_data, pokemon_b_data, level_a=50, level_b=50):
-    """Enhanced battle simulation with movesets, status effects, and levels"""
+def calculate_expected_damage(attacker_stats, defender_stats, attacker_types, defender_types, move_data, level=50):
+    """Calculate the average damage of a move, including accuracy, critical hits and the damage roll"""
+    # Status moves deal no direct damage
+    if not move_data["power"]:
+        return 0.0
+
+    damage, _ = calculate_base_damage(attacker_stats, defender_stats, attacker_types, defender_types, move_data, level)
+
+    # Same odds as check_critical_hit and check_accuracy
+    crit_chance = min(move_data["crit_ratio"] * 0.0625, 1.0)
+    hit_chance = move_data["accuracy"] / 100
+
+    # Mean of the 85-100% damage roll is 92.5%
+    return damage * (1 + 0.5 * crit_chance) * hit_chance * 0.925
+
+# Lookup used by the damage table cache, which is keyed by move names
+MOVES_BY_NAME = {move["name"]: move for move in MOVE_DATABASE.values()}
+
+@lru_cache(maxsize=4096)
+def _expected_damage_row(move_names, attacker_stats, defender_stats, attacker_types, defender_types, level):
+    """Cached expected damage of each named move for one matchup"""
+    return tuple(
+        calculate_expected_damage(attacker_stats, defender_stats, attacker_types, defender_types, MOVES_BY_NAME[move_name], level)
+        for move_name in move_names
+    )
+
+def build_damage_table(moveset, attacker_stats, defender_stats, attacker_types, defender_types, level=50):
+    """Build the expected damage table for a moveset against one defender (cached per matchup)"""
+    return _expected_damage_row(
+        tuple(move["name"] for move in moveset),
+        tuple(attacker_stats),
+        tuple(defender_stats),
+        tuple(attacker_types),
+        tuple(defender_types),
+        level
+    )
+
+def simulate_battle_advanced(pokemon_a_data, pokemon_b_data, level_a=50, level_b=50, ai="random"):
+    """Enhanced battle simulation with movesets, status effects, and levels
+
+    ai selects the move policy: "random" (strongest moves first, then random)
+    or "greedy" (always the move with the highest expected damage)
+    """
     # Extract base stats
     base_stats_a = [
         pokemon_a_data['metadata']['stats']['hp'],
@@ -362,6 +421,13 @@ def simulate_battle_advanced(pokemon_a_data, pokemon_b_data, level_a=50, level_b
     # Get movesets for each Pokemon
     moveset_a = get_pokemon_moveset(name_a, types_a, stats_a)
     moveset_b = get_pokemon_moveset(name_b, types_b, stats_b)
+    movesets = {'a': moveset_a, 'b': moveset_b}
+
+    # Greedy AI reads moves from an expected damage table built once per battle
+    damage_tables = {'a': None, 'b': None}
+    if ai == "greedy":
+        damage_tables['a'] = build_damage_table(moveset_a, stats_a, stats_b, types_a, types_b, level_a)
+        damage_tables['b'] = build_damage_table(moveset_b, stats_b, stats_a, types_b, types_a, level_b)
 
     # Initialize HP and status
     hp_a = stats_a[0]
@@ -398,9 +464,9 @@ def simulate_battle_advanced(pokemon_a_data, pokemon_b_data, level_a=50, level_b
 
         # First attack
         if (first_attacker[3] == 'a' and hp_a > 0) or (first_attacker[3] == 'b' and hp_b > 0):
-            # Get moveset and select a move for this Pokemon
-            moveset = get_pokemon_moveset(first_attacker[0], first_attacker[2], first_attacker[1])
-            move_data = select_move(moveset, turn)
+            # Select a move for this Pokemon
+            moveset = movesets[first_attacker[3]]
+            move_data = select_move(moveset, turn, damage_tables[first_attacker[3]])
 
             # Check for critical hit and accuracy
             is_critical = check_critical_hit(move_data)
@@ -447,9 +513,9 @@ def simulate_battle_advanced(pokemon_a_data, pokemon_b_data, level_a=50, level_b
 
         # Second attack
         if (second_attacker[3] == 'a' and hp_a > 0) or (second_attacker[3] == 'b' and hp_b > 0):
-            # Get moveset and select a move for this Pokemon
-            moveset = get_pokemon_moveset(second_attacker[0], second_attacker[2], second_attacker[1])
-            move_data = select_move(moveset, turn)
+            # Select a move for this Pokemon
+            moveset = movesets[second_attacker[3]]
+            move_data = select_move(moveset, turn, damage_tables[second_attacker[3]])
 
             # Check for critical hit and accuracy
             is_critical = check_critical_hit(move_data)
@@ -513,6 +579,42 @@ def simulate_battle_advanced(pokemon_a_data, pokemon_b_data, level_a=50, level_b
         "turns": turn - 1
     }
 
+def simulate_battle_trials(pokemon_a_data, pokemon_b_data, trials=100, level_a=50, level_b=50, ai="random", progress=None):
+    """Run repeated advanced battles and tally the outcomes
+
+    progress, if given, is called as progress(done, trials, partial_summary)
+    roughly every 1% of the trials
+    """
+    wins_a = 0
+    wins_b = 0
+    total_turns = 0
+    report_every = max(1, trials // 100)
+
+    def summary(done):
+        return {
+            "trials": done,
+            "wins_a": wins_a,
+            "wins_b": wins_b,
+            "draws": done - wins_a - wins_b,
+            "win_rate_a": round(wins_a / done, 4) if done else 0.0,
+            "win_rate_b": round(wins_b / done, 4) if done else 0.0,
+            "average_turns": round(total_turns / done, 2) if done else 0.0
+        }
+
+    for trial in range(1, trials + 1):
+        battle = simulate_battle_advanced(pokemon_a_data, pokemon_b_data, level_a, level_b, ai)
+        final_hp = battle["final_hp"]
+        if final_hp["pokemon_b"] <= 0 < final_hp["pokemon_a"]:
+            wins_a += 1
+        elif final_hp["pokemon_a"] <= 0 < final_hp["pokemon_b"]:
+            wins_b += 1
+        total_turns += battle["turns"]
+
+        if progress is not None and (trial % report_every == 0 or trial == trials):
+            progress(trial, trials, summary(trial))
+
+    return summary(trials)
+
 def simulate_battle(stats_a, stats_b):
     """Simple battle simulation (backwards compatibility)"""
     total_a = sum(stats_a)
@@ -0,0 +1,240 @@
+"""
+Columnar in-memory roster.
+
+Roster payloads repeat a lot: the name is stored at the top level and again in
+metadata, stats are stored both as the vector and as a nested dict, every
+sprite URL is the same template around the id, and type / ability names recur
+across the whole roster. CompactRoster keeps them as columns instead - a uint8
+(n, 6) stats array, interned type, ability and label ids, int32 scalar columns
+- and builds a {"id", "name", "metadata"} dict for a row only when a caller
+reads it, which in practice is when a response is serialized. Fields that do
+not fit a column are kept per row unchanged, so rows read back exactly as
+they were loaded.
+"""
+
+from collections.abc import Mapping, Sequence
+import hashlib
+import numpy as np
+from rank_index import REQUIRED_STATS, ranked_stats
+
+SPRITE_URL_TEMPLATE = "https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/{}.png"
+# Whole-number metadata fields stored as int32 columns
+INT_FIELDS = ('height', 'weight', 'base_experience', 'archetype')
+# List-of-name fields stored as interned ids (one offsets array per field)
+LIST_FIELDS = ('types', 'abilities')
+# Single-name fields stored as interned ids
+LABEL_FIELDS = ('archetype_name',)
+# Metadata key order when a row is rebuilt (the scraper's payload order)
+FIELD_ORDER = ('name', 'height', 'weight', 'types', 'abilities', 'base_experience', 'sprite_url', 'stats', 'archetype', 'archetype_name')
+
+INT_MISSING = np.iinfo(np.int32).min
+INT_RANGE = (INT_MISSING + 1, np.iinfo(np.int32).max)
+
+class Interner:
+    """Strings <-> small integer ids"""
+
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+
+    def code(self, value):
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+def is_int(value, low, high):
+    # bool is an int subclass but must round-trip as bool
+    return type(value) is int and low <= value <= high
+
+def compact_stats(stats):
+    """Base stats in REQUIRED_STATS order if each is a 0-65535 int, else None (stored as uint8 unless a value needs uint16)"""
+    if not isinstance(stats, dict) or set(stats) != set(REQUIRED_STATS):
+        return None
+    row = [stats[key] for key in REQUIRED_STATS]
+    return row if all(is_int(value, 0, 65535) for value in row) else None
+
+class CompactRoster(Sequence):
+    """Roster rows in id order; indexing builds {"id", "name", "metadata"} dicts"""
+
+    def __init__(self, entries):
+        entries = list(entries)
+        n = len(entries)
+        self.ids = np.array([entry["id"] for entry in entries], dtype=np.int64)
+        self.names = [entry["name"] for entry in entries]
+        self._positions = {pokemon_id: position for position, pokemon_id in enumerate(self.ids.tolist())}
+
+        stats = np.zeros((n, len(REQUIRED_STATS)), dtype=np.uint16)
+        self._has_stats = np.zeros(n, dtype=bool)
+        self._sprites = np.zeros(n, dtype=bool)
+        self._ints = {field: np.full(n, INT_MISSING, dtype=np.int32) for field in INT_FIELDS}
+        self._interners = {field: Interner() for field in LIST_FIELDS + LABEL_FIELDS}
+        list_codes = {field: [] for field in LIST_FIELDS}
+        list_offsets = {field: np.full(n + 1, 0, dtype=np.int32) for field in LIST_FIELDS}
+        # -1 marks a row without the field (lists use an absent mask instead)
+        self._labels = {field: np.full(n, -1, dtype=np.int16) for field in LABEL_FIELDS}
+        self._lists_present = {field: np.zeros(n, dtype=bool) for field in LIST_FIELDS}
+        # Leftover metadata that no column covers, None for most rows
+        self._extras = [None] * n
+
+        for position, entry in enumerate(entries):
+            metadata = entry["metadata"]
+            extras = {}
+            for key, value in metadata.items():
+                if key == 'name' and value == entry["name"]:
+                    continue
+                if key == 'stats' and compact_stats(value) is not None:
+                    stats[position] = compact_stats(value)
+                    self._has_stats[position] = True
+                elif key == 'sprite_url' and value == SPRITE_URL_TEMPLATE.format(entry["id"]):
+                    self._sprites[position] = True
+                elif key in self._ints and is_int(value, *INT_RANGE):
+                    self._ints[key][position] = value
+                elif key in list_codes and isinstance(value, list) and all(isinstance(item, str) for item in value):
+                    list_codes[key].extend(self._interners[key].code(item) for item in value)
+                    list_offsets[key][position + 1] = len(value)
+                    self._lists_present[key][position] = True
+                elif key in self._labels and isinstance(value, str):
+                    self._labels[key][position] = self._interners[key].code(value)
+                else:
+                    extras[key] = value
+            if extras:
+                self._extras[position] = extras
+
+        # Every real base stat fits a byte; wider values only come from custom entries
+        self._stats = stats.astype(np.uint8) if not n or stats.max() <= 255 else stats
+        self._list_codes = {field: np.array(list_codes[field], dtype=np.uint16) for field in LIST_FIELDS}
+        self._list_offsets = {field: np.cumsum(list_offsets[field], dtype=np.int32) for field in LIST_FIELDS}
+        self._fingerprint = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self.row(i) for i in range(*position.indices(len(self)))]
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError("roster index out of range")
+        return self.row(position)
+
+    def fingerprint(self):
+        """Digest of every column, equal for two rosters exactly when their rows are"""
+        if self._fingerprint is None:
+            digest = hashlib.sha1()
+            for column in (self.ids, self._stats, self._has_stats, self._sprites, *self._ints.values(),
+                           *self._labels.values(), *self._lists_present.values(),
+                           *self._list_codes.values(), *self._list_offsets.values()):
+                digest.update(np.ascontiguousarray(column).tobytes())
+            for values in (self.names, *(interner.values for interner in self._interners.values()), self._extras):
+                digest.update(repr(values).encode())
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def position(self, pokemon_id):
+        """Row of an id, or None if it is not in the roster"""
+        return self._positions.get(pokemon_id)
+
+    def _field(self, field, position):
+        """One metadata value rebuilt from its column, or None if the row has none"""
+        if field == 'name':
+            return self.names[position]
+        if field == 'stats':
+            if not self._has_stats[position]:
+                return None
+            return dict(zip(REQUIRED_STATS, self._stats[position].tolist()))
+        if field == 'sprite_url':
+            return SPRITE_URL_TEMPLATE.format(int(self.ids[position])) if self._sprites[position] else None
+        if field in self._ints:
+            value = int(self._ints[field][position])
+            return None if value == INT_MISSING else value
+        if field in self._list_codes:
+            if not self._lists_present[field][position]:
+                return None
+            offsets = self._list_offsets[field]
+            values = self._interners[field].values
+            return [values[code] for code in self._list_codes[field][offsets[position]:offsets[position + 1]].tolist()]
+        code = int(self._labels[field][position])
+        return None if code < 0 else self._interners[field].values[code]
+
+    def row(self, position):
+        """The {"id", "name", "metadata"} dict for one row"""
+        metadata = {}
+        for field in FIELD_ORDER:
+            value = self._field(field, position)
+            if value is not None:
+                metadata[field] = value
+        if self._extras[position]:
+            metadata.update(self._extras[position])
+        return {"id": int(self.ids[position]), "name": self.names[position], "metadata": metadata}
+
+    def view(self, positions):
+        """Lazy sequence of the given rows"""
+        return RosterView(self, positions)
+
+    def filter_by_name(self, name, limit):
+        """Rows whose name contains name (case-insensitive), in id order"""
+        name_lower = name.lower()
+        matches = []
+        for position, pokemon_name in enumerate(self.names):
+            if name_lower in pokemon_name.lower():
+                matches.append(self.row(position))
+                if len(matches) >= limit:
+                    break
+        return matches
+
+    def stat_matrix(self):
+        """(rankable rows, (n, 6) float64 stat matrix), like rank_index.stat_matrix"""
+        rankable = self._has_stats.copy()
+        fallback = {}
+        for position in np.flatnonzero(~rankable).tolist():
+            # Stats that did not fit a column may still be rankable
+            stats = ranked_stats(self.row(position))
+            if stats is not None:
+                rankable[position] = True
+                fallback[position] = [stats[key] for key in REQUIRED_STATS]
+
+        positions = np.flatnonzero(rankable)
+        matrix = self._stats[positions].astype(np.float64)
+        for i, position in enumerate(positions.tolist()):
+            if position in fallback:
+                matrix[i] = fallback[position]
+        return self.view(positions), matrix
+
+class RosterView(Sequence):
+    """Selected rows of a CompactRoster, built on access"""
+
+    def __init__(self, roster, positions):
+        self._roster = roster
+        self._positions = np.asarray(positions, dtype=np.int64)
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._roster.row(int(position)) for position in self._positions[index]]
+        return self._roster.row(int(self._positions[index]))
+
+class RowsById(Mapping):
+    """Read-only id -> row dict mapping over a CompactRoster"""
+
+    def __init__(self, roster):
+        self._roster = roster
+
+    def __getitem__(self, pokemon_id):
+        position = self._roster.position(pokemon_id)
+        if position is None:
+            raise KeyError(pokemon_id)
+        return self._roster.row(position)
+
+    def __contains__(self, pokemon_id):
+        return self._roster.position(pokemon_id) is not None
+
+    def __iter__(self):
+        return iter(self._roster.ids.tolist())
+
+    def __len__(self):
+        return len(self._roster)
@@ -0,0 +1,245 @@
+"""
+All-pairs Euclidean stat distances for roster-wide queries.
+
+Nearest / farthest neighbours of a species, uniqueness scores and the closest
+pairs in the roster all need every pairwise distance, so they are computed
+once into a condensed float32 vector instead of one similarity search per
+species. Pairs are stored lower-triangle row by row (row i holds its distances
+to points 0..i-1) in a buffer with spare capacity, so adding a Pokemon writes
+one O(n) row past the end readers can see instead of copying the matrix.
+When ARTIFACT_DIR is set the matrix is published to the shared artifact store,
+so restarts and other workers reuse it while the roster is unchanged; writes
+are published in batches rather than one file set per write.
+"""
+
+import hashlib
+import os
+import threading
+import numpy as np
+from shared_artifacts import get_artifact_store
+
+PAIRWISE_ARTIFACT = "pairwise_distances"
+STAT_DIMENSIONS = 6
+# Uniqueness is the mean distance to this many nearest neighbours
+UNIQUENESS_NEIGHBOURS = 5
+# Writes held back before the matrix is republished to the artifact store
+PAIRWISE_PUBLISH_BATCH = int(os.getenv("PAIRWISE_PUBLISH_BATCH", "32"))
+
+def row_offset(i):
+    """Start of row i in the condensed lower triangle"""
+    return i * (i - 1) // 2
+
+def condensed_distances(vectors):
+    """Lower-triangle pairwise Euclidean distances of the rows of vectors, as float32"""
+    n = len(vectors)
+    condensed = np.empty(row_offset(n), dtype=np.float32)
+    for i in range(1, n):
+        condensed[row_offset(i):row_offset(i + 1)] = np.linalg.norm(vectors[:i] - vectors[i], axis=1)
+    return condensed
+
+def condensed_pairs(positions):
+    """(i, j) point positions, i > j, for condensed positions"""
+    positions = np.asarray(positions, dtype=np.int64)
+    rows = ((1 + np.sqrt(1 + 8 * positions.astype(np.float64))) // 2).astype(np.int64)
+    # Guard against floating point error near row boundaries
+    rows -= row_offset(rows) > positions
+    rows += row_offset(rows + 1) <= positions
+    return rows, positions - row_offset(rows)
+
+def roster_fingerprint(ids, vectors):
+    """Identifies the exact roster a published matrix was built from"""
+    digest = hashlib.sha1(np.ascontiguousarray(ids, dtype=np.int64).tobytes())
+    digest.update(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+    return digest.hexdigest()
+
+class PairwiseDistances:
+    """Condensed all-pairs distance matrix over base stat vectors"""
+
+    def __init__(self):
+        # (ids, vectors, payloads, condensed) swapped as one tuple so readers need no lock
+        self._state = (np.empty(0, dtype=np.int64), np.empty((0, STAT_DIMENSIONS), dtype=np.float32), [], np.empty(0, dtype=np.float32))
+        self._write_lock = threading.Lock()
+        # Writable storage behind the current condensed view; rows past the
+        # view are spare capacity (None until the first append)
+        self._buffer = None
+        # Writes not yet republished to the artifact store
+        self._unpublished = 0
+        # (state, uniqueness scores) computed on demand for the current state
+        self._uniqueness_cache = None
+        self.loaded = False
+
+    def __len__(self):
+        return len(self._state[0])
+
+    def load(self, points):
+        """Replace the matrix with (id, vector, payload) tuples, reusing a published copy if it matches"""
+        points = list(points)
+        ids = np.array([point[0] for point in points], dtype=np.int64)
+        vectors = np.array([point[1] for point in points], dtype=np.float32).reshape(len(points), STAT_DIMENSIONS)
+        payloads = [point[2] for point in points]
+        fingerprint = roster_fingerprint(ids, vectors)
+
+        condensed = None
+        store = get_artifact_store()
+        if store is not None:
+            artifact = store.attach(PAIRWISE_ARTIFACT)
+            if artifact is not None and artifact.metadata.get("fingerprint") == fingerprint:
+                condensed = artifact["condensed"]
+
+        if condensed is None:
+            condensed = condensed_distances(vectors)
+            self._publish(ids, vectors, condensed)
+
+        with self._write_lock:
+            self._state = (ids, vectors, payloads, condensed)
+            # An attached copy is a read-only mapping, so the first append copies it
+            self._buffer = None
+            self._unpublished = 0
+            self.loaded = True
+
+    def _reserve(self, condensed, size):
+        """Buffer holding condensed with room for size entries, doubling its capacity when full"""
+        buffer = self._buffer
+        if buffer is None or len(buffer) < size:
+            capacity = size if buffer is None else max(size, 2 * len(buffer))
+            buffer = np.empty(capacity, dtype=np.float32)
+            buffer[:len(condensed)] = condensed
+            self._buffer = buffer
+        return buffer
+
+    def upsert(self, pokemon_id, vector, payload):
+        """Insert or replace a single point, recomputing only its own distances"""
+        vector = np.asarray(vector, dtype=np.float32).reshape(STAT_DIMENSIONS)
+
+        with self._write_lock:
+            ids, vectors, payloads, condensed = self._state
+            positions = np.flatnonzero(ids == pokemon_id)
+            if len(positions):
+                # Re-adding an existing id rewrites entries inside the view
+                # readers hold, so it still copies (into a buffer with room to grow)
+                position = positions[0]
+                vectors = vectors.copy()
+                vectors[position] = vector
+                payloads = list(payloads)
+                payloads[position] = payload
+                buffer = np.empty(len(condensed) if self._buffer is None else len(self._buffer), dtype=np.float32)
+                buffer[:len(condensed)] = condensed
+                self._buffer = buffer
+                condensed = buffer[:len(condensed)]
+                distances = np.linalg.norm(vectors - vector, axis=1)
+                # Row entries (j < position) and column entries (rows after position)
+                condensed[row_offset(position):row_offset(position + 1)] = distances[:position]
+                later = np.arange(position + 1, len(ids))
+                condensed[row_offset(later) + position] = distances[position + 1:]
+            else:
+                # The new row lands past every published view, so readers are unaffected
+                n = len(ids)
+                buffer = self._reserve(condensed, row_offset(n + 1))
+                buffer[row_offset(n):row_offset(n + 1)] = np.linalg.norm(vectors - vector, axis=1)
+                condensed = buffer[:row_offset(n + 1)]
+                ids = np.append(ids, pokemon_id)
+                vectors = np.concatenate([vectors, vector.reshape(1, STAT_DIMENSIONS)])
+                payloads = payloads + [payload]
+            self._state = (ids, vectors, payloads, condensed)
+            self._unpublished += 1
+            publish = self._unpublished >= PAIRWISE_PUBLISH_BATCH
+
+        if publish:
+            self.publish_pending()
+
+    def publish_pending(self):
+        """Republish the matrix if writes have been held back since the last publish"""
+        with self._write_lock:
+            if not self._unpublished:
+                return
+            ids, vectors, _, condensed = self._state
+            self._unpublished = 0
+        # Outside the lock: writers keep appending past this view meanwhile
+        self._publish(ids, vectors, condensed)
+
+    def _publish(self, ids, vectors, condensed):
+        """Write the matrix to the shared artifact store, if one is configured"""
+        store = get_artifact_store()
+        if store is None:
+            return
+        store.publish(
+            PAIRWISE_ARTIFACT,
+            {"ids": ids, "vectors": vectors, "condensed": condensed},
+            {"fingerprint": roster_fingerprint(ids, vectors)}
+        )
+
+    @staticmethod
+    def _row(condensed, n, position):
+        """Distances from one point to every point (itself included, as 0)"""
+        row = np.empty(n, dtype=np.float32)
+        row[:position] = condensed[row_offset(position):row_offset(position + 1)]
+        row[position] = 0.0
+        later = np.arange(position + 1, n)
+        row[position + 1:] = condensed[row_offset(later) + position]
+        return row
+
+    def neighbours(self, pokemon_id, k=5):
+        """(nearest, farthest) k other points as (id, distance, payload) lists, or None if unknown"""
+        ids, _, payloads, condensed = self._state
+        positions = np.flatnonzero(ids == pokemon_id)
+        if not len(positions):
+            return None
+
+        position = positions[0]
+        row = self._row(condensed, len(ids), position)
+        others = np.delete(np.arange(len(ids)), position)
+        k = min(k, len(others))
+        if k < 1:
+            return [], []
+
+        nearest = others[np.argpartition(row[others], k - 1)[:k]]
+        nearest = nearest[np.lexsort((ids[nearest], row[nearest]))]
+        farthest = others[np.argpartition(-row[others], k - 1)[:k]]
+        farthest = farthest[np.lexsort((ids[farthest], -row[farthest]))]
+
+        def hits(selected):
+            return [(int(ids[i]), float(row[i]), payloads[i]) for i in selected]
+        return hits(nearest), hits(farthest)
+
+    def _uniqueness(self, state):
+        """Mean distance of every point to its nearest neighbours, cached per state"""
+        cached = self._uniqueness_cache
+        if cached is None or cached[0] is not state:
+            ids, _, _, condensed = state
+            n = len(ids)
+            k = min(UNIQUENESS_NEIGHBOURS, n - 1)
+            scores = np.zeros(n, dtype=np.float64)
+            if k >= 1:
+                for position in range(n):
+                    row = self._row(condensed, n, position)
+                    row[position] = np.inf
+                    scores[position] = np.partition(row, k - 1)[:k].mean()
+            cached = (state, scores)
+            self._uniqueness_cache = cached
+        return cached[1]
+
+    def uniqueness(self, limit=10, most_unique=True):
+        """Points ranked by uniqueness as (id, score, payload), most (or least) unique first"""
+        state = self._state
+        ids, _, payloads, _ = state
+        if not len(ids) or limit < 1:
+            return []
+
+        scores = self._uniqueness(state)
+        ordering = np.lexsort((ids, -scores if most_unique else scores))[:limit]
+        return [(int(ids[i]), float(scores[i]), payloads[i]) for i in ordering]
+
+    def closest_pairs(self, limit=10):
+        """The limit closest pairs as (distance, (id, payload), (id, payload)), closest first"""
+        ids, _, payloads, condensed = self._state
+        if len(condensed) == 0 or limit < 1:
+            return []
+
+        k = min(limit, len(condensed))
+        best = np.argpartition(condensed, k - 1)[:k]
+        best = best[np.argsort(condensed[best], kind='stable')]
+        rows, columns = condensed_pairs(best)
+        return [
+            (float(condensed[m]), (int(ids[j]), payloads[j]), (int(ids[i]), payloads[i]))
+            for m, i, j in zip(best, rows, columns)
+        ]
@@ -0,0 +1,266 @@
+"""
+In-process job queue for long-running simulations.
+
+Jobs are submitted with a kind, parameters and a priority, and get an ID that
+can be polled for status, progress and partial results. A fixed pool of worker
+threads (JOB_MAX_CONCURRENCY) takes jobs from a priority queue; no external
+broker is involved. Handlers receive the Job and call job.report() to publish
+progress, which is also where cooperative cancellation is checked.
+
+Handlers run on the worker threads, so pure-Python simulation work would
+compete with the API's event loop for the GIL. CPU-bound handlers hand their
+simulation to run_in_process(), which runs it in a pool of JOB_MAX_CONCURRENCY
+processes and relays its progress calls back through a multiprocessing
+manager queue; cancelling the job stops the child at its next progress call.
+Handlers that must change this process's state (the tournament job publishes
+the in-memory matrix) still run their work on the worker thread.
+"""
+
+import concurrent.futures
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import uuid
+
+# Jobs allowed to run at the same time
+JOB_MAX_CONCURRENCY = int(os.getenv("JOB_MAX_CONCURRENCY", "2"))
+# Jobs allowed to wait in the queue before submissions are refused
+JOB_MAX_PENDING = int(os.getenv("JOB_MAX_PENDING", "50"))
+# Finished jobs kept for polling before the oldest are discarded
+JOB_HISTORY_LIMIT = 200
+# Seconds between checks for progress and cancellation of work in a process
+PROCESS_POLL_SECONDS = 0.1
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = {SUCCEEDED, FAILED, CANCELLED}
+
+class JobCancelled(Exception):
+    """Raised inside a handler when its job has been cancelled"""
+
+class JobQueueFull(Exception):
+    """Raised by submit when JOB_MAX_PENDING jobs are already waiting"""
+
+class ProcessProgress:
+    """Picklable progress callback that forwards its arguments to the parent job"""
+
+    def __init__(self, updates, cancelled):
+        self.updates = updates
+        self.cancelled = cancelled
+
+    def __call__(self, *args):
+        if self.cancelled.is_set():
+            raise JobCancelled()
+        self.updates.put(args)
+
+class Job:
+    """State of a single submitted job"""
+
+    def __init__(self, kind, params, priority=0):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.priority = priority
+        self.status = QUEUED
+        self.progress = 0.0
+        self.partial_result = None
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._cancel_event = threading.Event()
+
+    @property
+    def cancel_requested(self):
+        return self._cancel_event.is_set()
+
+    def report(self, progress, partial_result=None):
+        """Publish progress (0-1) and optional partial results; raises JobCancelled if cancelled"""
+        self.progress = max(0.0, min(1.0, progress))
+        if partial_result is not None:
+            self.partial_result = partial_result
+        if self.cancel_requested:
+            raise JobCancelled()
+
+    def to_dict(self, include_result=False):
+        """Serialize job status for API responses"""
+        data = {
+            "id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "priority": self.priority,
+            "status": self.status,
+            "progress": round(self.progress, 4),
+            "partial_result": self.partial_result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+        if include_result:
+            data["result"] = self.result
+        return data
+
+class JobQueue:
+    """Priority queue of jobs served by a fixed pool of worker threads"""
+
+    def __init__(self, max_concurrency=JOB_MAX_CONCURRENCY, history_limit=JOB_HISTORY_LIMIT, max_pending=JOB_MAX_PENDING):
+        self.max_concurrency = max(1, max_concurrency)
+        self.history_limit = history_limit
+        self.max_pending = max_pending
+        self._handlers = {}
+        self._jobs = {}
+        self._queue = queue.PriorityQueue()
+        # Tie-breaker so equal priorities run in submission order
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._workers = []
+        # (process pool, manager) for run_in_process, started on first use
+        self._processes = None
+
+    def register(self, kind, handler):
+        """Register the function that runs jobs of a given kind"""
+        self._handlers[kind] = handler
+
+    @property
+    def kinds(self):
+        return sorted(self._handlers)
+
+    def submit(self, kind, params=None, priority=0):
+        """Queue a job and return it; higher priority runs first (raises JobQueueFull when the queue is full)"""
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind '{kind}'")
+
+        job = Job(kind, params or {}, priority)
+        with self._lock:
+            if sum(queued.status == QUEUED for queued in self._jobs.values()) >= self.max_pending:
+                raise JobQueueFull(f"{self.max_pending} jobs are already waiting")
+            self._jobs[job.id] = job
+            self._start_workers()
+        self._queue.put((-priority, next(self._sequence), job.id))
+        return job
+
+    def get(self, job_id):
+        """Look up a job by ID (None if unknown or already discarded)"""
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """Cancel a queued job or ask a running one to stop"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+
+        job._cancel_event.set()
+        with self._lock:
+            if job.status == QUEUED:
+                self._finish(job, CANCELLED)
+        return job
+
+    def _process_resources(self):
+        """The shared (process pool, manager), started on first use"""
+        if self._processes is None:
+            with self._lock:
+                if self._processes is None:
+                    self._processes = (
+                        concurrent.futures.ProcessPoolExecutor(max_workers=self.max_concurrency),
+                        multiprocessing.Manager()
+                    )
+        return self._processes
+
+    def run_in_process(self, job, function, *args, on_progress=None, **kwargs):
+        """
+        Run function(*args, progress=callback, **kwargs) in a worker process and return its result.
+
+        Progress calls made in the child are replayed here as on_progress(*args),
+        so handlers can still call job.report(); cancelling the job stops the child.
+        """
+        pool, manager = self._process_resources()
+        updates, cancelled = manager.Queue(), manager.Event()
+        future = pool.submit(function, *args, progress=ProcessProgress(updates, cancelled), **kwargs)
+        try:
+            while True:
+                # Every update is queued before the child returns, so drain after checking
+                finished = future.done()
+                while True:
+                    try:
+                        update = updates.get_nowait()
+                    except queue.Empty:
+                        break
+                    if on_progress is not None:
+                        on_progress(*update)
+                if finished:
+                    return future.result()
+                if job.cancel_requested:
+                    raise JobCancelled()
+                concurrent.futures.wait([future], timeout=PROCESS_POLL_SECONDS)
+        except JobCancelled:
+            cancelled.set()
+            future.cancel()
+            raise
+
+    def close(self):
+        """Stop the worker processes (call at shutdown)"""
+        with self._lock:
+            processes, self._processes = self._processes, None
+        if processes is not None:
+            pool, manager = processes
+            pool.shutdown(cancel_futures=True)
+            manager.shutdown()
+
+    def _start_workers(self):
+        """Start worker threads on first use (caller holds the lock)"""
+        while len(self._workers) < self.max_concurrency:
+            worker = threading.Thread(target=self._work, name=f"job-worker-{len(self._workers)}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def _finish(self, job, status):
+        """Record a terminal state (caller holds the lock)"""
+        job.status = status
+        job.finished_at = time.time()
+        if status == SUCCEEDED:
+            job.progress = 1.0
+        self._prune_history()
+
+    def _prune_history(self):
+        """Drop the oldest finished jobs beyond the history limit"""
+        finished = [job for job in self._jobs.values() if job.status in FINISHED_STATES]
+        if len(finished) <= self.history_limit:
+            return
+        finished.sort(key=lambda job: job.finished_at)
+        for job in finished[:len(finished) - self.history_limit]:
+            del self._jobs[job.id]
+
+    def _work(self):
+        """Worker loop: run jobs in priority order"""
+        while True:
+            _, _, job_id = self._queue.get()
+            job = self._jobs.get(job_id)
+
+            with self._lock:
+                if job is None or job.status != QUEUED:
+                    continue
+                job.status = RUNNING
+                job.started_at = time.time()
+
+            try:
+                result = self._handlers[job.kind](job)
+            except JobCancelled:
+                with self._lock:
+                    self._finish(job, CANCELLED)
+            except Exception as e:
+                print(f"Error running job {job.id} ({job.kind}): {e}")
+                with self._lock:
+                    job.error = str(e)
+                    self._finish(job, FAILED)
+            else:
+                with self._lock:
+                    job.result = result
+                    self._finish(job, SUCCEEDED)
@@ -0,0 +1,199 @@
+"""
+Inverted index behind keyword move search.
+
+Move search scores every move against the query words plus a handful of
+phrase triggers ("powerful", "high crit", "sure hit", status names, ...).
+Instead of rebuilding each move's text and re-testing every keyword per move
+and per query, the index is built once: every substring of a move's name,
+type, category and effect words maps to a posting list of (move, field
+weight), so a query word is one dict lookup, and the attribute triggers are
+precomputed per-move bonus arrays (power tiers, accuracy, crit ratio, status
+effect, category). Only the top-k moves are formatted, with descriptions
+built for those alone.
+"""
+
+import heapq
+import threading
+import numpy as np
+
+# Similarity is score / MAX_SCORE, capped at 1
+MAX_SCORE = 10
+
+# Per-word field weights, highest matching field wins
+NAME_WEIGHT = 3
+TYPE_WEIGHT = 2
+CATEGORY_WEIGHT = 2
+EFFECT_WEIGHT = 2
+TEXT_WEIGHT = 1
+
+# Query phrases that switch on attribute bonuses
+POWER_TERMS = ('powerful', 'strong', 'high damage', 'devastating')
+CRIT_TERMS = ('critical', 'crit', 'high crit')
+SURE_HIT_TERMS = ('accurate', 'reliable', 'sure hit')
+INACCURATE_TERMS = ('miss', 'unreliable', 'low accuracy', 'inaccurate')
+SPECIAL_TERMS = ('special', 'ranged', 'projectile')
+STATUS_KEYWORDS = {
+    'paralysis': ('paralysis', 'paralyze', 'thunder wave'),
+    'burn': ('burn', 'fire'),
+    'freeze': ('freeze', 'ice'),
+    'poison': ('poison', 'toxic'),
+    'sleep': ('sleep',),
+    'confusion': ('confusion', 'confuse'),
+    'flinch': ('flinch',)
+}
+
+# (minimum power, bonus) tiers for "powerful" queries, checked in order
+POWER_TIERS = ((120, 4), (100, 3), (80, 1))
+CRIT_BONUS = 4
+SURE_HIT_ACCURACY, SURE_HIT_BONUS = 95, 2
+INACCURATE_ACCURACY, INACCURATE_BONUS = 80, 3
+STATUS_BONUS = 3
+CATEGORY_BONUS = 2
+
+def substrings(word):
+    """Every non-empty substring of a word"""
+    return {word[start:end] for start in range(len(word)) for end in range(start + 1, len(word) + 1)}
+
+def move_description(move):
+    """One-sentence summary of a move's power, accuracy, effect and crit ratio"""
+    return (
+        f"A {move['category']} {move['type']}-type move" +
+        (f" with {move['power']} power" if move['power'] else "") +
+        (f" and {move['accuracy']}% accuracy" if move['accuracy'] else "") +
+        (f". Has a chance to cause {move['effect']}" if move.get('effect') else "") +
+        (". High critical hit ratio" if move.get('crit_ratio', 1) > 1 else "") + "."
+    )
+
+def move_result(move, similarity):
+    """A move in the search response shape"""
+    return {
+        'name': move['name'],
+        'type': move['type'],
+        'category': move['category'],
+        'power': move['power'],
+        'accuracy': move['accuracy'],
+        'effect': move.get('effect'),
+        'crit_ratio': move.get('crit_ratio', 1),
+        'similarity': similarity,
+        'description': move_description(move)
+    }
+
+def move_postings(move):
+    """{substring: field weight} for one move's words"""
+    weights = {}
+
+    def add(terms, weight):
+        for term in terms:
+            if weights.get(term, 0) < weight:
+                weights[term] = weight
+
+    move_type, category, effect = move['type'].lower(), move['category'].lower(), (move.get('effect') or '').lower()
+    # Any word of the full move text scores a little
+    for word in f"{move['name']} {move_type} {category} {effect}".lower().split():
+        add(substrings(word), TEXT_WEIGHT)
+    for word in effect.split():
+        add(substrings(word), EFFECT_WEIGHT)
+    # Type and category only count as whole words
+    add([category], CATEGORY_WEIGHT)
+    add([move_type], TYPE_WEIGHT)
+    for word in move['name'].lower().split():
+        add(substrings(word), NAME_WEIGHT)
+    return weights
+
+class MoveIndex:
+    """Precomputed keyword postings and attribute bonuses over a move table"""
+
+    def __init__(self):
+        # (moves, substring -> (positions, weights), bonus arrays, name -> move)
+        # swapped as one tuple so readers need no lock
+        self._state = ([], {}, {}, {})
+        self._write_lock = threading.Lock()
+        self.loaded = False
+
+    def __len__(self):
+        return len(self._state[0])
+
+    def load(self, moves):
+        """Replace the index with the given move dicts"""
+        moves = list(moves)
+        postings = {}
+        for position, move in enumerate(moves):
+            for term, weight in move_postings(move).items():
+                postings.setdefault(term, []).append((position, weight))
+        postings = {
+            term: (np.array([position for position, _ in hits], dtype=np.int32), np.array([weight for _, weight in hits], dtype=np.int32))
+            for term, hits in postings.items()
+        }
+
+        power = np.array([move['power'] or 0 for move in moves], dtype=np.int32)
+        # Moves that never miss have no accuracy value
+        accuracy = np.array([101 if move['accuracy'] is None else move['accuracy'] for move in moves], dtype=np.int32)
+        power_bonus = np.zeros(len(moves), dtype=np.int32)
+        for minimum, bonus in reversed(POWER_TIERS):
+            power_bonus[power >= minimum] = bonus
+        effects = np.array([move.get('effect') or '' for move in moves], dtype=object)
+        categories = np.array([move['category'] for move in moves], dtype=object)
+        bonuses = {
+            'power': power_bonus,
+            'crit': np.where(np.array([move.get('crit_ratio', 1) > 1 for move in moves], dtype=bool), CRIT_BONUS, 0),
+            'sure_hit': np.where(accuracy >= SURE_HIT_ACCURACY, SURE_HIT_BONUS, 0),
+            'inaccurate': np.where(accuracy <= INACCURATE_ACCURACY, INACCURATE_BONUS, 0),
+            **{f"status:{effect}": np.where(effects == effect, STATUS_BONUS, 0) for effect in STATUS_KEYWORDS},
+            **{f"category:{category}": np.where(categories == category, CATEGORY_BONUS, 0) for category in ('physical', 'special', 'status')}
+        }
+        by_name = {move['name'].lower(): move for move in moves}
+
+        with self._write_lock:
+            self._state = (moves, postings, bonuses, by_name)
+            self.loaded = True
+
+    def get(self, name):
+        """Move dict by case-insensitive name, or None"""
+        return self._state[3].get(name.lower())
+
+    @staticmethod
+    def triggered_bonuses(query):
+        """Names of the attribute bonuses a lowercased query switches on"""
+        def mentions(terms):
+            return any(term in query for term in terms)
+
+        triggered = []
+        if mentions(POWER_TERMS):
+            triggered.append('power')
+        if mentions(CRIT_TERMS):
+            triggered.append('crit')
+        if mentions(SURE_HIT_TERMS):
+            triggered.append('sure_hit')
+        if mentions(INACCURATE_TERMS):
+            triggered.append('inaccurate')
+        triggered.extend(f"status:{effect}" for effect, keywords in STATUS_KEYWORDS.items() if mentions(keywords))
+        if 'physical' in query:
+            triggered.append('category:physical')
+        if mentions(SPECIAL_TERMS):
+            triggered.append('category:special')
+        if 'status' in query:
+            triggered.append('category:status')
+        return triggered
+
+    def scores(self, query):
+        """Raw keyword score of every move for a query"""
+        moves, postings, bonuses, _ = self._state
+        query = query.lower()
+        scores = np.zeros(len(moves), dtype=np.int32)
+        for word in query.split():
+            posting = postings.get(word)
+            if posting is not None:
+                scores[posting[0]] += posting[1]
+        for bonus in self.triggered_bonuses(query):
+            scores += bonuses[bonus]
+        return scores
+
+    def search(self, query, limit=20):
+        """Best limit matching moves as result dicts, most similar first"""
+        moves = self._state[0]
+        scores = self.scores(query)
+        matches = np.flatnonzero(scores > 0)
+        # Capped similarity, ties in table order (nlargest is stable)
+        best = heapq.nlargest(limit, matches.tolist(), key=lambda position: min(int(scores[position]), MAX_SCORE))
+
+        return [move_result(moves[position], min(int(scores[position]) / MAX_SCORE, 1.0)) for position in best]
@@ -0,0 +1,252 @@
+"""
+Numeric feature vectors for moves.
+
+Every move is encoded as a fixed-length vector - type one-hot, category
+one-hot, power / MAX_MOVE_POWER, accuracy, crit ratio and status effect
+one-hot, all in [0, 1] - and the table is held as one float32 matrix (and
+mirrored into the Qdrant "moves" collection by vector_service). "Moves like
+Thunderbolt" is then a Euclidean k-NN over the matrix, and a free-text query
+is parsed into a target vector plus the feature groups it mentions, so only
+those columns are compared. Query words that name no feature ("beam" in "ice
+beam") are matched against move names instead, and each mentioned feature
+group and each such word counts equally towards a move's similarity. Moves
+matching nothing the query asked for score 0 and are dropped rather than
+padding the results. Feature scores are vectorized over the whole matrix and
+name words are looked up in indexes built at load time, so a search never
+loops over the moves in Python.
+"""
+
+import re
+import threading
+import numpy as np
+from battle_service import TYPE_EFFECTIVENESS
+from move_index import move_result, POWER_TERMS, CRIT_TERMS, SURE_HIT_TERMS, INACCURATE_TERMS, SPECIAL_TERMS
+
+MOVE_TYPES = tuple(TYPE_EFFECTIVENESS)
+MOVE_CATEGORIES = ('physical', 'special', 'status')
+MOVE_EFFECTS = ('paralysis', 'burn', 'freeze', 'poison', 'sleep', 'confusion', 'flinch')
+# Highest base power of any move (Explosion)
+MAX_MOVE_POWER = 250
+MAX_CRIT_RATIO = 3
+
+def feature_groups(sizes):
+    """Column slice of each (group, size), laid out in order"""
+    groups, start = {}, 0
+    for group, size in sizes:
+        groups[group] = slice(start, start + size)
+        start += size
+    return groups
+
+# Column ranges of each feature group
+FEATURE_GROUPS = feature_groups((
+    ('type', len(MOVE_TYPES)),
+    ('category', len(MOVE_CATEGORIES)),
+    ('power', 1),
+    ('accuracy', 1),
+    ('crit', 1),
+    ('effect', len(MOVE_EFFECTS))
+))
+MOVE_VECTOR_SIZE = max(group.stop for group in FEATURE_GROUPS.values())
+
+# Free-text words for each status effect ("poison" alone names the type)
+EFFECT_TERMS = {
+    'paralysis': ('paralysis', 'paralyze', 'paralyzing'),
+    'burn': ('burn', 'burning'),
+    'freeze': ('freeze', 'freezing', 'frozen'),
+    'poison': ('toxic', 'poisoning'),
+    'sleep': ('sleep',),
+    'confusion': ('confusion', 'confuse'),
+    'flinch': ('flinch',)
+}
+WEAK_TERMS = ('weak', 'light', 'chip')
+# Words that carry neither a feature nor a move name ("a fire move that can burn")
+FILLER_WORDS = ('a', 'an', 'the', 'and', 'or', 'of', 'with', 'that', 'can', 'may', 'to', 'move', 'moves', 'attack', 'type')
+NAME_SEPARATORS = re.compile(r"[\s\-]+")
+# Accuracy targeted by "inaccurate" queries (the worst real moves sit around 50%)
+INACCURATE_TARGET = 0.5
+
+def one_hot(values, value):
+    row = np.zeros(len(values), dtype=np.float32)
+    if value in values:
+        row[values.index(value)] = 1.0
+    return row
+
+def move_vector(move):
+    """Feature vector of one move dict"""
+    vector = np.zeros(MOVE_VECTOR_SIZE, dtype=np.float32)
+    vector[FEATURE_GROUPS['type']] = one_hot(MOVE_TYPES, move['type'])
+    vector[FEATURE_GROUPS['category']] = one_hot(MOVE_CATEGORIES, move['category'])
+    vector[FEATURE_GROUPS['power']] = min((move['power'] or 0) / MAX_MOVE_POWER, 1.0)
+    # Moves that never miss have no accuracy value
+    vector[FEATURE_GROUPS['accuracy']] = 1.0 if move['accuracy'] is None else move['accuracy'] / 100
+    vector[FEATURE_GROUPS['crit']] = (min(move.get('crit_ratio', 1), MAX_CRIT_RATIO) - 1) / (MAX_CRIT_RATIO - 1)
+    vector[FEATURE_GROUPS['effect']] = one_hot(MOVE_EFFECTS, move.get('effect'))
+    return vector
+
+def parse_move_query(query):
+    """(target vector, mentioned columns mask) for a free-text query, or None if it names no feature"""
+    query = query.lower()
+    words = set(query.replace(',', ' ').split())
+
+    def mentions(terms):
+        # Phrases match anywhere, single terms only as whole words
+        return any(term in query if ' ' in term else term in words for term in terms)
+
+    target = np.zeros(MOVE_VECTOR_SIZE, dtype=np.float32)
+    mask = np.zeros(MOVE_VECTOR_SIZE, dtype=bool)
+
+    def want(group, values):
+        target[FEATURE_GROUPS[group]] = values
+        mask[FEATURE_GROUPS[group]] = True
+
+    types = [move_type for move_type in MOVE_TYPES if move_type in words]
+    if types:
+        want('type', sum(one_hot(MOVE_TYPES, move_type) for move_type in types) / len(types))
+    categories = [category for category, terms in zip(MOVE_CATEGORIES, (('physical',), SPECIAL_TERMS, ('status',))) if mentions(terms)]
+    if categories:
+        want('category', sum(one_hot(MOVE_CATEGORIES, category) for category in categories) / len(categories))
+    if mentions(POWER_TERMS):
+        want('power', 1.0)
+    elif mentions(WEAK_TERMS):
+        want('power', 0.0)
+    if mentions(INACCURATE_TERMS):
+        want('accuracy', INACCURATE_TARGET)
+    elif mentions(SURE_HIT_TERMS):
+        want('accuracy', 1.0)
+    if mentions(CRIT_TERMS):
+        want('crit', 1.0)
+    effects = [effect for effect in MOVE_EFFECTS if mentions(EFFECT_TERMS[effect])]
+    if effects:
+        want('effect', sum(one_hot(MOVE_EFFECTS, effect) for effect in effects) / len(effects))
+
+    return (target, mask) if mask.any() else None
+
+# Every word some feature term is made of, so the rest can be matched against names
+FEATURE_WORDS = frozenset(
+    word
+    for terms in (MOVE_TYPES, MOVE_CATEGORIES, SPECIAL_TERMS, POWER_TERMS, WEAK_TERMS, INACCURATE_TERMS,
+                  SURE_HIT_TERMS, CRIT_TERMS, *EFFECT_TERMS.values())
+    for term in terms
+    for word in term.split()
+)
+
+def name_words(query):
+    """Distinct query words that name no feature, in query order"""
+    words = query.lower().replace(',', ' ').split()
+    return list(dict.fromkeys(word for word in words if word not in FEATURE_WORDS and word not in FILLER_WORDS))
+
+def name_key(name):
+    """Lowercased name with spaces and hyphens normalized ("Double-Edge" -> "double edge")"""
+    return ' '.join(NAME_SEPARATORS.split(name.lower().replace(',', ' ').strip()))
+
+def named_positions(query, positions):
+    """Positions of moves whose full name appears as a run of words in the query"""
+    words = name_key(query).split()
+    runs = (' '.join(words[start:end]) for start in range(len(words)) for end in range(start + 1, len(words) + 1))
+    return [positions[run] for run in runs if run in positions]
+
+def name_prefixes(moves):
+    """{prefix of a move name word: positions of the moves with such a word}"""
+    prefixes = {}
+    for position, move in enumerate(moves):
+        for word in NAME_SEPARATORS.split(move['name'].lower()):
+            for end in range(1, len(word) + 1):
+                prefixes.setdefault(word[:end], set()).add(position)
+    return {prefix: np.array(sorted(positions), dtype=np.int64) for prefix, positions in prefixes.items()}
+
+def max_distance(columns):
+    """Largest possible distance over the given columns"""
+    # Every feature lies in [0, 1], so one-hot groups differ by at most sqrt(2) and the rest by 1
+    return float(np.sqrt(sum(
+        2.0 if FEATURE_GROUPS[group].stop - FEATURE_GROUPS[group].start > 1 else 1.0
+        for group in FEATURE_GROUPS
+        if columns[FEATURE_GROUPS[group]].any()
+    )))
+
+class MoveVectors:
+    """Move feature matrix with k-NN by move and by parsed query"""
+
+    def __init__(self):
+        # (moves, (n, MOVE_VECTOR_SIZE) float32 matrix, name_key -> position,
+        # name word prefix -> positions) swapped as one tuple so readers need no lock
+        self._state = ([], np.empty((0, MOVE_VECTOR_SIZE), dtype=np.float32), {}, {})
+        self._write_lock = threading.Lock()
+        self.loaded = False
+
+    def __len__(self):
+        return len(self._state[0])
+
+    def load(self, moves):
+        """Replace the matrix with the given move dicts"""
+        moves = list(moves)
+        matrix = np.array([move_vector(move) for move in moves], dtype=np.float32).reshape(len(moves), MOVE_VECTOR_SIZE)
+        positions = {name_key(move['name']): position for position, move in enumerate(moves)}
+        prefixes = name_prefixes(moves)
+
+        with self._write_lock:
+            self._state = (moves, matrix, positions, prefixes)
+            self.loaded = True
+
+    def points(self):
+        """(position, vector, move) for every move, e.g. to mirror into a vector store"""
+        moves, matrix, _, _ = self._state
+        return [(position, matrix[position], move) for position, move in enumerate(moves)]
+
+    @staticmethod
+    def _distances(matrix, target, columns):
+        """Distance of every move to target over the given columns"""
+        diff = matrix[:, columns] - target[columns]
+        return np.sqrt(np.einsum('ij,ij->i', diff, diff))
+
+    @staticmethod
+    def _best(moves, scores, distances, limit, candidates, first=None):
+        """Result dicts for the limit best-scoring candidates with a positive score"""
+        candidates = candidates[scores[candidates] > 0]
+        if first is None:
+            first = np.zeros(len(moves), dtype=bool)
+        # Highest score, then moves named outright, then closest, ties in table order
+        best = candidates[np.lexsort((candidates, distances[candidates], ~first[candidates], -scores[candidates]))][:limit]
+        return [
+            {**move_result(moves[position], round(float(scores[position]), 4)), 'distance': float(distances[position])}
+            for position in best
+        ]
+
+    def similar(self, name, limit=10):
+        """Moves most like the named move (itself excluded), or None if the move is unknown"""
+        moves, matrix, positions, _ = self._state
+        position = positions.get(name_key(name))
+        if position is None:
+            return None
+        columns = np.ones(MOVE_VECTOR_SIZE, dtype=bool)
+        distances = self._distances(matrix, matrix[position], columns)
+        scores = np.maximum(0.0, 1.0 - distances / max_distance(columns))
+        return self._best(moves, scores, distances, limit, np.delete(np.arange(len(moves)), position))
+
+    def search(self, query, limit=20):
+        """Moves best matching a free-text query's features and name words, or None if the query names no feature"""
+        parsed = parse_move_query(query)
+        if parsed is None:
+            return None
+        moves, matrix, positions, prefixes = self._state
+        target, columns = parsed
+        distances = self._distances(matrix, target, columns)
+
+        # Each mentioned feature group and each leftover word weighs the same
+        scores = np.zeros(len(moves), dtype=np.float64)
+        groups = [group for group in FEATURE_GROUPS.values() if columns[group].any()]
+        for group in groups:
+            if group.stop - group.start > 1:
+                # One-hot groups match when the move has one of the wanted values
+                scores += (matrix[:, group] @ target[group]) > 0
+            else:
+                scores += 1.0 - np.abs(matrix[:, group.start] - target[group.start])
+        words = name_words(query)
+        for word in words:
+            hits = prefixes.get(word)
+            if hits is not None:
+                scores[hits] += 1
+        scores /= len(groups) + len(words)
+
+        named = np.zeros(len(moves), dtype=bool)
+        named[named_positions(query, positions)] = True
+        return self._best(moves, scores, distances, limit, np.arange(len(moves)), named)
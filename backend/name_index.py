@@ -0,0 +1,237 @@
+"""
+In-memory Pokemon name index for autocomplete.
+
+A prefix trie answers "starts with" (on the full name and on every word in
+it) and an n-gram inverted index answers "contains", so name lookups never
+scroll Qdrant. Matches rank prefix > word-start > substring, shorter names
+first within a tier. Typo-tolerant lookups use a SymSpell-style deletion
+dictionary over full names and name words, ranked by edit distance.
+"""
+
+import re
+import threading
+
+# Longest n-gram kept in the inverted index; longer queries intersect trigrams
+NGRAM_SIZE = 3
+WORD_SEPARATORS = re.compile(r"[\s\-'.]+")
+
+# Match tiers in rank order
+MATCH_TYPES = ("prefix", "word_start", "substring")
+
+# Largest edit distance accepted by fuzzy search (bounds the deletion dictionary)
+MAX_FUZZY_DISTANCE = 2
+
+def normalize_name(name):
+    """Lowercase and trim a name for matching"""
+    return name.lower().strip()
+
+def name_ngrams(name):
+    """Every 1- to NGRAM_SIZE-character substring of a normalized name"""
+    return {name[start:start + size] for size in range(1, NGRAM_SIZE + 1) for start in range(len(name) - size + 1)}
+
+def levenshtein(a, b, max_distance):
+    """Edit distance between two strings, or max_distance + 1 once it is exceeded"""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        # Every path runs through this row, so its minimum is a lower bound
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return min(previous[-1], max_distance + 1)
+
+def deletes(word, max_distance):
+    """word plus every string reachable from it by up to max_distance deletions"""
+    variants = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {term[:i] + term[i + 1:] for term in frontier for i in range(len(term))}
+        variants |= frontier
+    return variants
+
+class DeletionIndex:
+    """SymSpell-style dictionary: every term indexed under its deletion variants"""
+
+    def __init__(self, max_distance=MAX_FUZZY_DISTANCE):
+        self.max_distance = max_distance
+        self.variants = {}
+        self.terms = set()
+
+    def add(self, term):
+        if term in self.terms:
+            return
+        self.terms.add(term)
+        for variant in deletes(term, self.max_distance):
+            self.variants.setdefault(variant, set()).add(term)
+
+    def search(self, word, max_distance):
+        """All (distance, term) pairs within max_distance"""
+        max_distance = min(max_distance, self.max_distance)
+        # Two strings within k edits share a variant reachable by k deletions from each
+        candidates = set()
+        for variant in deletes(word, max_distance):
+            candidates |= self.variants.get(variant, set())
+
+        found = []
+        for term in candidates:
+            distance = levenshtein(word, term, max_distance)
+            if distance <= max_distance:
+                found.append((distance, term))
+        return found
+
+class PrefixTrie:
+    """Character trie where every node knows the ids of names passing through it"""
+
+    def __init__(self):
+        self.root = {}
+
+    def insert(self, key, pokemon_id):
+        node = self.root
+        for char in key:
+            node = node.setdefault(char, {})
+            node.setdefault(None, set()).add(pokemon_id)
+
+    def remove(self, key, pokemon_id):
+        node = self.root
+        for char in key:
+            node = node.get(char)
+            if node is None:
+                return
+            node.get(None, set()).discard(pokemon_id)
+
+    def ids_with_prefix(self, prefix):
+        node = self.root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return set()
+        return node.get(None, set())
+
+class NameIndex:
+    """Prefix trie plus n-gram index over Pokemon names"""
+
+    def __init__(self):
+        self._names = {}  # id -> (normalized name, name)
+        self._prefixes = PrefixTrie()
+        self._word_prefixes = PrefixTrie()
+        self._ngrams = {}
+        # Full names and name words for fuzzy lookups; renamed entries stay in
+        # the dictionary and are filtered out through _fuzzy_ids
+        self._deletions = DeletionIndex()
+        self._fuzzy_ids = {}
+        self._write_lock = threading.Lock()
+        self.loaded = False
+
+    def __len__(self):
+        return len(self._names)
+
+    def load(self, entries):
+        """Replace the index contents with (id, name) pairs"""
+        with self._write_lock:
+            self._names = {}
+            self._prefixes = PrefixTrie()
+            self._word_prefixes = PrefixTrie()
+            self._ngrams = {}
+            self._deletions = DeletionIndex()
+            self._fuzzy_ids = {}
+            for pokemon_id, name in entries:
+                self._insert(pokemon_id, name)
+            self.loaded = True
+
+    def upsert(self, pokemon_id, name):
+        """Insert or rename a single Pokemon"""
+        with self._write_lock:
+            if pokemon_id in self._names:
+                self._remove(pokemon_id)
+            self._insert(pokemon_id, name)
+
+    def _insert(self, pokemon_id, display_name):
+        name = normalize_name(display_name)
+        self._names[pokemon_id] = (name, display_name)
+        self._prefixes.insert(name, pokemon_id)
+        for word in WORD_SEPARATORS.split(name):
+            self._word_prefixes.insert(word, pokemon_id)
+        for gram in name_ngrams(name):
+            self._ngrams.setdefault(gram, set()).add(pokemon_id)
+        for term in self._fuzzy_terms(name):
+            self._deletions.add(term)
+            self._fuzzy_ids.setdefault(term, set()).add(pokemon_id)
+
+    def _remove(self, pokemon_id):
+        name, _ = self._names.pop(pokemon_id)
+        self._prefixes.remove(name, pokemon_id)
+        for word in WORD_SEPARATORS.split(name):
+            self._word_prefixes.remove(word, pokemon_id)
+        for gram in name_ngrams(name):
+            self._ngrams[gram].discard(pokemon_id)
+        for term in self._fuzzy_terms(name):
+            self._fuzzy_ids[term].discard(pokemon_id)
+
+    @staticmethod
+    def _fuzzy_terms(name):
+        """The full name plus each of its words, so form names match on the species"""
+        return {name} | {word for word in WORD_SEPARATORS.split(name) if word}
+
+    def _substring_ids(self, query):
+        """Ids of names containing the query, via the n-gram postings"""
+        if len(query) <= NGRAM_SIZE:
+            return set(self._ngrams.get(query, ()))
+
+        grams = sorted((query[start:start + NGRAM_SIZE] for start in range(len(query) - NGRAM_SIZE + 1)),
+                       key=lambda gram: len(self._ngrams.get(gram, ())))
+        candidates = set(self._ngrams.get(grams[0], ()))
+        for gram in grams[1:]:
+            if not candidates:
+                break
+            candidates &= self._ngrams.get(gram, set())
+        # Trigram hits can be out of order, so confirm the real substring
+        return {pokemon_id for pokemon_id in candidates if query in self._names[pokemon_id][0]}
+
+    def search(self, query, limit=10):
+        """Return up to limit (id, name, match type) matches, best first"""
+        query = normalize_name(query)
+        if not query:
+            return []
+
+        with self._write_lock:
+            tiers = [
+                set(self._prefixes.ids_with_prefix(query)),
+                set(self._word_prefixes.ids_with_prefix(query)),
+                self._substring_ids(query)
+            ]
+            names = self._names
+
+            results = []
+            seen = set()
+            for tier, ids in enumerate(tiers):
+                ranked = sorted(ids - seen, key=lambda pokemon_id: (len(names[pokemon_id][0]), names[pokemon_id][0], pokemon_id))
+                for pokemon_id in ranked:
+                    results.append((pokemon_id, names[pokemon_id][1], MATCH_TYPES[tier]))
+                    if len(results) >= limit:
+                        return results
+                seen |= ids
+            return results
+
+    def fuzzy_search(self, query, max_distance=2, limit=10):
+        """Return up to limit (id, name, distance) matches, closest first"""
+        query = normalize_name(query)
+        max_distance = max(0, min(max_distance, MAX_FUZZY_DISTANCE))
+        if not query:
+            return []
+
+        with self._write_lock:
+            best = {}
+            for distance, term in self._deletions.search(query, max_distance):
+                for pokemon_id in self._fuzzy_ids.get(term, ()):
+                    # Whole-name hits beat word hits at the same distance
+                    key = (distance, term != self._names[pokemon_id][0])
+                    if pokemon_id not in best or key < best[pokemon_id]:
+                        best[pokemon_id] = key
+
+            names = self._names
+            ranked = sorted(best, key=lambda pokemon_id: (best[pokemon_id], len(names[pokemon_id][0]), names[pokemon_id][0], pokemon_id))
+            return [(pokemon_id, names[pokemon_id][1], best[pokemon_id][0]) for pokemon_id in ranked[:limit]]
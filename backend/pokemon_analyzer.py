@@ -2,18 +2,12 @@ import requests
 import json
 import numpy as np
 from vector_service import get_all_pokemon
+from rank_index import POWER_WEIGHTS
 
 class PokemonAnalyzer:
     def __init__(self):
         self.pokemon_data = []
-        self.stat_weights = {
-            'hp': 1.0,
-            'attack': 1.2,
-            'defense': 1.0,
-            'special_attack': 1.2,
-            'special_defense': 1.0,
-            'speed': 1.1
-        }
+        self.stat_weights = dict(POWER_WEIGHTS)
     
     def load_pokemon_data(self):
         """Load all Pokemon data from the vector database"""
@@ -0,0 +1,195 @@
+"""
+Pre-sorted Pokemon rankings for every /pokemon/top/ criteria.
+
+Each criteria keeps its (score, id) keys sorted best first, so a top-k query
+is a slice and "what rank is this Pokemon" is a binary search instead of
+scoring and sorting the whole roster per request. Only ids and scores are
+kept; the ranked entries are built from the caller's roster rows for the
+Pokemon actually returned. Writes insert into copies of the sorted lists and
+swap them in as one reference, so readers need no lock.
+Custom-weight rankings score the roster's (n, 6) stat matrix with a single
+matrix-vector product instead.
+"""
+
+import bisect
+import threading
+import numpy as np
+
+REQUIRED_STATS = ('hp', 'attack', 'defense', 'special_attack', 'special_defense', 'speed')
+
+# Weight offensive stats higher as they're generally more valuable
+POWER_WEIGHTS = {
+    'hp': 1.0,
+    'attack': 1.2,
+    'defense': 1.0,
+    'special_attack': 1.2,
+    'special_defense': 1.0,
+    'speed': 1.1
+}
+
+def power_score(stats):
+    """Weighted power score of a complete stats dict"""
+    return round(sum(stats[key] * POWER_WEIGHTS[key] for key in REQUIRED_STATS), 2)
+
+# Ranking score per criteria, from a complete stats dict
+CRITERIA_SCORES = {
+    'power': power_score,
+    'total': lambda stats: sum(stats.values()),
+    'offensive': lambda stats: stats['attack'] + stats['special_attack'] + (stats['speed'] * 0.5),
+    'defensive': lambda stats: stats['hp'] + stats['defense'] + stats['special_defense'],
+    'speed': lambda stats: stats['speed']
+}
+DEFAULT_CRITERIA = 'power'
+
+# Comparison operators accepted in weighted-ranking constraints
+CONSTRAINT_OPERATORS = {
+    '>=': np.greater_equal,
+    '<=': np.less_equal,
+    '>': np.greater,
+    '<': np.less,
+    '==': np.equal
+}
+
+def ranked_stats(pokemon):
+    """The stats dict of a roster entry, or None if it cannot be ranked"""
+    stats = pokemon.get('metadata', {}).get('stats')
+    if not stats or not all(key in stats for key in REQUIRED_STATS):
+        return None
+    return stats
+
+def ranked_entry(pokemon, stats, criteria):
+    """A roster entry with the score fields returned by rankings"""
+    return {
+        **pokemon,
+        'power_score': power_score(stats),
+        'total_stats': sum(stats.values()),
+        'ranking_score': CRITERIA_SCORES.get(criteria, power_score)(stats)
+    }
+
+def stat_matrix(roster):
+    """(rankable entries, (n, 6) float64 stat matrix) for roster entries"""
+    entries = []
+    rows = []
+    for pokemon in roster:
+        stats = ranked_stats(pokemon)
+        if stats is not None:
+            entries.append(pokemon)
+            rows.append([stats[key] for key in REQUIRED_STATS])
+    return entries, np.array(rows, dtype=np.float64).reshape(len(rows), len(REQUIRED_STATS))
+
+def weighted_ranking(entries, matrix, weights, constraints=(), limit=10):
+    """
+    Best limit entries by matrix @ weights among rows passing every
+    (coefficients, operator, bound) constraint, as (results, matching count)
+    """
+    scores = matrix @ np.asarray(weights, dtype=np.float64)
+
+    mask = np.ones(len(entries), dtype=bool)
+    for coefficients, operator, bound in constraints:
+        mask &= CONSTRAINT_OPERATORS[operator](matrix @ np.asarray(coefficients, dtype=np.float64), bound)
+    candidates = np.flatnonzero(mask)
+    if not len(candidates) or limit < 1:
+        return [], len(candidates)
+
+    k = min(limit, len(candidates))
+    best = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+    # Highest score first, ties in roster order
+    best = best[np.lexsort((best, -scores[best]))]
+
+    results = []
+    for position in best:
+        stats = ranked_stats(entries[position])
+        results.append({
+            **entries[position],
+            'power_score': power_score(stats),
+            'total_stats': sum(stats.values()),
+            'ranking_score': round(float(scores[position]), 2)
+        })
+    return results, len(candidates)
+
+class RankIndex:
+    """Per-criteria sorted rankings over the roster"""
+
+    def __init__(self):
+        # (criteria -> sorted (-score, id) keys, id -> {criteria: score})
+        # swapped as one tuple so readers need no lock
+        self._state = ({criteria: [] for criteria in CRITERIA_SCORES}, {})
+        self._write_lock = threading.Lock()
+        self.loaded = False
+
+    def __len__(self):
+        return len(self._state[1])
+
+    def load(self, roster):
+        """Replace the rankings with the given roster entries"""
+        rankings = {criteria: [] for criteria in CRITERIA_SCORES}
+        scores = {}
+        for pokemon in roster:
+            stats = ranked_stats(pokemon)
+            if stats is None:
+                continue
+            scores[pokemon['id']] = {criteria: score(stats) for criteria, score in CRITERIA_SCORES.items()}
+            for criteria, score in scores[pokemon['id']].items():
+                rankings[criteria].append((-score, pokemon['id']))
+
+        # Ties keep id order, like the stable sort over the id-ordered roster
+        for keys in rankings.values():
+            keys.sort()
+
+        with self._write_lock:
+            self._state = (rankings, scores)
+            self.loaded = True
+
+    def upsert(self, pokemon):
+        """Insert or re-rank a single roster entry"""
+        stats = ranked_stats(pokemon)
+        pokemon_id = pokemon['id']
+
+        with self._write_lock:
+            current_rankings, current_scores = self._state
+            rankings = {}
+            scores = dict(current_scores)
+            previous = scores.pop(pokemon_id, None)
+            if stats is not None:
+                scores[pokemon_id] = {criteria: score(stats) for criteria, score in CRITERIA_SCORES.items()}
+
+            for criteria, keys in current_rankings.items():
+                keys = list(keys)
+                if previous is not None:
+                    del keys[bisect.bisect_left(keys, (-previous[criteria], pokemon_id))]
+                if stats is not None:
+                    bisect.insort(keys, (-scores[pokemon_id][criteria], pokemon_id))
+                rankings[criteria] = keys
+
+            self._state = (rankings, scores)
+
+    @staticmethod
+    def _entries(keys, rows, criteria):
+        """Ranked entries for (-score, id) keys, built from roster rows (ids missing from rows are skipped)"""
+        entries = []
+        for _, pokemon_id in keys:
+            if pokemon_id in rows:
+                pokemon = rows[pokemon_id]
+                entries.append(ranked_entry(pokemon, ranked_stats(pokemon), criteria))
+        return entries
+
+    def top(self, rows, criteria='power', limit=10):
+        """The best limit ranked entries for a criteria, built from an id -> roster entry mapping"""
+        if criteria not in CRITERIA_SCORES:
+            criteria = DEFAULT_CRITERIA
+        rankings, _ = self._state
+        return self._entries(rankings[criteria][:limit], rows, criteria)
+
+    def rank(self, rows, pokemon_id, criteria='power'):
+        """1-based (rank, ranked entry) of a Pokemon, or None if it is not ranked"""
+        if criteria not in CRITERIA_SCORES:
+            criteria = DEFAULT_CRITERIA
+        rankings, scores = self._state
+        keys = rankings[criteria]
+        if pokemon_id not in scores:
+            return None
+        position = bisect.bisect_left(keys, (-scores[pokemon_id][criteria], pokemon_id))
+        if position >= len(keys) or keys[position][1] != pokemon_id:
+            return None
+        entries = self._entries([keys[position]], rows, criteria)
+        return (position + 1, entries[0]) if entries else None
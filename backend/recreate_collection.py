@@ -7,6 +7,7 @@ import os
 from dotenv import load_dotenv
 from qdrant_client import QdrantClient
 from qdrant_client.models import VectorParams
+from vector_service import PAYLOAD_INDEXES
 
 # Load environment variables
 load_dotenv()
@@ -36,6 +37,11 @@ def recreate_collection():
         vectors_config=VectorParams(size=6, distance="Euclid")
     )
     print("✓ Collection created with Euclidean distance")
+
+    # Payload indexes back the type, ability and stat filters on similarity search
+    for field_name, field_schema in PAYLOAD_INDEXES.items():
+        client.create_payload_index(collection_name=collection_name, field_name=field_name, field_schema=field_schema)
+    print(f"✓ Created payload indexes on {', '.join(PAYLOAD_INDEXES)}")
     
     return True
 
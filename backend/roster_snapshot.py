@@ -0,0 +1,105 @@
+"""
+Process-wide, versioned snapshot of the Pokemon roster.
+
+The roster almost never changes, so read paths share one in-memory copy
+instead of scrolling Qdrant per request. A snapshot is immutable once
+published; it goes stale after ROSTER_TTL_SECONDS or as soon as a write
+invalidates it, and the next reader publishes a fresh version. Versions hold
+the roster in columnar form (see compact_roster) and build entry dicts only
+when they are read. A version whose rows changed without a local write (an
+expired snapshot that picked up another process's writes) is flagged so the
+caller can rebuild the indexes derived from the roster.
+"""
+
+import os
+import threading
+import time
+import numpy as np
+from compact_roster import CompactRoster, RowsById
+
+# Seconds before a snapshot is reloaded even without writes
+ROSTER_TTL_SECONDS = float(os.getenv("ROSTER_TTL_SECONDS", "300"))
+
+class RosterVersion:
+    """One immutable roster load"""
+
+    def __init__(self, version, pokemon, loaded_at, generation=0):
+        self.version = version
+        # Invalidation generation the load started at
+        self.generation = generation
+        # Columnar rows in id order; indexing yields {"id", "name", "metadata"} dicts
+        self.pokemon = CompactRoster(pokemon)
+        self.by_id = RowsById(self.pokemon)
+        self.ids = self.pokemon.ids
+        self.loaded_at = loaded_at
+        # Rows differ from the previous version although no local write invalidated it
+        self.changed_externally = False
+        self._stat_matrix = None
+
+    def __len__(self):
+        return len(self.pokemon)
+
+    def page(self, offset=None, limit=100):
+        """Entries from id offset onwards as (page, next_offset), like a Qdrant scroll"""
+        start = 0 if offset is None else int(np.searchsorted(self.ids, offset))
+        end = start + limit
+        next_offset = int(self.ids[end]) if end < len(self.ids) else None
+        return self.pokemon[start:end], next_offset
+
+    def stat_matrix(self):
+        """(rankable entries, (n, 6) stat matrix), built on first use"""
+        if self._stat_matrix is None:
+            self._stat_matrix = self.pokemon.stat_matrix()
+        return self._stat_matrix
+
+class RosterSnapshot:
+    """Holds the current RosterVersion and decides when it is stale"""
+
+    def __init__(self, ttl=ROSTER_TTL_SECONDS):
+        self.ttl = ttl
+        self._current = None
+        self._stale = True
+        self._version = 0
+        # Bumped by every invalidation so a load that overlapped a write stays stale
+        self._generation = 0
+        # Serializes reloads so concurrent readers trigger a single scroll
+        self.refresh_lock = threading.Lock()
+        self._publish_lock = threading.Lock()
+
+    def current(self):
+        """The published version, or None if missing, expired or invalidated"""
+        snapshot = self._current
+        if snapshot is None or self._stale or time.monotonic() - snapshot.loaded_at > self.ttl:
+            return None
+        return snapshot
+
+    def latest(self):
+        """The last published version even if stale (None before the first load)"""
+        return self._current
+
+    def begin_load(self):
+        """Token to pass to publish() for a load starting now"""
+        return self._generation
+
+    def publish(self, pokemon, token=None):
+        """Publish a freshly loaded roster as the next version"""
+        pokemon = sorted(pokemon, key=lambda entry: entry["id"])
+        with self._publish_lock:
+            self._version += 1
+            generation = self._generation if token is None else token
+            snapshot = RosterVersion(self._version, pokemon, time.monotonic(), generation)
+            previous = self._current
+            # Local writes keep their derived indexes in sync themselves
+            snapshot.changed_externally = (
+                previous is not None and previous.generation == generation
+                and previous.pokemon.fingerprint() != snapshot.pokemon.fingerprint()
+            )
+            self._current = snapshot
+            # A write that landed mid-load may be missing, so keep it stale
+            self._stale = token is not None and token != self._generation
+        return snapshot
+
+    def invalidate(self):
+        """Force the next read to reload (called after writes)"""
+        self._generation += 1
+        self._stale = True
@@ -3,6 +3,8 @@
 Security fixes and input validation for Pokemon Search and Sim application
 """
 
+import base64
+import json
 import re
 from typing import List, Optional, Union
 from fastapi import HTTPException
@@ -20,6 +22,49 @@ class SecurityValidator:
     
     # Allowed criteria for rankings
     ALLOWED_CRITERIA = {"power", "total", "offensive", "defensive", "speed"}
+
+    # Allowed move selection policies for battles
+    ALLOWED_BATTLE_AI = {"random", "greedy"}
+
+    # Team battle limits
+    MAX_TEAM_SIZE = 6
+    MAX_BATTLE_TRIALS = 10000
+    ALLOWED_SWITCHING = {"order", "matchup"}
+
+    # Stat-space search modes
+    ALLOWED_SEARCH_MODES = {"knn", "radius", "box"}
+    MAX_SEARCH_RADIUS = 2500  # Diagonal of the full stat range
+    MAX_BATCH_QUERIES = 5000
+    ALLOWED_METRICS = {"euclidean", "standardized", "mahalanobis"}
+    MAX_TYPE_WEIGHT = 100
+    MAX_POKEMON_TYPES = 2
+
+    # Fuzzy name search edit distance
+    MAX_FUZZY_DISTANCE = 2
+
+    # Payload filters for similarity search
+    ALLOWED_TYPES = {
+        "normal", "fire", "water", "electric", "grass", "ice", "fighting", "poison", "ground",
+        "flying", "psychic", "bug", "rock", "ghost", "dragon", "dark", "steel", "fairy"
+    }
+    MAX_FILTER_VALUES = 10
+    ABILITY_NAME_PATTERN = re.compile(r"^[a-z0-9\-]+$")
+
+    # Roster-wide distance queries
+    ALLOWED_UNIQUENESS_ORDERS = {"most", "least"}
+
+    # Stat archetype clusters
+    MAX_ARCHETYPES = 20
+
+    # Opaque pagination cursors (base64 of a scroll offset)
+    MAX_CURSOR_LENGTH = 200
+
+    # Custom-weight rankings
+    STAT_NAMES = ("hp", "attack", "defense", "special_attack", "special_defense", "speed")
+    MAX_STAT_WEIGHT = 100
+    MAX_RANK_CONSTRAINTS = 6
+    CONSTRAINT_PATTERN = re.compile(r"^\s*([a-z_+*.\d\s]+?)\s*(>=|<=|==|>|<)\s*(-?\d+(?:\.\d+)?)\s*$")
+    CONSTRAINT_TERM_PATTERN = re.compile(r"^(?:(\d+(?:\.\d+)?)\*)?([a-z_]+)$")
     
     # Pokemon name pattern (letters, numbers, spaces, hyphens, apostrophes)
     POKEMON_NAME_PATTERN = re.compile(r"^[a-zA-Z0-9\s\-'\.]+$")
@@ -100,6 +145,37 @@ class SecurityValidator:
         except ValueError as e:
             raise HTTPException(status_code=400, detail=f"Invalid stats format: {str(e)}")
     
+    @staticmethod
+    def validate_stats_batch(queries: List[List[int]]) -> List[List[int]]:
+        """Validate a batch of stat vectors for bulk similarity search"""
+        if not queries or not isinstance(queries, list):
+            raise HTTPException(status_code=400, detail="At least one stats vector is required")
+
+        if len(queries) > SecurityValidator.MAX_BATCH_QUERIES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Too many stats vectors (max {SecurityValidator.MAX_BATCH_QUERIES})"
+            )
+
+        validated = []
+        for position, stats in enumerate(queries):
+            if not isinstance(stats, list) or len(stats) != SecurityValidator.MAX_STATS_VALUES:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Stats vector {position} must contain exactly {SecurityValidator.MAX_STATS_VALUES} values"
+                )
+
+            for stat_value in stats:
+                if stat_value < SecurityValidator.MIN_STAT_VALUE or stat_value > SecurityValidator.MAX_STAT_VALUE:
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"Stat value {stat_value} in vector {position} is out of valid range ({SecurityValidator.MIN_STAT_VALUE}-{SecurityValidator.MAX_STAT_VALUE})"
+                    )
+
+            validated.append([int(stat_value) for stat_value in stats])
+
+        return validated
+
     @staticmethod
     def validate_pokemon_id(pokemon_id: Union[int, str]) -> int:
         """Validate Pokemon ID"""
@@ -161,6 +237,317 @@ class SecurityValidator:
         
         return criteria
 
+    @staticmethod
+    def validate_weights(weights_str: str) -> List[float]:
+        """Validate and parse comma-separated per-stat ranking weights"""
+        if not weights_str or not isinstance(weights_str, str):
+            raise HTTPException(status_code=400, detail="Weights string is required")
+
+        parts = weights_str.strip().split(',')
+        if len(parts) != SecurityValidator.MAX_STATS_VALUES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Weights must contain exactly {SecurityValidator.MAX_STATS_VALUES} values (HP,Attack,Defense,Special Attack,Special Defense,Speed)"
+            )
+
+        weights = []
+        for part in parts:
+            try:
+                weight = float(part.strip())
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"Weight '{part.strip()}' is not a valid number")
+
+            if not -SecurityValidator.MAX_STAT_WEIGHT <= weight <= SecurityValidator.MAX_STAT_WEIGHT:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Weights must be between -{SecurityValidator.MAX_STAT_WEIGHT} and {SecurityValidator.MAX_STAT_WEIGHT}"
+                )
+            weights.append(weight)
+
+        return weights
+
+    @staticmethod
+    def validate_constraints(constraints_str: Optional[str]) -> List[tuple]:
+        """
+        Parse linear stat constraints such as "speed>=90,attack+special_attack>200"
+        into (coefficients, operator, bound) tuples
+        """
+        if not constraints_str:
+            return []
+
+        parts = [part for part in constraints_str.lower().split(',') if part.strip()]
+        if len(parts) > SecurityValidator.MAX_RANK_CONSTRAINTS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Too many constraints (max {SecurityValidator.MAX_RANK_CONSTRAINTS})"
+            )
+
+        constraints = []
+        for part in parts:
+            match = SecurityValidator.CONSTRAINT_PATTERN.match(part)
+            if not match:
+                raise HTTPException(status_code=400, detail=f"Invalid constraint '{part.strip()}'")
+
+            expression, operator, bound = match.groups()
+            coefficients = [0.0] * SecurityValidator.MAX_STATS_VALUES
+            # Terms are joined with '+', which arrives as a space unless URL-encoded
+            for term in re.split(r"[+\s]+", expression.strip()):
+                term_match = SecurityValidator.CONSTRAINT_TERM_PATTERN.match(term)
+                if not term_match or term_match.group(2) not in SecurityValidator.STAT_NAMES:
+                    raise HTTPException(status_code=400, detail=f"Invalid constraint term '{term}'")
+                coefficient = float(term_match.group(1) or 1)
+                coefficients[SecurityValidator.STAT_NAMES.index(term_match.group(2))] += coefficient
+
+            constraints.append((coefficients, operator, float(bound)))
+
+        return constraints
+
+    @staticmethod
+    def validate_battle_ai(ai: str) -> str:
+        """Validate battle AI policy"""
+        if not ai or not isinstance(ai, str):
+            raise HTTPException(status_code=400, detail="Battle AI is required")
+
+        ai = ai.lower().strip()
+
+        if ai not in SecurityValidator.ALLOWED_BATTLE_AI:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid battle AI. Allowed values: {', '.join(sorted(SecurityValidator.ALLOWED_BATTLE_AI))}"
+            )
+
+        return ai
+
+    @staticmethod
+    def validate_team_string(team_str: str) -> List[str]:
+        """Validate and parse a comma-separated team of Pokemon names"""
+        if not team_str or not isinstance(team_str, str):
+            raise HTTPException(status_code=400, detail="Team is required")
+
+        names = [part for part in (part.strip() for part in team_str.split(',')) if part]
+
+        if not (1 <= len(names) <= SecurityValidator.MAX_TEAM_SIZE):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Team must contain between 1 and {SecurityValidator.MAX_TEAM_SIZE} Pokemon"
+            )
+
+        return [SecurityValidator.validate_pokemon_name(name) for name in names]
+
+    @staticmethod
+    def validate_trials(trials: Union[int, str]) -> int:
+        """Validate Monte Carlo trial count"""
+        try:
+            trials = int(trials)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Trials must be a valid integer")
+
+        if trials < 1 or trials > SecurityValidator.MAX_BATTLE_TRIALS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Trials must be between 1 and {SecurityValidator.MAX_BATTLE_TRIALS}"
+            )
+
+        return trials
+
+    @staticmethod
+    def validate_switching(switching: str) -> str:
+        """Validate team battle switching policy"""
+        if not switching or not isinstance(switching, str):
+            raise HTTPException(status_code=400, detail="Switching policy is required")
+
+        switching = switching.lower().strip()
+
+        if switching not in SecurityValidator.ALLOWED_SWITCHING:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid switching policy. Allowed values: {', '.join(sorted(SecurityValidator.ALLOWED_SWITCHING))}"
+            )
+
+        return switching
+
+    @staticmethod
+    def validate_uniqueness_order(order: str) -> str:
+        """Validate uniqueness ranking order"""
+        if not order or not isinstance(order, str):
+            raise HTTPException(status_code=400, detail="Order is required")
+
+        order = order.lower().strip()
+
+        if order not in SecurityValidator.ALLOWED_UNIQUENESS_ORDERS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid order. Allowed values: {', '.join(sorted(SecurityValidator.ALLOWED_UNIQUENESS_ORDERS))}"
+            )
+
+        return order
+
+    @staticmethod
+    def validate_archetype_count(k: Union[int, str]) -> int:
+        """Validate the number of archetype clusters to fit"""
+        try:
+            k = int(k)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Archetype count must be a valid integer")
+
+        if k < 2 or k > SecurityValidator.MAX_ARCHETYPES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Archetype count must be between 2 and {SecurityValidator.MAX_ARCHETYPES}"
+            )
+
+        return k
+
+    @staticmethod
+    def validate_archetype_id(archetype: Union[int, str]) -> int:
+        """Validate an archetype id"""
+        try:
+            archetype = int(archetype)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Archetype must be a valid integer")
+
+        if archetype < 0 or archetype >= SecurityValidator.MAX_ARCHETYPES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Archetype must be between 0 and {SecurityValidator.MAX_ARCHETYPES - 1}"
+            )
+
+        return archetype
+
+    @staticmethod
+    def validate_search_mode(mode: str) -> str:
+        """Validate stat-space search mode"""
+        if not mode or not isinstance(mode, str):
+            raise HTTPException(status_code=400, detail="Search mode is required")
+
+        mode = mode.lower().strip()
+
+        if mode not in SecurityValidator.ALLOWED_SEARCH_MODES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid search mode. Allowed values: {', '.join(sorted(SecurityValidator.ALLOWED_SEARCH_MODES))}"
+            )
+
+        return mode
+
+    @staticmethod
+    def validate_metric(metric: str) -> str:
+        """Validate similarity distance metric"""
+        if not metric or not isinstance(metric, str):
+            raise HTTPException(status_code=400, detail="Metric is required")
+
+        metric = metric.lower().strip()
+
+        if metric not in SecurityValidator.ALLOWED_METRICS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid metric. Allowed values: {', '.join(sorted(SecurityValidator.ALLOWED_METRICS))}"
+            )
+
+        return metric
+
+    @staticmethod
+    def validate_type_weight(type_weight: Union[float, str]) -> float:
+        """Validate the type term weight for hybrid similarity search"""
+        try:
+            type_weight = float(type_weight)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Type weight must be a valid number")
+
+        if not 0 <= type_weight <= SecurityValidator.MAX_TYPE_WEIGHT:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Type weight must be between 0 and {SecurityValidator.MAX_TYPE_WEIGHT}"
+            )
+
+        return type_weight
+
+    @staticmethod
+    def validate_radius(radius: Union[float, str]) -> float:
+        """Validate Euclidean search radius"""
+        try:
+            radius = float(radius)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Radius must be a valid number")
+
+        if not (0 <= radius <= SecurityValidator.MAX_SEARCH_RADIUS):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Radius must be between 0 and {SecurityValidator.MAX_SEARCH_RADIUS}"
+            )
+
+        return radius
+
+    @staticmethod
+    def validate_max_distance(max_distance: Union[int, str]) -> int:
+        """Validate fuzzy search edit distance"""
+        try:
+            max_distance = int(max_distance)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Max distance must be a valid integer")
+
+        if max_distance < 0 or max_distance > SecurityValidator.MAX_FUZZY_DISTANCE:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Max distance must be between 0 and {SecurityValidator.MAX_FUZZY_DISTANCE}"
+            )
+
+        return max_distance
+
+    @staticmethod
+    def validate_type_list(types_str: Optional[str]) -> List[str]:
+        """Validate comma-separated Pokemon types for a search filter"""
+        if not types_str:
+            return []
+
+        types = [part.strip().lower() for part in types_str.split(',') if part.strip()]
+        if len(types) > SecurityValidator.MAX_FILTER_VALUES:
+            raise HTTPException(status_code=400, detail=f"Too many types (max {SecurityValidator.MAX_FILTER_VALUES})")
+
+        for pokemon_type in types:
+            if pokemon_type not in SecurityValidator.ALLOWED_TYPES:
+                raise HTTPException(status_code=400, detail=f"Unknown Pokemon type '{pokemon_type}'")
+
+        return types
+
+    @staticmethod
+    def validate_ability_list(abilities_str: Optional[str]) -> List[str]:
+        """Validate comma-separated ability names (PokeAPI slugs, e.g. swift-swim)"""
+        if not abilities_str:
+            return []
+
+        # Accept "Swift Swim" as well as the stored "swift-swim"
+        abilities = [re.sub(r"\s+", "-", part.strip().lower()) for part in abilities_str.split(',') if part.strip()]
+        if len(abilities) > SecurityValidator.MAX_FILTER_VALUES:
+            raise HTTPException(status_code=400, detail=f"Too many abilities (max {SecurityValidator.MAX_FILTER_VALUES})")
+
+        for ability in abilities:
+            if len(ability) > SecurityValidator.MAX_POKEMON_NAME_LENGTH or not SecurityValidator.ABILITY_NAME_PATTERN.match(ability):
+                raise HTTPException(status_code=400, detail="Ability name contains invalid characters")
+
+        return abilities
+
+    @staticmethod
+    def validate_cursor(cursor: Optional[str]) -> Optional[Union[int, str]]:
+        """Decode an opaque pagination cursor back into a scroll offset"""
+        if cursor is None or cursor == "":
+            return None
+
+        if not isinstance(cursor, str) or len(cursor) > SecurityValidator.MAX_CURSOR_LENGTH:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            offset = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))["offset"]
+        except (ValueError, KeyError, TypeError, UnicodeEncodeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+        # Qdrant point ids are unsigned integers or UUID strings
+        if isinstance(offset, bool) or not isinstance(offset, (int, str)) or (isinstance(offset, int) and offset < 0):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+        return offset
+
     @staticmethod
     def validate_search_query(query: str) -> str:
         """Validate search query for moves"""
@@ -204,13 +591,14 @@ class SecurityValidator:
 class RateLimiter:
     """Simple in-memory rate limiter"""
     
-    def __init__(self):
+    def __init__(self, max_requests_per_minute: int = 60, max_requests_per_hour: int = 1000):
+        # Per client: list of (timestamp, cost) entries
         self.requests = {}
-        self.max_requests_per_minute = 60
-        self.max_requests_per_hour = 1000
+        self.max_requests_per_minute = max_requests_per_minute
+        self.max_requests_per_hour = max_requests_per_hour
     
-    def is_rate_limited(self, client_ip: str) -> bool:
-        """Check if client is rate limited"""
+    def is_rate_limited(self, client_ip: str, cost: int = 1) -> bool:
+        """Check if client is rate limited; cost is how many units this request uses"""
         import time
         current_time = time.time()
         
@@ -219,25 +607,26 @@ class RateLimiter:
         
         # Clean old requests (older than 1 hour)
         self.requests[client_ip] = [
-            req_time for req_time in self.requests[client_ip] 
+            (req_time, req_cost) for req_time, req_cost in self.requests[client_ip] 
             if current_time - req_time < 3600
         ]
         
         # Check hourly limit
-        if len(self.requests[client_ip]) >= self.max_requests_per_hour:
+        hourly_usage = sum(req_cost for _, req_cost in self.requests[client_ip])
+        if hourly_usage + cost > self.max_requests_per_hour:
             return True
         
         # Check per-minute limit
-        recent_requests = [
-            req_time for req_time in self.requests[client_ip] 
+        recent_usage = sum(
+            req_cost for req_time, req_cost in self.requests[client_ip] 
             if current_time - req_time < 60
-        ]
+        )
         
-        if len(recent_requests) >= self.max_requests_per_minute:
+        if recent_usage + cost > self.max_requests_per_minute:
             return True
         
         # Add current request
-        self.requests[client_ip].append(current_time)
+        self.requests[client_ip].append((current_time, cost))
         return False
 
 # Security headers middleware
@@ -0,0 +1,148 @@
+"""
+Memory-mapped battle artifacts shared between uvicorn workers.
+
+The process that computes an artifact (win-rate matrix, damage tables, level
+stats) writes it once as .npy files under ARTIFACT_DIR and then atomically swaps
+a small version pointer. Every worker attaches to the current version with
+np.load(mmap_mode='r'), so all processes read the same page-cache pages without
+copying. Putting ARTIFACT_DIR on /dev/shm keeps the files in shared memory.
+"""
+
+import fcntl
+import json
+import os
+import shutil
+import threading
+import uuid
+import numpy as np
+
+# Shared directory for artifacts; sharing is disabled when unset
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR")
+# Published versions kept on disk per artifact (older ones are unlinked; workers
+# still mapping them keep a valid view until they attach to a newer version)
+KEEP_VERSIONS = 3
+
+class ArtifactVersion:
+    """Read-only view of one published artifact version"""
+
+    def __init__(self, name, version, arrays, metadata):
+        self.name = name
+        self.version = version
+        self.arrays = arrays
+        self.metadata = metadata
+
+    def __getitem__(self, key):
+        return self.arrays[key]
+
+class ArtifactStore:
+    """Directory of versioned, memory-mapped artifacts with atomic pointer swaps"""
+
+    def __init__(self, root):
+        self.root = root
+        self.versions_dir = os.path.join(root, "versions")
+        os.makedirs(self.versions_dir, exist_ok=True)
+        self._attached = {}
+        self._lock = threading.Lock()
+
+    def _pointer_path(self, name):
+        return os.path.join(self.root, f"{name}.current")
+
+    def _read_pointer(self, name):
+        """Read the version pointer for an artifact (None if never published)"""
+        try:
+            with open(self._pointer_path(name)) as pointer_file:
+                return json.load(pointer_file)
+        except FileNotFoundError:
+            return None
+
+    def publish(self, name, arrays, metadata=None):
+        """
+        Write a new version of an artifact and make it current.
+
+        The writer holds an exclusive lock on the store while publishing, which
+        makes it the leader for that version; readers never take the lock. The
+        version is numbered from the current pointer under that lock, so writers
+        in different processes never reuse one, and is stored in the metadata as
+        "version". Returns the new version.
+        """
+        with open(os.path.join(self.root, ".lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                pointer = self._read_pointer(name)
+                version = pointer["version"] + 1 if pointer else 1
+
+                # Write into a staging directory, then rename it into place
+                directory = f"{name}-{version}-{uuid.uuid4().hex[:8]}"
+                staging = os.path.join(self.versions_dir, f".staging-{directory}")
+                os.makedirs(staging)
+                for key, array in arrays.items():
+                    np.save(os.path.join(staging, f"{key}.npy"), np.ascontiguousarray(array))
+                with open(os.path.join(staging, "metadata.json"), "w") as metadata_file:
+                    json.dump({**(metadata or {}), "version": version}, metadata_file)
+                os.rename(staging, os.path.join(self.versions_dir, directory))
+
+                # Atomic swap of the version pointer
+                temporary_pointer = self._pointer_path(name) + f".{uuid.uuid4().hex[:8]}"
+                with open(temporary_pointer, "w") as pointer_file:
+                    json.dump({"version": version, "directory": directory, "keys": sorted(arrays)}, pointer_file)
+                    pointer_file.flush()
+                    os.fsync(pointer_file.fileno())
+                os.replace(temporary_pointer, self._pointer_path(name))
+
+                self._remove_old_versions(name, version)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+        return version
+
+    def _remove_old_versions(self, name, current_version):
+        """Unlink versions that fell out of the retention window"""
+        for directory in os.listdir(self.versions_dir):
+            parts = directory.rsplit("-", 2)
+            if len(parts) != 3 or parts[0] != name or not parts[1].isdigit():
+                continue
+            if int(parts[1]) <= current_version - KEEP_VERSIONS:
+                shutil.rmtree(os.path.join(self.versions_dir, directory), ignore_errors=True)
+
+    def attach(self, name):
+        """Attach read-only to the current version of an artifact (None if unpublished)"""
+        pointer = self._read_pointer(name)
+        if pointer is None:
+            return None
+
+        attached = self._attached.get(name)
+        if attached is not None and attached.version == pointer["version"]:
+            return attached
+
+        with self._lock:
+            attached = self._attached.get(name)
+            if attached is not None and attached.version == pointer["version"]:
+                return attached
+
+            directory = os.path.join(self.versions_dir, pointer["directory"])
+            arrays = {
+                key: np.load(os.path.join(directory, f"{key}.npy"), mmap_mode="r")
+                for key in pointer["keys"]
+            }
+            with open(os.path.join(directory, "metadata.json")) as metadata_file:
+                metadata = json.load(metadata_file)
+
+            attached = ArtifactVersion(name, pointer["version"], arrays, metadata)
+            self._attached[name] = attached
+            return attached
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_artifact_store():
+    """Get the process-wide artifact store (None when ARTIFACT_DIR is not configured)"""
+    global _store
+
+    if not ARTIFACT_DIR:
+        return None
+
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ArtifactStore(ARTIFACT_DIR)
+    return _store
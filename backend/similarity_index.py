@@ -0,0 +1,250 @@
+"""
+In-memory nearest-neighbour index over Pokemon base stats.
+
+Qdrant stays the source of truth; this index mirrors the roster as a contiguous
+float32 (n, 6) matrix so Euclidean top-k is one vectorized distance pass plus
+argpartition, with no network round-trip. Writes build new arrays and swap
+them in as a single reference, so searches never see a half-applied update.
+Radius and box queries (and k-NN on very large rosters) go through a KD-tree
+that is rebuilt lazily after writes.
+
+Standardized and Mahalanobis k-NN run against extra columns: the roster
+z-scored, or PCA-whitened so plain Euclidean distance there equals the
+Mahalanobis distance on raw stats. They are refit from the roster lazily
+after writes, so either metric is still a single nearest-neighbour pass.
+Hybrid k-NN adds a type-effectiveness profile column block, cached per state
+next to the stats, and fuses both distances in the same pass by weighting
+the profile columns' squared differences.
+"""
+
+import threading
+import numpy as np
+from spatial_index import KDTree
+from battle_service import type_profile
+
+STAT_DIMENSIONS = 6
+# Above this many points k-NN uses the KD-tree instead of a full distance pass
+BRUTE_FORCE_LIMIT = 20000
+# Distance matrix cells computed at once by batch searches (bounds memory)
+BATCH_BLOCK_SIZE = 1 << 22
+
+# Distance metrics for k-NN: raw stats, z-scored stats or whitened stats
+METRICS = ("euclidean", "standardized", "mahalanobis")
+# Covariance eigenvalues below this fraction of the largest carry no variance
+WHITENING_TOLERANCE = 1e-9
+
+def fit_metric(vectors, metric):
+    """(mean, projection) such that (x - mean) @ projection maps stats into the metric's space"""
+    vectors = np.asarray(vectors, dtype=np.float64)
+    if metric == "euclidean" or len(vectors) < 2:
+        return np.zeros(STAT_DIMENSIONS), np.eye(STAT_DIMENSIONS)
+
+    mean = vectors.mean(axis=0)
+    if metric == "standardized":
+        std = vectors.std(axis=0)
+        # A stat that never varies contributes nothing either way
+        std[std == 0] = 1.0
+        return mean, np.diag(1.0 / std)
+
+    if metric == "mahalanobis":
+        eigenvalues, eigenvectors = np.linalg.eigh(np.cov(vectors, rowvar=False))
+        # Drop flat directions rather than dividing by zero
+        keep = eigenvalues > WHITENING_TOLERANCE * max(eigenvalues.max(), WHITENING_TOLERANCE)
+        return mean, eigenvectors[:, keep] / np.sqrt(eigenvalues[keep])
+
+    raise ValueError(f"Unknown metric '{metric}'")
+
+def nearest_rows(vectors, query, top_k, weights=None):
+    """Positions and distances of the top_k rows nearest to query, closest first (optionally per-column weighted)"""
+    diff = vectors - query
+    if weights is None:
+        squared = np.einsum('ij,ij->i', diff, diff)
+    else:
+        squared = np.einsum('ij,ij,j->i', diff, diff, weights)
+
+    k = min(top_k, len(vectors))
+    nearest = np.argpartition(squared, k - 1)[:k]
+    nearest = nearest[np.argsort(squared[nearest], kind='stable')]
+    return nearest, np.sqrt(squared[nearest])
+
+class StatIndex:
+    """Euclidean k-NN, radius and box index over base stat vectors"""
+
+    def __init__(self):
+        # (ids, vectors, payloads) swapped as one tuple so readers need no lock
+        self._state = (np.empty(0, dtype=np.int64), np.empty((0, STAT_DIMENSIONS), dtype=np.float32), [])
+        self._write_lock = threading.Lock()
+        # (state, KDTree) built on demand for the current state
+        self._tree_cache = None
+        # metric -> (state, mean, projection, projected vectors) for the current state
+        self._metric_cache = {}
+        # (state, (n, 6 + 18) stats and type profiles) for the current state
+        self._hybrid_cache = None
+        self.loaded = False
+
+    def __len__(self):
+        return len(self._state[0])
+
+    def load(self, points):
+        """Replace the index contents with (id, vector, payload) tuples"""
+        points = list(points)
+        ids = np.array([point[0] for point in points], dtype=np.int64)
+        vectors = np.array([point[1] for point in points], dtype=np.float32).reshape(len(points), STAT_DIMENSIONS)
+        payloads = [point[2] for point in points]
+
+        with self._write_lock:
+            self._state = (ids, np.ascontiguousarray(vectors), payloads)
+            self.loaded = True
+
+    def upsert(self, pokemon_id, vector, payload):
+        """Insert or replace a single point"""
+        vector = np.asarray(vector, dtype=np.float32).reshape(1, STAT_DIMENSIONS)
+
+        with self._write_lock:
+            ids, vectors, payloads = self._state
+            positions = np.flatnonzero(ids == pokemon_id)
+            if len(positions):
+                position = positions[0]
+                vectors = vectors.copy()
+                vectors[position] = vector
+                payloads = list(payloads)
+                payloads[position] = payload
+            else:
+                ids = np.append(ids, pokemon_id)
+                vectors = np.concatenate([vectors, vector])
+                payloads = payloads + [payload]
+            self._state = (ids, vectors, payloads)
+
+    def _tree(self, state):
+        """KD-tree for a state, rebuilt only after the state changes"""
+        cached = self._tree_cache
+        if cached is None or cached[0] is not state:
+            cached = (state, KDTree(state[1]))
+            self._tree_cache = cached
+        return cached[1]
+
+    def _metric_space(self, state, metric):
+        """(mean, projection, projected vectors) for a state, refit only after the state changes"""
+        cached = self._metric_cache.get(metric)
+        if cached is None or cached[0] is not state:
+            mean, projection = fit_metric(state[1], metric)
+            projected = np.ascontiguousarray(((state[1] - mean) @ projection).astype(np.float32))
+            cached = (state, mean, projection, projected)
+            self._metric_cache[metric] = cached
+        return cached[1:]
+
+    def _hybrid_columns(self, state):
+        """Stats followed by the type-effectiveness profile of every point, rebuilt only after the state changes"""
+        cached = self._hybrid_cache
+        if cached is None or cached[0] is not state:
+            _, vectors, payloads = state
+            profiles = np.array([type_profile(payload.get("types", [])) for payload in payloads], dtype=np.float32)
+            cached = (state, np.hstack([vectors, profiles.reshape(len(payloads), -1)]))
+            self._hybrid_cache = cached
+        return cached[1]
+
+    def search_hybrid(self, query, query_types, type_weight, top_k=5):
+        """
+        Top_k nearest points by sqrt(stat distance^2 + (type_weight * profile distance)^2),
+        as (id, distance, payload), closest first
+        """
+        state = self._state
+        ids, vectors, payloads = state
+        if not len(ids) or top_k < 1:
+            return []
+
+        # Weighting the profile columns' squared differences makes the fused distance one pass
+        columns = self._hybrid_columns(state)
+        query = np.concatenate([
+            np.asarray(query, dtype=np.float32).reshape(STAT_DIMENSIONS),
+            np.asarray(type_profile(query_types), dtype=np.float32)
+        ])
+        weights = np.ones(columns.shape[1], dtype=np.float32)
+        weights[STAT_DIMENSIONS:] = type_weight ** 2
+        positions, distances = nearest_rows(columns, query, top_k, weights)
+
+        return [(int(ids[i]), float(distance), payloads[i]) for i, distance in zip(positions, distances)]
+
+    def search(self, query, top_k=5, metric="euclidean"):
+        """Return the top_k nearest points as (id, distance, payload), closest first"""
+        state = self._state
+        ids, vectors, payloads = state
+        if not len(ids) or top_k < 1:
+            return []
+
+        if metric != "euclidean":
+            mean, projection, projected = self._metric_space(state, metric)
+            query = (np.asarray(query, dtype=np.float64).reshape(STAT_DIMENSIONS) - mean) @ projection
+            positions, distances = nearest_rows(projected, query.astype(np.float32), top_k)
+        elif len(ids) > BRUTE_FORCE_LIMIT:
+            positions, distances = self._tree(state).query(query, top_k)
+        else:
+            positions, distances = nearest_rows(vectors, np.asarray(query, dtype=np.float32).reshape(STAT_DIMENSIONS), top_k)
+
+        return [(int(ids[i]), float(distance), payloads[i]) for i, distance in zip(positions, distances)]
+
+    def search_subset(self, query, candidate_ids, top_k=5):
+        """Top_k nearest among the given ids only, as (id, distance, payload)"""
+        ids, vectors, payloads = self._state
+        positions = np.flatnonzero(np.isin(ids, np.asarray(list(candidate_ids), dtype=np.int64)))
+        if not len(positions) or top_k < 1:
+            return []
+
+        nearest, distances = nearest_rows(vectors[positions], np.asarray(query, dtype=np.float32).reshape(STAT_DIMENSIONS), top_k)
+        return [(int(ids[positions[i]]), float(distance), payloads[positions[i]]) for i, distance in zip(nearest, distances)]
+
+    def search_batch(self, queries, top_k=5):
+        """Top_k nearest points for every query row, as one list of results per query"""
+        ids, vectors, payloads = self._state
+        queries = np.asarray(queries, dtype=np.float64).reshape(-1, STAT_DIMENSIONS)
+        if not len(ids) or top_k < 1:
+            return [[] for _ in range(len(queries))]
+
+        # ||q - v||^2 = ||q||^2 + ||v||^2 - 2 q.v, so each block is a single matrix product
+        points = vectors.astype(np.float64)
+        point_norms = np.einsum('ij,ij->i', points, points)
+        k = min(top_k, len(ids))
+        block_rows = max(1, BATCH_BLOCK_SIZE // len(ids))
+
+        results = []
+        for block_start in range(0, len(queries), block_rows):
+            block = queries[block_start:block_start + block_rows]
+            squared = np.einsum('ij,ij->i', block, block)[:, None] + point_norms[None, :] - 2.0 * (block @ points.T)
+            np.maximum(squared, 0.0, out=squared)
+
+            nearest = np.argpartition(squared, k - 1, axis=1)[:, :k]
+            nearest_squared = np.take_along_axis(squared, nearest, axis=1)
+            ordering = np.argsort(nearest_squared, axis=1, kind='stable')
+            nearest = np.take_along_axis(nearest, ordering, axis=1)
+            distances = np.sqrt(np.take_along_axis(nearest_squared, ordering, axis=1))
+
+            for row_positions, row_distances in zip(nearest, distances):
+                results.append([(int(ids[i]), float(distance), payloads[i]) for i, distance in zip(row_positions, row_distances)])
+
+        return results
+
+    def radius_search(self, query, radius, limit=None):
+        """Return all points within radius as (id, distance, payload), closest first"""
+        state = self._state
+        ids, _, payloads = state
+        if not len(ids):
+            return []
+
+        positions, distances = self._tree(state).query_radius(np.asarray(query, dtype=np.float64), radius)
+        if limit is not None:
+            positions, distances = positions[:limit], distances[:limit]
+        return [(int(ids[i]), float(distance), payloads[i]) for i, distance in zip(positions, distances)]
+
+    def box_search(self, lower, upper, limit=None):
+        """Return all points with every stat inside [lower, upper] as (id, payload)"""
+        state = self._state
+        ids, _, payloads = state
+        if not len(ids):
+            return []
+
+        positions = self._tree(state).query_box(lower, upper)
+        # Stable output order by Pokemon id
+        positions = positions[np.argsort(ids[positions], kind='stable')]
+        if limit is not None:
+            positions = positions[:limit]
+        return [(int(ids[i]), payloads[i]) for i in positions]
@@ -0,0 +1,178 @@
+"""
+KD-tree over base stat vectors for k-NN, radius and box queries.
+
+Points are reordered so every leaf is a contiguous slice, and every node keeps
+the bounding box of its points. Queries walk the tree in Python but prune whole
+subtrees by bounding box and hand leaves (or fully contained subtrees) to NumPy
+as slices, so large synthetic rosters are searched in sublinear time.
+"""
+
+import heapq
+import numpy as np
+
+# Points per leaf; leaves are scanned with vectorized NumPy
+LEAF_SIZE = 32
+
+class KDTree:
+    """Static KD-tree with bounding boxes per node"""
+
+    def __init__(self, points, leaf_size=LEAF_SIZE):
+        points = np.asarray(points, dtype=np.float64)
+        n, dimensions = points.shape
+        self.leaf_size = max(1, leaf_size)
+        self.order = np.arange(n)
+
+        lower, upper, left, right, start, end = [], [], [], [], [], []
+
+        def add_node(node_start, node_end):
+            node = len(start)
+            block = points[self.order[node_start:node_end]]
+            lower.append(block.min(axis=0) if len(block) else np.zeros(dimensions))
+            upper.append(block.max(axis=0) if len(block) else np.zeros(dimensions))
+            left.append(-1)
+            right.append(-1)
+            start.append(node_start)
+            end.append(node_end)
+            return node
+
+        root = add_node(0, n)
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            node_start, node_end = start[node], end[node]
+            if node_end - node_start <= self.leaf_size:
+                continue
+
+            # Split on the widest dimension at the median
+            split_dimension = int(np.argmax(upper[node] - lower[node]))
+            if upper[node][split_dimension] == lower[node][split_dimension]:
+                continue  # All points identical, keep as a leaf
+            indices = self.order[node_start:node_end]
+            middle = (node_end - node_start) // 2
+            partition = np.argpartition(points[indices, split_dimension], middle)
+            self.order[node_start:node_end] = indices[partition]
+
+            left[node] = add_node(node_start, node_start + middle)
+            right[node] = add_node(node_start + middle, node_end)
+            stack.extend((left[node], right[node]))
+
+        self.points = points[self.order]
+        self.lower = np.array(lower)
+        self.upper = np.array(upper)
+        self.left = np.array(left)
+        self.right = np.array(right)
+        self.start = np.array(start)
+        self.end = np.array(end)
+
+    def __len__(self):
+        return len(self.order)
+
+    def _min_squared_distance(self, node, query):
+        """Squared distance from the query to the node's bounding box"""
+        gap = np.maximum(0.0, np.maximum(self.lower[node] - query, query - self.upper[node]))
+        return float(gap @ gap)
+
+    def _max_squared_distance(self, node, query):
+        """Squared distance from the query to the farthest corner of the node's box"""
+        far = np.maximum(np.abs(query - self.lower[node]), np.abs(query - self.upper[node]))
+        return float(far @ far)
+
+    def query(self, query, k=5):
+        """k nearest neighbours as (positions, distances), closest first"""
+        query = np.asarray(query, dtype=np.float64)
+        k = min(k, len(self))
+        if k < 1:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        # best holds (-squared_distance, position) so the worst hit is on top
+        best = []
+        candidates = [(self._min_squared_distance(0, query), 0)]
+        while candidates:
+            bound, node = heapq.heappop(candidates)
+            if len(best) == k and bound > -best[0][0]:
+                break
+
+            if self.left[node] == -1:
+                block = self.points[self.start[node]:self.end[node]] - query
+                squared = np.einsum('ij,ij->i', block, block)
+                for offset in np.argsort(squared)[:k]:
+                    item = (-float(squared[offset]), int(self.start[node] + offset))
+                    if len(best) < k:
+                        heapq.heappush(best, item)
+                    elif item[0] > best[0][0]:
+                        heapq.heapreplace(best, item)
+                    else:
+                        break
+                continue
+
+            for child in (self.left[node], self.right[node]):
+                child_bound = self._min_squared_distance(child, query)
+                if len(best) < k or child_bound <= -best[0][0]:
+                    heapq.heappush(candidates, (child_bound, child))
+
+        # Closest first, ties in tree order
+        best.sort(key=lambda item: (-item[0], item[1]))
+        positions = np.array([position for _, position in best], dtype=np.int64)
+        distances = np.sqrt([-negative for negative, _ in best])
+        return self.order[positions], distances
+
+    def query_radius(self, query, radius):
+        """All points within radius as (positions, distances), closest first"""
+        query = np.asarray(query, dtype=np.float64)
+        squared_radius = radius * radius
+        found_positions, found_squared = [], []
+
+        stack = [0] if len(self) else []
+        while stack:
+            node = stack.pop()
+            if self._min_squared_distance(node, query) > squared_radius:
+                continue
+
+            is_leaf = self.left[node] == -1
+            if is_leaf or self._max_squared_distance(node, query) <= squared_radius:
+                block = self.points[self.start[node]:self.end[node]] - query
+                squared = np.einsum('ij,ij->i', block, block)
+                inside = np.flatnonzero(squared <= squared_radius)
+                found_positions.append(self.start[node] + inside)
+                found_squared.append(squared[inside])
+                continue
+
+            stack.extend((self.left[node], self.right[node]))
+
+        if not found_positions:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        positions = np.concatenate(found_positions)
+        squared = np.concatenate(found_squared)
+        ordering = np.argsort(squared, kind='stable')
+        return self.order[positions[ordering]], np.sqrt(squared[ordering])
+
+    def query_box(self, lower, upper):
+        """Positions of all points inside the axis-aligned box [lower, upper]"""
+        lower = np.asarray(lower, dtype=np.float64)
+        upper = np.asarray(upper, dtype=np.float64)
+        found = []
+
+        stack = [0] if len(self) else []
+        while stack:
+            node = stack.pop()
+            # Disjoint boxes are pruned
+            if (self.upper[node] < lower).any() or (self.lower[node] > upper).any():
+                continue
+
+            # Fully contained subtrees are taken without looking at points
+            if (self.lower[node] >= lower).all() and (self.upper[node] <= upper).all():
+                found.append(np.arange(self.start[node], self.end[node]))
+                continue
+
+            if self.left[node] == -1:
+                block = self.points[self.start[node]:self.end[node]]
+                inside = np.flatnonzero(((block >= lower) & (block <= upper)).all(axis=1))
+                found.append(self.start[node] + inside)
+                continue
+
+            stack.extend((self.left[node], self.right[node]))
+
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        return np.sort(self.order[np.concatenate(found)])
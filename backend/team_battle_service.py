@@ -0,0 +1,284 @@
+"""
+Six-versus-six team battles simulated in batches.
+
+Every matchup is reduced to small lookup tables (level stats, greedy move damage,
+accuracy and crit odds for each attacker/defender pair). Battle state for many
+trials of many matchups is then held in NumPy arrays and advanced one turn at a
+time for all rows at once, so Monte Carlo runs cost a handful of array
+operations per turn instead of a Python loop per battle.
+"""
+
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from battle_service import (
+    get_pokemon_moveset, calculate_level_stats, calculate_base_damage, build_damage_table
+)
+
+MAX_TEAM_SIZE = 6
+# Turn cap for a full team battle (20 turns per party slot, like the 1v1 simulator)
+MAX_TEAM_TURNS = 20 * MAX_TEAM_SIZE
+# Replacement policies after a faint
+SWITCHING_POLICIES = ("order", "matchup")
+# Worker processes used by simulate_team_battle_batch
+TEAM_BATTLE_WORKERS = int(os.getenv("TEAM_BATTLE_WORKERS", "1"))
+# Trial chunks per batch when progress is reported
+PROGRESS_CHUNKS = 10
+
+STAT_KEYS = ['hp', 'attack', 'defense', 'special_attack', 'special_defense', 'speed']
+
+# Process pool shared by every batch, started on first use
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool(workers=None):
+    """Get the shared process pool, sized by TEAM_BATTLE_WORKERS (or workers if larger) when first started"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=max(TEAM_BATTLE_WORKERS, workers or 1))
+    return _pool
+
+def close_pool():
+    """Shut down the shared process pool"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+def _member_profile(pokemon, level):
+    """Level stats, types and moveset for one team member"""
+    metadata = pokemon['metadata']
+    stats = calculate_level_stats([metadata['stats'][stat_key] for stat_key in STAT_KEYS], level)
+    types = metadata.get('types', [])
+    return stats, types, get_pokemon_moveset(pokemon['name'], types, stats)
+
+def _attack_tables(attackers, defenders, level):
+    """Greedy move damage, accuracy and crit odds for every attacker/defender pair"""
+    base = np.zeros((MAX_TEAM_SIZE, MAX_TEAM_SIZE))
+    expected = np.zeros((MAX_TEAM_SIZE, MAX_TEAM_SIZE))
+    hit_chance = np.ones((MAX_TEAM_SIZE, MAX_TEAM_SIZE))
+    crit_chance = np.zeros((MAX_TEAM_SIZE, MAX_TEAM_SIZE))
+
+    for i, (attacker_stats, attacker_types, moveset) in enumerate(attackers):
+        for j, (defender_stats, defender_types, _) in enumerate(defenders):
+            # Same policy as ai="greedy" in simulate_battle_advanced
+            table = build_damage_table(moveset, attacker_stats, defender_stats, attacker_types, defender_types, level)
+            best = max(range(len(moveset)), key=table.__getitem__)
+            move_data = moveset[best]
+            expected[i, j] = table[best]
+            if move_data["power"]:
+                base[i, j], _ = calculate_base_damage(attacker_stats, defender_stats, attacker_types, defender_types, move_data, level)
+            hit_chance[i, j] = move_data["accuracy"] / 100
+            crit_chance[i, j] = min(move_data["crit_ratio"] * 0.0625, 1.0)
+
+    return base, expected, hit_chance, crit_chance
+
+def build_team_tables(team_a, team_b, level=50):
+    """Precompute the per-pair lookup tables for one team matchup"""
+    if not (1 <= len(team_a) <= MAX_TEAM_SIZE) or not (1 <= len(team_b) <= MAX_TEAM_SIZE):
+        raise ValueError(f"Teams must have between 1 and {MAX_TEAM_SIZE} Pokemon")
+
+    members_a = [_member_profile(pokemon, level) for pokemon in team_a]
+    members_b = [_member_profile(pokemon, level) for pokemon in team_b]
+
+    # Empty party slots start fainted (0 HP) and are never sent in
+    max_hp = np.zeros((2, MAX_TEAM_SIZE))
+    speed = np.zeros((2, MAX_TEAM_SIZE))
+    for side, members in enumerate((members_a, members_b)):
+        for slot, (stats, _, _) in enumerate(members):
+            max_hp[side, slot] = stats[0]
+            speed[side, slot] = stats[5]
+
+    base_ab, expected_ab, hit_ab, crit_ab = _attack_tables(members_a, members_b, level)
+    base_ba, expected_ba, hit_ba, crit_ba = _attack_tables(members_b, members_a, level)
+
+    # Matchup score for switching: share of the opponent's HP removed per turn
+    # minus the share of our own HP lost, indexed [own member, opponent member]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        score_a = np.nan_to_num(expected_ab / max_hp[1][None, :]) - np.nan_to_num(expected_ba.T / max_hp[0][:, None])
+        score_b = np.nan_to_num(expected_ba / max_hp[0][None, :]) - np.nan_to_num(expected_ab.T / max_hp[1][:, None])
+
+    return {
+        "names_a": [pokemon['name'] for pokemon in team_a],
+        "names_b": [pokemon['name'] for pokemon in team_b],
+        "max_hp": max_hp,
+        "speed": speed,
+        "base": np.stack([base_ab, base_ba]),
+        "hit": np.stack([hit_ab, hit_ba]),
+        "crit": np.stack([crit_ab, crit_ba]),
+        "score": np.stack([score_a, score_b]),
+    }
+
+def _choose_replacements(hp, opponent_active, score, matchup_rows, switching):
+    """Pick the next active member for each row that needs one"""
+    alive = hp > 0
+    if switching == "matchup":
+        # Best alive matchup against the opponent currently on the field
+        candidate_scores = score[matchup_rows, :, opponent_active]
+        candidate_scores = np.where(alive, candidate_scores, -np.inf)
+        return np.argmax(candidate_scores, axis=1)
+    # Party order: first member that is still standing
+    return np.argmax(alive, axis=1)
+
+def run_team_trials(tables, trials, switching="order", seed=None):
+    """
+    Simulate trials of every matchup in a stacked batch of team tables.
+
+    tables holds the arrays from build_team_tables stacked on a leading matchup
+    axis (see stack_team_tables). Returns win, draw and turn totals per matchup.
+    """
+    if switching not in SWITCHING_POLICIES:
+        raise ValueError(f"Unknown switching policy '{switching}'")
+
+    rng = np.random.default_rng(seed)
+    n_matchups = tables["max_hp"].shape[0]
+    rows = np.repeat(np.arange(n_matchups), trials)
+    n_rows = len(rows)
+
+    # Battle state: HP of both parties and the active slot of each side
+    hp = [tables["max_hp"][rows, 0].copy(), tables["max_hp"][rows, 1].copy()]
+    active = [np.zeros(n_rows, dtype=np.int64), np.zeros(n_rows, dtype=np.int64)]
+    turns = np.zeros(n_rows, dtype=np.int64)
+    finished = np.zeros(n_rows, dtype=bool)
+
+    for _ in range(MAX_TEAM_TURNS):
+        live = np.flatnonzero(~finished)
+        if not len(live):
+            break
+        m = rows[live]
+        a = active[0][live]
+        b = active[1][live]
+
+        # Damage each active Pokemon would deal this turn: roll, crit and accuracy
+        damage = []
+        for side, (attacker, defender) in enumerate(((a, b), (b, a))):
+            base = tables["base"][m, side, attacker, defender]
+            rolls = rng.uniform(0.85, 1.0, len(live))
+            crits = np.where(rng.random(len(live)) < tables["crit"][m, side, attacker, defender], 1.5, 1.0)
+            hits = rng.random(len(live)) < tables["hit"][m, side, attacker, defender]
+            damage.append(np.where(hits, np.floor(base * crits * rolls), 0.0))
+
+        hp_a = hp[0][live, a]
+        hp_b = hp[1][live, b]
+        a_first = tables["speed"][m, 0, a] >= tables["speed"][m, 1, b]
+
+        # Faster side hits first; a fainted defender does not strike back
+        first_hp_b = np.maximum(0, hp_b - damage[0])
+        first_hp_a = np.maximum(0, hp_a - damage[1])
+        new_hp_b = np.where(a_first, first_hp_b, np.where(first_hp_a > 0, first_hp_b, hp_b))
+        new_hp_a = np.where(a_first, np.where(first_hp_b > 0, first_hp_a, hp_a), first_hp_a)
+
+        hp[0][live, a] = new_hp_a
+        hp[1][live, b] = new_hp_b
+        turns[live] += 1
+
+        # Battle ends when one party has nobody left standing
+        out_a = ~(hp[0][live] > 0).any(axis=1)
+        out_b = ~(hp[1][live] > 0).any(axis=1)
+        finished[live] = out_a | out_b
+
+        # Faint and replace for battles that continue
+        for side, (new_hp, opponent) in enumerate(((new_hp_a, b), (new_hp_b, a))):
+            needs = (new_hp <= 0) & ~(out_a | out_b)
+            if needs.any():
+                targets = live[needs]
+                active[side][targets] = _choose_replacements(
+                    hp[side][targets], opponent[needs], tables["score"][:, side], rows[targets], switching
+                )
+
+    standing_a = (hp[0] > 0).sum(axis=1)
+    standing_b = (hp[1] > 0).sum(axis=1)
+    wins_a = (standing_b == 0) & (standing_a > 0)
+    wins_b = (standing_a == 0) & (standing_b > 0)
+
+    return {
+        "wins_a": np.bincount(rows, weights=wins_a, minlength=n_matchups),
+        "wins_b": np.bincount(rows, weights=wins_b, minlength=n_matchups),
+        "turns": np.bincount(rows, weights=turns, minlength=n_matchups),
+        "standing_a": np.bincount(rows, weights=standing_a, minlength=n_matchups),
+        "standing_b": np.bincount(rows, weights=standing_b, minlength=n_matchups),
+    }
+
+def stack_team_tables(tables_list):
+    """Stack per-matchup tables along a leading matchup axis"""
+    return {
+        key: np.stack([tables[key] for tables in tables_list])
+        for key in ("max_hp", "speed", "base", "hit", "crit", "score")
+    }
+
+def _summarize(tables_list, totals, trials):
+    """Turn per-matchup totals into API-friendly result dicts"""
+    results = []
+    for index, tables in enumerate(tables_list):
+        wins_a = int(totals["wins_a"][index])
+        wins_b = int(totals["wins_b"][index])
+        results.append({
+            "team_a": tables["names_a"],
+            "team_b": tables["names_b"],
+            "trials": trials,
+            "wins_a": wins_a,
+            "wins_b": wins_b,
+            "draws": trials - wins_a - wins_b,
+            "win_rate_a": round(wins_a / trials, 4),
+            "win_rate_b": round(wins_b / trials, 4),
+            "average_turns": round(float(totals["turns"][index]) / trials, 2),
+            "average_remaining_a": round(float(totals["standing_a"][index]) / trials, 2),
+            "average_remaining_b": round(float(totals["standing_b"][index]) / trials, 2),
+        })
+    return results
+
+def simulate_team_battle_batch(matchups, trials=100, level=50, switching="order", workers=None, seed=None, progress=None):
+    """
+    Monte Carlo simulation of many team matchups in one call.
+
+    matchups is a list of (team_a, team_b) pairs of roster entries. Trials are
+    split across the shared process pool when more than one worker is requested.
+    progress, if given, is called as progress(done, trials, partial_results)
+    as chunks of trials complete.
+    """
+    if workers is None:
+        workers = TEAM_BATTLE_WORKERS
+
+    tables_list = [build_team_tables(team_a, team_b, level) for team_a, team_b in matchups]
+    stacked = stack_team_tables(tables_list)
+
+    # One chunk per worker, or finer chunks when progress is reported
+    chunks = max(1, workers) if progress is None else max(workers, PROGRESS_CHUNKS)
+    chunks = max(1, min(chunks, trials))
+    shares = [trials // chunks + (1 if i < trials % chunks else 0) for i in range(chunks)]
+    # Independent random stream per chunk
+    seeds = np.random.SeedSequence(seed).spawn(chunks)
+
+    futures = []
+    try:
+        if workers > 1 and chunks > 1:
+            pool = get_pool(workers)
+            futures = [pool.submit(run_team_trials, stacked, share, switching, chunk_seed) for share, chunk_seed in zip(shares, seeds)]
+            partials = (future.result() for future in futures)
+        else:
+            partials = (run_team_trials(stacked, share, switching, chunk_seed) for share, chunk_seed in zip(shares, seeds))
+
+        totals = None
+        done = 0
+        for share, partial in zip(shares, partials):
+            totals = partial if totals is None else {key: totals[key] + partial[key] for key in totals}
+            done += share
+            if progress is not None:
+                progress(done, trials, _summarize(tables_list, totals, done))
+    finally:
+        # Drop this batch's queued chunks if it stopped early; the pool stays up
+        for future in futures:
+            future.cancel()
+
+    return _summarize(tables_list, totals, trials)
+
+def simulate_team_battle(team_a, team_b, trials=100, level=50, switching="order", workers=None, seed=None, progress=None):
+    """Monte Carlo simulation of a single team matchup"""
+    single_progress = None
+    if progress is not None:
+        single_progress = lambda done, total, partial: progress(done, total, partial[0])
+    return simulate_team_battle_batch([(team_a, team_b)], trials, level, switching, workers, seed, single_progress)[0]
@@ -11,6 +11,7 @@ import json
 
 # Import the FastAPI app
 from api import app
+from job_service import JobQueueFull
 
 # Create test client
 client = TestClient(app)
@@ -103,6 +104,19 @@ class TestPokemonEndpoints:
         assert response.status_code == 400  # Bad request for invalid limit
         assert "detail" in response.json()
 
+    def test_rank_by_weights_invalid_input(self):
+        """Test that malformed weights and constraints are rejected"""
+        assert client.get("/pokemon/rank/?weights=1,2,3").status_code == 400
+        response = client.get("/pokemon/rank/?weights=1,1,1,1,1,1&constraints=luck>=5")
+        assert response.status_code == 400
+        assert "luck" in response.json()["detail"]
+
+    def test_get_all_pokemon_invalid_cursor(self):
+        """Test that a tampered cursor is rejected"""
+        response = client.get("/pokemon/?cursor=not-a-cursor")
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invalid cursor"
+
 class TestSearchEndpoints:
     """Test search functionality"""
     
@@ -157,6 +171,30 @@ class TestSearchEndpoints:
         data = response.json()
         assert data["results"] == []
 
+    def test_search_similar_invalid_filters(self):
+        """Test that unknown types and malformed abilities are rejected"""
+        assert client.get("/search_similar/?stats=35,55,40,50,50,90&types=plasma").status_code == 400
+        assert client.get("/search_similar/?stats=35,55,40,50,50,90&abilities=static;drop").status_code == 400
+
+    def test_search_similar_invalid_metric(self):
+        """Test that unknown metrics and non-knn metric searches are rejected"""
+        assert client.get("/search_similar/?stats=35,55,40,50,50,90&metric=cosine").status_code == 400
+        assert client.get("/search_similar/?stats=35,55,40,50,50,90&metric=mahalanobis&mode=radius&radius=10").status_code == 400
+
+    @patch('api.search_stat_box', return_value=[])
+    def test_search_similar_box_passes_archetype(self, mock_box):
+        """Test that box mode forwards the archetype restriction instead of dropping it"""
+        response = client.get("/search_similar/?mode=box&min_stats=0,0,0,0,0,0&max_stats=255,255,255,255,255,255&archetype=2")
+
+        assert response.status_code == 200
+        assert mock_box.call_args[0][-1] == 2
+
+    def test_search_similar_invalid_hybrid(self):
+        """Test that hybrid searches validate their types and weight"""
+        assert client.get("/search_similar/?stats=35,55,40,50,50,90&query_types=water,fire,grass").status_code == 400
+        assert client.get("/search_similar/?stats=35,55,40,50,50,90&query_types=water&type_weight=-1").status_code == 400
+        assert client.get("/search_similar/?stats=35,55,40,50,50,90&query_types=water&types=fire").status_code == 400
+
 class TestTopPokemonEndpoint:
     """Test top Pokemon endpoint"""
     
@@ -236,6 +274,60 @@ class TestAddPokemonEndpoint:
         # This will still fail without proper API key setup, but tests the structure
         # In a real environment, you'd mock the authentication as well
 
+class TestTournamentRefreshEndpoint:
+    """Test that tournament refreshes run as jobs"""
+
+    def test_refresh_queues_job(self):
+        """Test that the refresh is queued instead of simulated inside the request"""
+        job = Mock(id="a" * 32, status="queued")
+        with patch('api.QDRANT_API_KEY', 'test-key'), \
+             patch('api.job_queue') as mock_queue, \
+             patch('api.update_tournament') as mock_update:
+            mock_queue.submit.return_value = job
+            response = client.post("/tournament/refresh?trials=5", headers={"X-API-Key": "test-key"})
+
+        assert response.status_code == 200
+        assert response.json() == {"job_id": job.id, "status": "queued"}
+        mock_queue.submit.assert_called_once_with("tournament", {"trials": 5}, 0)
+        mock_update.assert_not_called()
+
+    def test_full_queue_returns_503(self):
+        """Test that a refresh is refused once too many jobs are waiting"""
+        with patch('api.QDRANT_API_KEY', 'test-key'), \
+             patch('api.job_queue') as mock_queue:
+            mock_queue.submit.side_effect = JobQueueFull("full")
+            response = client.post("/tournament/refresh?trials=5", headers={"X-API-Key": "test-key"})
+
+        assert response.status_code == 503
+
+    def test_refresh_requires_auth(self):
+        """Test that queuing a refresh needs the API key"""
+        assert client.post("/tournament/refresh").status_code == 401
+
+class TestJobEndpoints:
+    """Test job submission and cancellation"""
+
+    def test_cancel_requires_auth(self):
+        """Test that jobs cannot be cancelled without the API key"""
+        with patch('api.QDRANT_API_KEY', 'test-key'), \
+             patch('api.job_queue') as mock_queue:
+            response = client.post(f"/jobs/{'a' * 32}/cancel")
+
+        assert response.status_code == 401
+        mock_queue.cancel.assert_not_called()
+
+    def test_cancel_with_key(self):
+        """Test that an authenticated cancel reaches the queue"""
+        job = Mock(id="a" * 32, status="cancelled")
+        with patch('api.QDRANT_API_KEY', 'test-key'), \
+             patch('api.job_queue') as mock_queue:
+            mock_queue.get.return_value = job
+            mock_queue.cancel.return_value = True
+            response = client.post(f"/jobs/{job.id}/cancel", headers={"X-API-Key": "test-key"})
+
+        assert response.status_code == 200
+        mock_queue.cancel.assert_called_once_with(job.id)
+
 class TestCORSHeaders:
     """Test CORS configuration"""
     
@@ -260,6 +352,34 @@ class TestErrorHandling:
         response = client.post("/health")  # GET endpoint called with POST
         assert response.status_code == 405
 
+class TestBatchRateLimit:
+    """Test rate limiting of the batch similarity endpoint"""
+
+    def test_invalid_batches_are_charged(self):
+        """Test that batches failing validation still use the batch budget"""
+        from security_fixes import RateLimiter
+
+        with patch('api.batch_rate_limiter', RateLimiter(max_requests_per_minute=2)):
+            for _ in range(2):
+                assert client.post("/search_similar/batch", json={"stats": "not a list"}).status_code == 422
+            # The middleware rejects before the body is parsed
+            response = client.post("/search_similar/batch", json={"stats": "not a list"})
+
+        assert response.status_code == 429
+        assert response.json()["detail"].startswith("Rate limit exceeded")
+
+    @patch('api.search_similar_batch', return_value=[[], [], []])
+    def test_charged_per_query(self, mock_search):
+        """Test that a valid batch costs one unit per query in total"""
+        from security_fixes import RateLimiter
+        limiter = RateLimiter(max_requests_per_minute=100)
+
+        with patch('api.batch_rate_limiter', limiter):
+            response = client.post("/search_similar/batch", json={"stats": [[35, 55, 40, 50, 50, 90]] * 3})
+
+        assert response.status_code == 200
+        assert sum(cost for _, cost in limiter.requests["testclient"]) == 3
+
 # Pytest configuration
 @pytest.fixture(scope="session")
 def event_loop():
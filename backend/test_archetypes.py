@@ -0,0 +1,142 @@
+"""
+Test suite for archetypes.py
+Tests k-means clustering, archetype labels and the stored archetype table
+"""
+
+import pytest
+import numpy as np
+from unittest.mock import patch
+import vector_service
+from qdrant_client.models import PointStruct
+from roster_snapshot import RosterSnapshot
+from similarity_index import StatIndex
+from vector_store import NumpyVectorStore
+from archetypes import ArchetypeTable, archetype_label, kmeans, unique_labels
+
+SWEEPERS = [[60, 120, 60, 60, 60, 130], [65, 125, 55, 50, 60, 120], [55, 115, 65, 60, 55, 125]]
+WALLS = [[120, 50, 140, 50, 130, 30], [130, 45, 130, 55, 140, 35], [110, 55, 135, 45, 135, 25]]
+WEAKLINGS = [[30, 20, 25, 20, 25, 30], [25, 25, 20, 25, 20, 25]]
+
+@pytest.fixture
+def points():
+    return list(enumerate(SWEEPERS + WALLS + WEAKLINGS, 1))
+
+class TestKMeans:
+    """Test clustering and labelling"""
+
+    def test_separates_obvious_clusters(self, points):
+        """Test that well separated groups end up in their own clusters"""
+        _, labels = kmeans([vector for _, vector in points], 3)
+
+        assert len(set(labels[:3])) == len(set(labels[3:6])) == len(set(labels[6:])) == 1
+        assert len({labels[0], labels[3], labels[6]}) == 3
+
+    def test_more_clusters_than_points(self):
+        """Test that k is capped at the number of points"""
+        centroids, labels = kmeans([[1] * 6, [2] * 6], 5)
+
+        assert len(centroids) <= 2
+        assert len(labels) == 2
+
+    def test_labels(self):
+        """Test that centroids are named after their standout stats"""
+        vectors = np.array(SWEEPERS + WALLS + WEAKLINGS, dtype=float)
+        mean, std = vectors.mean(axis=0), vectors.std(axis=0)
+
+        assert archetype_label(np.mean(SWEEPERS, axis=0), mean, std) == "fast physical sweeper"
+        assert archetype_label(np.mean(WALLS, axis=0), mean, std) == "wall"
+        assert archetype_label(np.mean(WEAKLINGS, axis=0), mean, std) == "underdeveloped"
+        assert unique_labels(["wall", "tank", "wall"]) == ["wall", "tank", "wall 2"]
+
+class TestArchetypeTable:
+    """Test archetype assignments and member lists"""
+
+    def test_fit_numbers_by_size(self, points):
+        """Test that archetype 0 is the largest cluster and every id is assigned"""
+        table = ArchetypeTable()
+        table.fit(points, 3)
+
+        summary = table.summary()
+        assert [archetype["size"] for archetype in summary] == [3, 3, 2]
+        assert sorted(sum((table.members(archetype["id"]) for archetype in summary), [])) == list(range(1, 9))
+        assert table.archetype_of(7) == 2
+        assert table.label(2) == "underdeveloped"
+
+    def test_assign_moves_member(self, points):
+        """Test that assigning moves a Pokemon to its nearest centroid"""
+        table = ArchetypeTable()
+        table.fit(points, 3)
+        walls = table.archetype_of(4)
+
+        assert table.assign(1, [125, 50, 135, 50, 135, 30]) == walls
+        assert 1 in table.members(walls)
+        assert 1 not in table.members(table.archetype_of(2))
+
+class TestArchetypeService:
+    """Test storing archetypes and cluster-restricted search in vector_service"""
+
+    @pytest.fixture
+    def store(self, points):
+        store = NumpyVectorStore()
+        store.ensure_collection("pokemon_stats", size=6)
+        store.upsert("pokemon_stats", [
+            PointStruct(id=pokemon_id, vector=vector, payload={"name": f"P{pokemon_id}"})
+            for pokemon_id, vector in points
+        ])
+        return store
+
+    def test_build_then_load(self, store):
+        """Test that stored centroids and payload assignments reload into the same table"""
+        with patch('vector_service.client', store), patch('vector_service.roster', RosterSnapshot()), \
+             patch('vector_service.archetypes', ArchetypeTable()):
+            built = vector_service.build_archetypes(3)
+            assert store.retrieve("pokemon_stats", [7])[0].payload["archetype_name"] == "underdeveloped"
+
+            with patch('vector_service.archetypes', ArchetypeTable()):
+                vector_service.load_archetypes()
+                assert vector_service.archetypes.summary() == built
+                members = vector_service.get_archetype_members(2)
+                assert [pokemon["name"] for pokemon in members] == ["P7", "P8"]
+
+    def test_search_restricted_to_archetype(self, store, points):
+        """Test that archetype searches only return members, from the index or the store"""
+        index = StatIndex()
+        index.load((pokemon_id, vector, {"name": f"P{pokemon_id}"}) for pokemon_id, vector in points)
+
+        with patch('vector_service.client', store), patch('vector_service.roster', RosterSnapshot()), \
+             patch('vector_service.archetypes', ArchetypeTable()):
+            vector_service.build_archetypes(3)
+            walls = vector_service.archetypes.archetype_of(4)
+
+            stored = vector_service.search_similar(SWEEPERS[0], top_k=5, archetype=walls)
+            with patch('vector_service.similarity_index', index):
+                local = vector_service.search_similar(SWEEPERS[0], top_k=5, archetype=walls)
+
+        assert [result["name"] for result in local] == [result["name"] for result in stored]
+        assert sorted(result["name"] for result in local) == ["P4", "P5", "P6"]
+
+    def test_box_search_restricted_to_archetype(self, points):
+        """Test that stat box searches honour the archetype instead of answering from the whole index"""
+        stat_keys = ("hp", "attack", "defense", "special_attack", "special_defense", "speed")
+        store = NumpyVectorStore()
+        store.ensure_collection("pokemon_stats", size=6)
+        store.upsert("pokemon_stats", [
+            PointStruct(id=pokemon_id, vector=vector, payload={"name": f"P{pokemon_id}", "stats": dict(zip(stat_keys, vector))})
+            for pokemon_id, vector in points
+        ])
+        index = StatIndex()
+        index.load((pokemon_id, vector, {"name": f"P{pokemon_id}"}) for pokemon_id, vector in points)
+
+        with patch('vector_service.client', store), patch('vector_service.roster', RosterSnapshot()), \
+             patch('vector_service.archetypes', ArchetypeTable()), patch('vector_service.similarity_index', index):
+            vector_service.build_archetypes(3)
+            walls = vector_service.archetypes.archetype_of(4)
+
+            everything = vector_service.search_stat_box([0] * 6, [255] * 6)
+            results = vector_service.search_stat_box([0] * 6, [255] * 6, archetype=walls)
+
+        assert len(everything) == len(points)
+        assert sorted(pokemon["name"] for pokemon in results) == ["P4", "P5", "P6"]
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
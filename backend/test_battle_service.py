@@ -148,6 +148,67 @@ class TestBattleUtilities:
             
             assert fast_speed > slow_speed
 
+class TestGreedyAI:
+    """Test expected-damage move selection"""
+
+    def setup_method(self):
+        self.squirtle = {
+            "name": "Squirtle",
+            "metadata": {
+                "stats": {"hp": 44, "attack": 48, "defense": 65, "special_attack": 50, "special_defense": 64, "speed": 43},
+                "types": ["water"]
+            }
+        }
+        self.charmander = {
+            "name": "Charmander",
+            "metadata": {
+                "stats": {"hp": 39, "attack": 52, "defense": 43, "special_attack": 60, "special_defense": 50, "speed": 65},
+                "types": ["fire"]
+            }
+        }
+
+    def test_expected_damage_includes_accuracy(self):
+        """Test that a less accurate move has proportionally lower expected damage"""
+        stats = [100, 100, 100, 100, 100, 100]
+        surf = battle_service.MOVE_DATABASE["surf"]
+        inaccurate_surf = dict(surf, accuracy=50)
+
+        full = battle_service.calculate_expected_damage(stats, stats, ["normal"], ["normal"], surf)
+        half = battle_service.calculate_expected_damage(stats, stats, ["normal"], ["normal"], inaccurate_surf)
+        assert half == pytest.approx(full / 2)
+
+    def test_expected_damage_status_move(self):
+        """Test that status moves have no expected damage"""
+        stats = [100, 100, 100, 100, 100, 100]
+        toxic = battle_service.MOVE_DATABASE["toxic"]
+        assert battle_service.calculate_expected_damage(stats, stats, ["poison"], ["normal"], toxic) == 0.0
+
+    def test_greedy_picks_super_effective_move(self):
+        """Test that the greedy policy picks the move with the highest expected damage"""
+        moveset = [battle_service.MOVE_DATABASE[key] for key in ("body_slam", "surf", "flamethrower")]
+        stats = [100, 100, 100, 100, 100, 100]
+        table = battle_service.build_damage_table(moveset, stats, stats, ["water"], ["fire"])
+
+        assert len(table) == 3
+        assert battle_service.select_move(moveset, 1, table)["name"] == "Surf"
+
+    def test_damage_table_is_cached(self):
+        """Test that the same matchup reuses the cached damage table"""
+        moveset = [battle_service.MOVE_DATABASE[key] for key in ("surf", "ice_beam")]
+        stats = [80, 80, 80, 80, 80, 80]
+
+        first = battle_service.build_damage_table(moveset, stats, stats, ["water"], ["fire"])
+        second = battle_service.build_damage_table(moveset, list(stats), list(stats), ["water"], ["fire"])
+        assert first is second
+
+    def test_greedy_battle(self):
+        """Test a full battle with the greedy policy"""
+        result = battle_service.simulate_battle_advanced(self.squirtle, self.charmander, ai="greedy")
+
+        assert "result" in result
+        battle_log_text = " ".join(result["battle_log"])
+        assert "Super effective" in battle_log_text
+
 class TestBattleEdgeCases:
     """Test edge cases and error handling"""
     
@@ -0,0 +1,91 @@
+"""
+Test suite for compact_roster.py
+Tests that columnar rows read back exactly as the payloads they were built from
+"""
+
+import pytest
+import numpy as np
+from compact_roster import CompactRoster, SPRITE_URL_TEMPLATE
+from rank_index import stat_matrix
+
+def scraped(pokemon_id, name, stats, types, abilities):
+    """Entry shaped like a scraped payload"""
+    metadata = {
+        "name": name,
+        "height": 7,
+        "weight": 69,
+        "types": types,
+        "abilities": abilities,
+        "base_experience": 64,
+        "sprite_url": SPRITE_URL_TEMPLATE.format(pokemon_id),
+        "stats": dict(zip(("hp", "attack", "defense", "special_attack", "special_defense", "speed"), stats))
+    }
+    return {"id": pokemon_id, "name": name, "metadata": metadata}
+
+ENTRIES = [
+    scraped(1, "Bulbasaur", [45, 49, 49, 65, 65, 45], ["grass", "poison"], ["overgrow", "chlorophyll"]),
+    scraped(6, "Charizard", [78, 84, 78, 109, 85, 100], ["fire", "flying"], ["blaze", "solar-power"]),
+    scraped(242, "Blissey", [255, 10, 10, 75, 135, 55], ["normal"], ["natural-cure", "serene-grace"]),
+]
+
+class TestCompactRoster:
+    """Test the columnar layout and row rebuilding"""
+
+    def test_rows_round_trip(self):
+        """Test that every row equals the entry it was built from"""
+        roster = CompactRoster(ENTRIES)
+
+        assert list(roster) == ENTRIES
+        assert roster[1:] == ENTRIES[1:]
+        assert roster[-1] == ENTRIES[-1]
+        assert list(roster[0]["metadata"]) == list(ENTRIES[0]["metadata"])
+
+    def test_columns_are_compact(self):
+        """Test that stats are uint8 and repeated strings are interned"""
+        roster = CompactRoster(ENTRIES + [scraped(3, "Venusaur", [80, 82, 83, 100, 100, 80], ["grass", "poison"], ["overgrow"])])
+
+        assert roster._stats.dtype == np.uint8
+        assert roster._interners["types"].values == ["grass", "poison", "fire", "flying", "normal"]
+        assert roster._extras == [None] * 4
+
+    def test_uncommon_fields_kept(self):
+        """Test that fields no column covers, custom sprites and wide stats survive"""
+        custom = scraped(9000, "Custom", [300, 1, 1, 1, 1, 1], [], [])
+        custom["metadata"].update({"sprite_url": "https://example.com/custom.png", "legendary": True, "weight": 1.5})
+        partial = {"id": 9001, "name": "Glitch", "metadata": {"name": "Glitch", "stats": {"hp": 10}, "archetype": 2}}
+        roster = CompactRoster([custom, partial])
+
+        assert list(roster) == [custom, partial]
+        assert roster._stats.dtype == np.uint16
+
+    def test_lookup_and_name_filter(self):
+        """Test id lookups and substring name matches"""
+        roster = CompactRoster(ENTRIES)
+
+        assert roster.position(242) == 2
+        assert roster.position(999) is None
+        assert roster.filter_by_name("ZARD", 5) == [ENTRIES[1]]
+
+    def test_stat_matrix_matches_rank_index(self):
+        """Test that the stat matrix equals the one built from entry dicts"""
+        unrankable = {"id": 9001, "name": "Glitch", "metadata": {"name": "Glitch", "stats": {"hp": 10}}}
+        entries = ENTRIES[:2] + [unrankable] + ENTRIES[2:]
+
+        rows, matrix = CompactRoster(entries).stat_matrix()
+        expected_rows, expected_matrix = stat_matrix(entries)
+
+        assert list(rows) == expected_rows
+        np.testing.assert_array_equal(matrix, expected_matrix)
+
+    def test_fingerprint_tracks_content(self):
+        """Test that equal rosters share a fingerprint and any changed field alters it"""
+        fingerprint = CompactRoster(ENTRIES).fingerprint()
+        retyped = scraped(242, "Blissey", [255, 10, 10, 75, 135, 55], ["fairy"], ["natural-cure", "serene-grace"])
+        labelled = {**ENTRIES[2], "metadata": {**ENTRIES[2]["metadata"], "archetype": 3}}
+
+        assert CompactRoster([dict(entry) for entry in ENTRIES]).fingerprint() == fingerprint
+        assert CompactRoster(ENTRIES[:2] + [retyped]).fingerprint() != fingerprint
+        assert CompactRoster(ENTRIES[:2] + [labelled]).fingerprint() != fingerprint
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,177 @@
+"""
+Test suite for distance_matrix.py
+Tests the condensed all-pairs distance matrix against a full square matrix
+"""
+
+import threading
+import time
+import pytest
+import numpy as np
+from unittest.mock import Mock, patch
+import shared_artifacts
+import vector_service
+from distance_matrix import PairwiseDistances, condensed_distances, condensed_pairs, row_offset
+
+@pytest.fixture
+def vectors():
+    rng = np.random.default_rng(3)
+    return rng.integers(1, 256, size=(60, 6)).astype(np.float32)
+
+@pytest.fixture
+def square(vectors):
+    """Reference square distance matrix"""
+    return np.linalg.norm(vectors[:, None, :] - vectors[None, :, :], axis=2)
+
+@pytest.fixture
+def matrix(vectors):
+    pairwise = PairwiseDistances()
+    pairwise.load((i, vector, {"name": f"P{i}"}) for i, vector in enumerate(vectors))
+    return pairwise
+
+class TestCondensedLayout:
+    """Test the lower-triangle condensed layout"""
+
+    def test_matches_square_matrix(self, vectors, square):
+        """Test that every condensed entry is the matching square matrix cell"""
+        condensed = condensed_distances(vectors)
+        rows, columns = condensed_pairs(np.arange(len(condensed)))
+
+        assert len(condensed) == row_offset(len(vectors))
+        assert (rows > columns).all()
+        np.testing.assert_allclose(condensed, square[rows, columns], rtol=1e-5)
+
+    def test_upsert_matches_rebuild(self, matrix, vectors):
+        """Test that incremental inserts and replacements equal a fresh build"""
+        matrix.upsert(100, [10, 20, 30, 40, 50, 60], {"name": "New"})
+        matrix.upsert(7, [200, 200, 200, 200, 200, 200], {"name": "Moved"})
+
+        expected = vectors.copy()
+        expected[7] = 200
+        expected = np.vstack([expected, [10, 20, 30, 40, 50, 60]])
+        np.testing.assert_allclose(matrix._state[3], condensed_distances(expected), rtol=1e-5)
+
+    def test_appends_reuse_spare_capacity(self, matrix, vectors):
+        """Test that inserts fill a doubling buffer without touching views readers already hold"""
+        before = matrix._state[3]
+        snapshot = before.copy()
+        added = np.arange(40 * 6, dtype=np.float32).reshape(40, 6)
+        buffers = set()
+        for i, vector in enumerate(added):
+            matrix.upsert(1000 + i, vector, {})
+            buffers.add(id(matrix._buffer))
+
+        # One allocation per doubling, not one copy per insert
+        assert len(buffers) <= 3
+        np.testing.assert_array_equal(before, snapshot)
+        np.testing.assert_allclose(matrix._state[3], condensed_distances(np.vstack([vectors, added])), rtol=1e-5)
+
+class TestPairwiseQueries:
+    """Test neighbour, uniqueness and closest-pair queries"""
+
+    def test_neighbours(self, matrix, square):
+        """Test nearest and farthest neighbours against the square matrix"""
+        nearest, farthest = matrix.neighbours(12, k=3)
+        row = square[12].copy()
+        row[12] = np.nan
+
+        assert [pokemon_id for pokemon_id, _, _ in nearest] == list(np.argsort(np.nan_to_num(row, nan=np.inf))[:3])
+        assert [pokemon_id for pokemon_id, _, _ in farthest] == list(np.argsort(-np.nan_to_num(row, nan=-np.inf))[:3])
+        assert matrix.neighbours(999) is None
+
+    def test_uniqueness(self, matrix, square):
+        """Test that uniqueness is the mean distance to the five nearest neighbours"""
+        np.fill_diagonal(square, np.inf)
+        expected = np.sort(square, axis=1)[:, :5].mean(axis=1)
+
+        results = matrix.uniqueness(limit=3)
+
+        assert [pokemon_id for pokemon_id, _, _ in results] == list(np.argsort(-expected)[:3])
+        np.testing.assert_allclose([score for _, score, _ in results], np.sort(expected)[::-1][:3], rtol=1e-5)
+        assert matrix.uniqueness(limit=1, most_unique=False)[0][0] == int(np.argmin(expected))
+
+    def test_closest_pairs(self, matrix, square):
+        """Test that the closest pairs come back in distance order"""
+        np.fill_diagonal(square, np.inf)
+        pairs = matrix.closest_pairs(limit=2)
+        first = np.unravel_index(np.argmin(square), square.shape)
+
+        assert {pairs[0][1][0], pairs[0][2][0]} == {int(first[0]), int(first[1])}
+        assert pairs[0][0] <= pairs[1][0]
+        assert pairs[0][0] == pytest.approx(square.min(), rel=1e-5)
+
+    def test_single_point(self):
+        """Test that a roster of one has no pairs or neighbours"""
+        pairwise = PairwiseDistances()
+        pairwise.load([(1, [1] * 6, {})])
+
+        assert pairwise.closest_pairs() == []
+        assert pairwise.neighbours(1) == ([], [])
+        assert pairwise.uniqueness() == [(1, 0.0, {})]
+
+class TestPairwiseArtifact:
+    """Test caching the matrix through the shared artifact store"""
+
+    def test_reuses_published_matrix(self, tmp_path, vectors):
+        """Test that an unchanged roster attaches to the published matrix instead of recomputing"""
+        store = shared_artifacts.ArtifactStore(str(tmp_path))
+        points = [(i, vector, {}) for i, vector in enumerate(vectors)]
+
+        with patch('distance_matrix.get_artifact_store', return_value=store):
+            PairwiseDistances().load(points)
+            with patch('distance_matrix.condensed_distances') as mock_compute:
+                reloaded = PairwiseDistances()
+                reloaded.load(points)
+
+        mock_compute.assert_not_called()
+        np.testing.assert_allclose(reloaded._state[3], condensed_distances(vectors))
+
+    def test_changed_roster_recomputes(self, tmp_path, vectors):
+        """Test that a different roster does not reuse a stale matrix"""
+        store = shared_artifacts.ArtifactStore(str(tmp_path))
+
+        with patch('distance_matrix.get_artifact_store', return_value=store):
+            PairwiseDistances().load((i, vector, {}) for i, vector in enumerate(vectors))
+            changed = PairwiseDistances()
+            changed.load((i, vector, {}) for i, vector in enumerate(vectors[:-1]))
+
+        assert len(changed._state[3]) == row_offset(len(vectors) - 1)
+
+    def test_writes_published_in_batches(self, matrix):
+        """Test that upserts republish once per batch and publish_pending flushes the rest"""
+        store = Mock()
+        with patch('distance_matrix.get_artifact_store', return_value=store), \
+             patch('distance_matrix.PAIRWISE_PUBLISH_BATCH', 3):
+            for i in range(4):
+                matrix.upsert(100 + i, [i] * 6, {})
+            assert store.publish.call_count == 1
+
+            matrix.publish_pending()
+            matrix.publish_pending()
+
+        assert store.publish.call_count == 2
+        assert len(store.publish.call_args[0][1]["ids"]) == 64
+
+class TestPairwiseService:
+    """Test the lazy loading wiring in vector_service"""
+
+    def test_concurrent_first_use_loads_once(self, vectors):
+        """Test that concurrent first requests build the matrix once"""
+        points = [Mock(id=i, vector=vector, payload={"name": f"P{i}"}) for i, vector in enumerate(vectors)]
+
+        def slow_scroll(**kwargs):
+            time.sleep(0.05)
+            return points
+
+        with patch('vector_service.pairwise_distances', PairwiseDistances()), \
+             patch('vector_service.scroll_all_points', side_effect=slow_scroll) as mock_scroll:
+            threads = [threading.Thread(target=vector_service.ensure_pairwise_distances) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            assert vector_service.pairwise_distances.loaded
+        assert mock_scroll.call_count == 1
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,213 @@
+"""
+Test suite for job_service.py
+Tests the in-process priority job queue
+"""
+
+import os
+import threading
+import time
+import pytest
+import job_service
+
+def wait_for(job, states=job_service.FINISHED_STATES, timeout=5.0):
+    """Poll a job until it reaches one of the given states"""
+    deadline = time.time() + timeout
+    while job.status not in states:
+        if time.time() > deadline:
+            raise AssertionError(f"Job stuck in {job.status}")
+        time.sleep(0.01)
+    return job
+
+class TestJobQueue:
+    """Test job submission, progress and results"""
+
+    def test_job_succeeds(self):
+        """Test that a job runs and stores its result"""
+        jobs = job_service.JobQueue(max_concurrency=1)
+        jobs.register("double", lambda job: job.params["value"] * 2)
+
+        job = wait_for(jobs.submit("double", {"value": 21}))
+
+        assert job.status == job_service.SUCCEEDED
+        assert job.result == 42
+        assert job.progress == 1.0
+        assert jobs.get(job.id) is job
+
+    def test_unknown_kind(self):
+        """Test that unregistered kinds are rejected"""
+        jobs = job_service.JobQueue()
+        with pytest.raises(ValueError):
+            jobs.submit("missing")
+
+    def test_progress_and_partial_results(self):
+        """Test that handlers can publish partial results while running"""
+        jobs = job_service.JobQueue(max_concurrency=1)
+        release = threading.Event()
+
+        def handler(job):
+            job.report(0.5, {"wins": 3})
+            release.wait(5)
+            return {"wins": 6}
+
+        jobs.register("slow", handler)
+        job = jobs.submit("slow")
+
+        deadline = time.time() + 5
+        while job.partial_result is None and time.time() < deadline:
+            time.sleep(0.01)
+        assert job.status == job_service.RUNNING
+        assert job.progress == 0.5
+        assert job.to_dict()["partial_result"] == {"wins": 3}
+
+        release.set()
+        assert wait_for(job).result == {"wins": 6}
+
+    def test_failure_is_recorded(self):
+        """Test that handler exceptions mark the job as failed"""
+        jobs = job_service.JobQueue(max_concurrency=1)
+
+        def handler(job):
+            raise RuntimeError("boom")
+
+        jobs.register("broken", handler)
+        job = wait_for(jobs.submit("broken"))
+
+        assert job.status == job_service.FAILED
+        assert job.error == "boom"
+
+    def test_priority_order(self):
+        """Test that higher priority jobs run first once a worker is free"""
+        jobs = job_service.JobQueue(max_concurrency=1)
+        release = threading.Event()
+        order = []
+
+        jobs.register("block", lambda job: release.wait(5))
+        jobs.register("record", lambda job: order.append(job.params["name"]))
+
+        blocker = jobs.submit("block")
+        wait_for(blocker, {job_service.RUNNING})
+        low = jobs.submit("record", {"name": "low"}, priority=0)
+        high = jobs.submit("record", {"name": "high"}, priority=5)
+        release.set()
+
+        wait_for(low)
+        wait_for(high)
+        assert order == ["high", "low"]
+
+    def test_pending_jobs_are_capped(self):
+        """Test that submissions are refused once max_pending jobs are waiting"""
+        jobs = job_service.JobQueue(max_concurrency=1, max_pending=1)
+        release = threading.Event()
+        jobs.register("block", lambda job: release.wait(5))
+
+        running = wait_for(jobs.submit("block"), {job_service.RUNNING})
+        waiting = jobs.submit("block")
+        with pytest.raises(job_service.JobQueueFull):
+            jobs.submit("block")
+
+        release.set()
+        wait_for(running)
+        wait_for(waiting)
+        assert wait_for(jobs.submit("block")).status == job_service.SUCCEEDED
+
+def count_up(steps, delay, progress=None):
+    """Simulation stand-in run in a job process"""
+    for step in range(1, steps + 1):
+        time.sleep(delay)
+        progress(step, steps)
+    return {"steps": steps, "pid": os.getpid()}
+
+class TestProcessJobs:
+    """Test running job bodies in worker processes"""
+
+    def test_result_and_progress_relayed(self):
+        """Test that a process job reports progress here and returns its result"""
+        jobs = job_service.JobQueue(max_concurrency=1)
+        seen = []
+
+        def handler(job):
+            return jobs.run_in_process(job, count_up, 3, 0, on_progress=lambda done, total: seen.append((done, total)))
+
+        jobs.register("count", handler)
+        try:
+            job = wait_for(jobs.submit("count"), timeout=30)
+        finally:
+            jobs.close()
+
+        assert job.status == job_service.SUCCEEDED
+        assert job.result["steps"] == 3
+        assert job.result["pid"] != os.getpid()
+        assert seen == [(1, 3), (2, 3), (3, 3)]
+
+    def test_cancel_stops_process(self):
+        """Test that cancelling stops the child at its next progress call"""
+        jobs = job_service.JobQueue(max_concurrency=1)
+        jobs.register("count", lambda job: jobs.run_in_process(job, count_up, 1000, 0.01,
+                                                               on_progress=lambda done, total: job.report(done / total)))
+        try:
+            job = jobs.submit("count")
+            wait_for(job, {job_service.RUNNING}, timeout=30)
+            deadline = time.time() + 30
+            while job.progress == 0 and time.time() < deadline:
+                time.sleep(0.01)
+            jobs.cancel(job.id)
+
+            assert wait_for(job, timeout=30).status == job_service.CANCELLED
+        finally:
+            jobs.close()
+
+class TestCancellation:
+    """Test cancelling queued and running jobs"""
+
+    def test_cancel_queued_job(self):
+        """Test that a queued job never runs after cancellation"""
+        jobs = job_service.JobQueue(max_concurrency=1)
+        release = threading.Event()
+        ran = []
+
+        jobs.register("block", lambda job: release.wait(5))
+        jobs.register("record", lambda job: ran.append(job.id))
+
+        blocker = jobs.submit("block")
+        wait_for(blocker, {job_service.RUNNING})
+        queued = jobs.submit("record")
+        jobs.cancel(queued.id)
+        release.set()
+        wait_for(blocker)
+        time.sleep(0.05)
+
+        assert queued.status == job_service.CANCELLED
+        assert ran == []
+
+    def test_cancel_running_job(self):
+        """Test that a running job stops at its next progress report"""
+        jobs = job_service.JobQueue(max_concurrency=1)
+        started = threading.Event()
+
+        def handler(job):
+            started.set()
+            for step in range(1000):
+                job.report(step / 1000)
+                time.sleep(0.005)
+            return "finished"
+
+        jobs.register("loop", handler)
+        job = jobs.submit("loop")
+        started.wait(5)
+        jobs.cancel(job.id)
+
+        assert wait_for(job).status == job_service.CANCELLED
+        assert job.result is None
+
+    def test_history_is_pruned(self):
+        """Test that only the newest finished jobs are kept"""
+        jobs = job_service.JobQueue(max_concurrency=1, history_limit=2)
+        jobs.register("noop", lambda job: None)
+
+        submitted = [wait_for(jobs.submit("noop")) for _ in range(4)]
+
+        assert jobs.get(submitted[0].id) is None
+        assert jobs.get(submitted[-1].id) is submitted[-1]
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,70 @@
+"""
+Test suite for move_index.py
+Tests keyword postings, attribute bonuses and top-k move search
+"""
+
+import pytest
+from battle_service import MOVE_DATABASE
+from move_index import MoveIndex, move_postings, NAME_WEIGHT, TYPE_WEIGHT, TEXT_WEIGHT
+
+@pytest.fixture
+def index():
+    move_index = MoveIndex()
+    move_index.load(MOVE_DATABASE.values())
+    return move_index
+
+class TestMovePostings:
+    """Test the per-move field weights"""
+
+    def test_highest_field_wins(self):
+        """Test that name substrings outrank whole-word types and text matches"""
+        weights = move_postings(MOVE_DATABASE["thunderbolt"])
+
+        assert weights["bolt"] == NAME_WEIGHT
+        assert weights["electric"] == TYPE_WEIGHT
+        assert weights["elec"] == TEXT_WEIGHT
+        assert "thunder bolt" not in weights
+
+class TestMoveSearch:
+    """Test scoring and ranking of move searches"""
+
+    def test_name_matches_first(self, index):
+        """Test that name matches rank above type-only matches"""
+        results = index.search("thunder", 5)
+
+        assert [move["name"] for move in results[:3]] == ["Thunderbolt", "Thunder", "Thunder Wave"]
+        assert results[0]["similarity"] == pytest.approx(0.3)
+        assert len(results) == 3
+
+    def test_attribute_bonuses(self, index):
+        """Test that phrase triggers boost moves with matching attributes"""
+        crit = index.search("high crit", 5)
+        assert all(move["crit_ratio"] > 1 for move in crit)
+
+        # Low-accuracy moves outrank the sure hits that "accurate" also matches
+        inaccurate = index.search("low accuracy", 8)
+        assert {move["name"] for move in inaccurate} >= {"Dynamic Punch", "Zap Cannon", "Thunder", "Blizzard"}
+        assert all(move["accuracy"] <= 80 for move in inaccurate)
+
+    def test_limit_and_description(self, index):
+        """Test that only limit results are returned, each with a description"""
+        results = index.search("special", 3)
+
+        assert len(results) == 3
+        assert results[0]["description"].startswith("A special")
+
+    def test_no_matches(self, index):
+        """Test that a query matching nothing returns no moves"""
+        assert index.search("xyzzy") == []
+
+    def test_never_miss_moves(self):
+        """Test that moves without an accuracy value count as sure hits"""
+        index = MoveIndex()
+        index.load([{"name": "Swift", "power": 60, "type": "normal", "category": "special", "accuracy": None}])
+
+        assert [move["name"] for move in index.search("reliable")] == ["Swift"]
+        assert index.search("low accuracy") == []
+        assert index.get("SWIFT")["name"] == "Swift"
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
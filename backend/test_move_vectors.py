@@ -0,0 +1,111 @@
+"""
+Test suite for move_vectors.py
+Tests move feature encoding, free-text query parsing and move k-NN
+"""
+
+import pytest
+import numpy as np
+from unittest.mock import patch
+import vector_service
+from battle_service import MOVE_DATABASE
+from vector_store import NumpyVectorStore
+from move_vectors import MoveVectors, FEATURE_GROUPS, MOVE_VECTOR_SIZE, move_vector, parse_move_query, name_key, named_positions
+
+@pytest.fixture
+def vectors():
+    move_vectors = MoveVectors()
+    move_vectors.load(MOVE_DATABASE.values())
+    return move_vectors
+
+class TestMoveFeatures:
+    """Test encoding moves and queries as vectors"""
+
+    def test_move_vector(self):
+        """Test that every feature group is filled and scaled into [0, 1]"""
+        vector = move_vector(MOVE_DATABASE["stone_edge"])
+
+        assert vector.shape == (MOVE_VECTOR_SIZE,)
+        assert vector[FEATURE_GROUPS['type']].sum() == vector[FEATURE_GROUPS['category']].sum() == 1
+        assert vector[FEATURE_GROUPS['power']][0] == pytest.approx(0.4)
+        assert vector[FEATURE_GROUPS['accuracy']][0] == pytest.approx(0.8)
+        assert vector[FEATURE_GROUPS['crit']][0] == 1.0
+        assert vector[FEATURE_GROUPS['effect']].sum() == 0
+        assert ((vector >= 0) & (vector <= 1)).all()
+
+    def test_parse_query(self):
+        """Test that only the feature groups a query mentions are compared"""
+        target, mask = parse_move_query("Powerful special fire move that can burn")
+
+        assert mask[FEATURE_GROUPS['type']].all() and mask[FEATURE_GROUPS['effect']].all()
+        assert not mask[FEATURE_GROUPS['accuracy']].any()
+        np.testing.assert_array_equal(target[FEATURE_GROUPS['type']], move_vector(MOVE_DATABASE["flamethrower"])[FEATURE_GROUPS['type']])
+        assert target[FEATURE_GROUPS['power']][0] == 1.0
+
+    def test_parse_query_without_features(self):
+        """Test that names and unknown words do not parse into a vector"""
+        assert parse_move_query("thunderbolt") is None
+        # "inaccurate" must not also read as "accurate"
+        target, _ = parse_move_query("inaccurate")
+        assert target[FEATURE_GROUPS['accuracy']][0] == 0.5
+
+class TestMoveSearch:
+    """Test k-NN over the move feature matrix"""
+
+    def test_similar_moves(self, vectors):
+        """Test that the closest moves to Thunderbolt are the other electric specials"""
+        results = vectors.similar("thunderbolt", 3)
+
+        assert [move["name"] for move in results] == ["Thunder", "Zap Cannon", "Thunder Wave"]
+        assert results[0]["similarity"] > results[1]["similarity"]
+        assert vectors.similar("Splash") is None
+
+    def test_query_search(self, vectors):
+        """Test that free-text queries rank moves by the features they name"""
+        assert [move["name"] for move in vectors.search("powerful fire special", 2)] == ["Fire Blast", "Flamethrower"]
+        assert {move["name"] for move in vectors.search("high crit physical", 5)} == {"Stone Edge", "Slash", "Psycho Cut", "Night Slash", "Leaf Blade"}
+        assert vectors.search("thunderbolt") is None
+
+    def test_unmatched_moves_dropped(self, vectors):
+        """Test that moves sharing none of the queried features do not pad the results"""
+        results = vectors.search("burn")
+
+        assert results and all(move["effect"] == "burn" for move in results)
+        assert all(move["similarity"] > 0 for move in vectors.search("powerful ice"))
+
+    def test_name_words_merged_with_features(self, vectors):
+        """Test that a move named alongside a type word ranks first"""
+        results = vectors.search("ice beam", 3)
+
+        assert results[0]["name"] == "Ice Beam"
+        assert results[0]["similarity"] == 1.0
+        assert {move["name"] for move in results[1:]} <= {"Blizzard", "Hyper Beam", "Solar Beam", "Psybeam"}
+        assert vectors.search("fire blast", 1)[0]["name"] == "Fire Blast"
+        assert vectors.search("psychic", 1)[0]["name"] == "Psychic"
+        assert vector_service.search_moves("ice beam", 1)[0]["name"] == "Ice Beam"
+
+    def test_named_positions(self):
+        """Test that full move names are found as runs of query words"""
+        positions = {name_key(name): position for position, name in enumerate(["Ice Beam", "Double-Edge", "Beam"])}
+
+        assert named_positions("powerful Ice  Beam", positions) == [0, 2]
+        assert named_positions("double edge, normal", positions) == [1]
+        assert named_positions("icebeam", positions) == []
+
+    def test_search_moves_falls_back_to_names(self):
+        """Test that name queries still go through the keyword index"""
+        assert vector_service.search_moves("thunderbolt", 1)[0]["name"] == "Thunderbolt"
+        assert vector_service.search_moves("toxic", 2)[0]["effect"] == "poison"
+
+    def test_sync_move_collection(self, vectors):
+        """Test that the moves collection mirrors the local matrix"""
+        store = NumpyVectorStore()
+        store.ensure_collection("pokemon_stats", size=6)
+
+        with patch('vector_service.client', store), patch('vector_service.move_vectors', vectors):
+            vector_service.sync_move_collection()
+
+        hits = store.search("moves", move_vector(MOVE_DATABASE["thunderbolt"]).tolist(), limit=2)
+        assert [hit.payload["name"] for hit in hits] == ["Thunderbolt", "Thunder"]
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
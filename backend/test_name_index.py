@@ -0,0 +1,120 @@
+"""
+Test suite for name_index.py
+Tests ranked prefix, word-start and substring name lookups
+"""
+
+import pytest
+from name_index import NameIndex, levenshtein, deletes
+
+NAMES = [
+    (25, "Pikachu"),
+    (26, "Raichu"),
+    (10080, "Pikachu-Rock-Star"),
+    (122, "Mr. Mime"),
+    (439, "Mime Jr."),
+    (6, "Charizard"),
+    (10034, "Charizard-Mega-X"),
+]
+
+@pytest.fixture
+def index():
+    """Index loaded with a few species and alternate forms"""
+    name_index = NameIndex()
+    name_index.load(NAMES)
+    return name_index
+
+def names(results):
+    return [name for _, name, _ in results]
+
+class TestNameIndexSearch:
+    """Test ranking and matching"""
+
+    def test_prefix_ranks_shorter_names_first(self, index):
+        """Test that the base species comes before its longer forms"""
+        assert names(index.search("pika")) == ["Pikachu", "Pikachu-Rock-Star"]
+
+    def test_prefix_before_word_start_before_substring(self, index):
+        """Test the prefix > word-start > substring tiers"""
+        results = index.search("mi")
+
+        assert names(results) == ["Mime Jr.", "Mr. Mime"]
+        assert [match for _, _, match in results] == ["prefix", "word_start"]
+
+        results = index.search("chu")
+        assert [match for _, _, match in results] == ["substring"] * 3
+        assert names(results) == ["Raichu", "Pikachu", "Pikachu-Rock-Star"]
+
+    def test_long_substring_uses_trigrams(self, index):
+        """Test substring queries longer than a trigram, including false trigram hits"""
+        assert names(index.search("izard-m")) == ["Charizard-Mega-X"]
+        assert index.search("chuk") == []
+
+    def test_case_insensitive_and_limit(self, index):
+        """Test case folding and the result limit"""
+        assert names(index.search("CHARIZARD", limit=1)) == ["Charizard"]
+
+    def test_empty_query(self, index):
+        """Test that a blank query matches nothing"""
+        assert index.search("  ") == []
+
+class TestNameIndexWrites:
+    """Test keeping the index in sync with add_pokemon"""
+
+    def test_upsert_new_name(self, index):
+        """Test that new names are searchable immediately"""
+        index.upsert(999, "Pikachu-Libre")
+        assert "Pikachu-Libre" in names(index.search("pikachu-l"))
+
+    def test_upsert_rename(self, index):
+        """Test that renaming drops the old name from every structure"""
+        index.upsert(26, "Alolan Raichu")
+
+        assert index.search("rai")[0][2] == "word_start"
+        assert len(index) == len(NAMES)
+        assert [pokemon_id for pokemon_id, _, _ in index.search("raichu")] == [26]
+        assert index.search("alo")[0][0] == 26
+
+class TestFuzzySearch:
+    """Test typo-tolerant lookups"""
+
+    def test_levenshtein_bounded(self):
+        """Test exact distances and the early cutoff"""
+        assert levenshtein("pikachu", "pikachu", 2) == 0
+        assert levenshtein("pikachu", "pikachuu", 2) == 1
+        assert levenshtein("charizard", "charzard", 2) == 1
+        assert levenshtein("pikachu", "raichu", 2) == 3  # Capped at max_distance + 1
+
+    def test_deletes(self):
+        """Test the deletion variants used as dictionary keys"""
+        assert deletes("abc", 1) == {"abc", "bc", "ac", "ab"}
+
+    def test_typo_ranked_by_distance(self, index):
+        """Test that closer spellings rank first"""
+        results = index.fuzzy_search("pikachoo", max_distance=2)
+
+        assert names(results)[0] == "Pikachu"
+        assert results[0][2] == 2
+
+    def test_form_names_match_on_species_word(self, index):
+        """Test that a misspelt species also finds its alternate forms"""
+        results = index.fuzzy_search("charzard", max_distance=1)
+
+        assert names(results) == ["Charizard", "Charizard-Mega-X"]
+        assert [distance for _, _, distance in results] == [1, 1]
+
+    def test_max_distance_respected(self, index):
+        """Test that nothing beyond max_distance is returned"""
+        assert index.fuzzy_search("pikachoo", max_distance=1) == []
+        assert [pokemon_id for pokemon_id, _, _ in index.fuzzy_search("raichu", max_distance=0)] == [26]
+
+    def test_renamed_entries_drop_out(self, index):
+        """Test that old names stop matching after a rename"""
+        index.upsert(26, "Alolan Raichu")
+
+        assert index.fuzzy_search("alolan raichu", max_distance=0)[0][0] == 26
+        assert [pokemon_id for pokemon_id, _, _ in index.fuzzy_search("raichu", max_distance=0)] == [26]
+        index.upsert(26, "Zapdos")
+        assert index.fuzzy_search("raichu", max_distance=1) == []
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
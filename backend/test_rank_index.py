@@ -0,0 +1,121 @@
+"""
+Test suite for rank_index.py
+Tests pre-sorted rankings against scoring the whole roster
+"""
+
+import pytest
+from unittest.mock import patch
+import vector_service
+from vector_store import NumpyVectorStore
+from rank_index import RankIndex, CRITERIA_SCORES, POWER_WEIGHTS, REQUIRED_STATS, stat_matrix, weighted_ranking
+from test_tournament_service import ROSTER, make_pokemon
+
+@pytest.fixture
+def index():
+    rank_index = RankIndex()
+    rank_index.load(sorted(ROSTER, key=lambda pokemon: pokemon["id"]))
+    return rank_index
+
+@pytest.fixture
+def rows():
+    """id -> roster entry mapping the index resolves its hits through"""
+    return {pokemon["id"]: pokemon for pokemon in ROSTER}
+
+class TestRankIndex:
+    """Test top-k and rank-of lookups"""
+
+    def test_top_matches_full_ranking(self, index, rows):
+        """Test that every criteria returns exactly what rank_pokemon would"""
+        roster = sorted(ROSTER, key=lambda pokemon: pokemon["id"])
+        for criteria in CRITERIA_SCORES:
+            assert index.top(rows, criteria, 3) == vector_service.rank_pokemon(roster, criteria, 3)
+
+    def test_rank_matches_top_position(self, index, rows):
+        """Test that rank() agrees with the Pokemon's position in top()"""
+        ordering = index.top(rows, "speed", len(index))
+        for position, pokemon in enumerate(ordering, 1):
+            assert index.rank(rows, pokemon["id"], "speed") == (position, pokemon)
+
+    def test_upsert_reranks(self, index, rows):
+        """Test that a write moves a Pokemon to its new place in every criteria"""
+        rows[999] = make_pokemon(999, "Speedster", [50, 50, 50, 50, 50, 250], ["normal"])
+        index.upsert(rows[999])
+
+        assert index.top(rows, "speed", 1)[0]["name"] == "Speedster"
+        assert index.rank(rows, 999, "speed")[0] == 1
+
+        rows[999] = make_pokemon(999, "Speedster", [50, 50, 50, 50, 50, 1], ["normal"])
+        index.upsert(rows[999])
+
+        assert index.rank(rows, 999, "speed")[0] == len(index)
+        assert sum(pokemon["id"] == 999 for pokemon in index.top(rows, "speed", len(index))) == 1
+
+    def test_entries_built_from_current_rows(self, index, rows):
+        """Test that entries come from the rows passed in and ids missing from them are skipped"""
+        leader = index.top(rows, "speed", 1)[0]
+        rows[leader["id"]] = {**rows[leader["id"]], "name": "Renamed"}
+
+        assert index.top(rows, "speed", 1)[0]["name"] == "Renamed"
+        del rows[leader["id"]]
+        assert leader["id"] not in [pokemon["id"] for pokemon in index.top(rows, "speed", len(index))]
+        assert index.rank(rows, leader["id"], "speed") is None
+
+    def test_incomplete_stats_not_ranked(self, index, rows):
+        """Test that Pokemon without a full stat block are left out"""
+        size = len(index)
+        index.upsert({"id": 1000, "name": "Glitch", "metadata": {"stats": {"hp": 10}}})
+
+        assert len(index) == size
+        assert index.rank(rows, 1000) is None
+
+class TestWeightedRanking:
+    """Test custom-weight rankings over the stat matrix"""
+
+    def test_power_weights_match_power_ranking(self, index, rows):
+        """Test that the default power weights reproduce the power ranking"""
+        entries, matrix = stat_matrix(sorted(ROSTER, key=lambda pokemon: pokemon["id"]))
+        weights = [POWER_WEIGHTS[key] for key in REQUIRED_STATS]
+
+        results, matching = weighted_ranking(entries, matrix, weights, limit=3)
+
+        assert matching == 3
+        assert [pokemon["name"] for pokemon in results] == [pokemon["name"] for pokemon in index.top(rows, "power", 3)]
+        assert [pokemon["ranking_score"] for pokemon in results] == [pokemon["ranking_score"] for pokemon in index.top(rows, "power", 3)]
+
+    def test_constraints_mask_rows(self):
+        """Test that linear constraints drop Pokemon before ranking"""
+        entries, matrix = stat_matrix(ROSTER)
+        speed_only = [0, 0, 0, 0, 0, 1]
+
+        results, matching = weighted_ranking(entries, matrix, speed_only, [([0, 0, 0, 0, 0, 1], "<", 100)], limit=5)
+        assert matching == 2
+        assert [pokemon["name"] for pokemon in results] == ["Pikachu", "Blastoise"]
+
+        # attack + special_attack > 150 keeps only the two starters
+        results, _ = weighted_ranking(entries, matrix, speed_only, [([0, 1, 0, 1, 0, 0], ">", 150)], limit=5)
+        assert [pokemon["name"] for pokemon in results] == ["Charizard", "Blastoise"]
+
+    def test_no_matches(self):
+        """Test that unsatisfiable constraints return nothing"""
+        entries, matrix = stat_matrix(ROSTER)
+        assert weighted_ranking(entries, matrix, [1] * 6, [([0, 0, 0, 0, 0, 1], ">=", 500)]) == ([], 0)
+
+class TestRankIndexService:
+    """Test the rank index wiring in vector_service"""
+
+    def test_add_pokemon_updates_rankings(self, index):
+        """Test that add_pokemon inserts into the loaded rankings"""
+        store = NumpyVectorStore()
+        store.ensure_collection("pokemon_stats", size=6)
+        stats = {"hp": 255, "attack": 10, "defense": 10, "special_attack": 75, "special_defense": 135, "speed": 55}
+
+        with patch('vector_service.client', store), patch('vector_service.rank_index', index):
+            vector_service.add_pokemon(242, "Blissey", list(stats.values()), {"stats": stats})
+
+            rank, entry = vector_service.get_pokemon_rank(242, "defensive")
+            assert rank == 1
+            assert entry["name"] == "Blissey"
+            assert vector_service.get_top_pokemon("defensive", 1) == [entry]
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,162 @@
+"""
+Test suite for roster_snapshot.py
+Tests versioning, TTL expiry and write invalidation of the shared roster
+"""
+
+import asyncio
+import pytest
+from unittest.mock import Mock, patch
+import vector_service
+from roster_snapshot import RosterSnapshot
+
+ROSTER = [
+    {"id": 25, "name": "Pikachu", "metadata": {"name": "Pikachu"}},
+    {"id": 6, "name": "Charizard", "metadata": {"name": "Charizard"}},
+]
+
+class TestRosterSnapshot:
+    """Test when a snapshot counts as current"""
+
+    def test_empty_until_published(self):
+        """Test that nothing is current before the first load"""
+        snapshot = RosterSnapshot()
+        assert snapshot.current() is None
+        assert snapshot.latest() is None
+
+    def test_publish_sorts_and_versions(self):
+        """Test that each publish is a new version in id order"""
+        snapshot = RosterSnapshot()
+        first = snapshot.publish(ROSTER)
+        second = snapshot.publish(ROSTER)
+
+        assert [entry["id"] for entry in first.pokemon] == [6, 25]
+        assert first.by_id[25]["name"] == "Pikachu"
+        assert second.version == first.version + 1
+        assert snapshot.current() is second
+
+    def test_ttl_expiry(self):
+        """Test that a snapshot older than the TTL is stale"""
+        snapshot = RosterSnapshot(ttl=60)
+        with patch('roster_snapshot.time.monotonic', return_value=1000.0):
+            published = snapshot.publish(ROSTER)
+        with patch('roster_snapshot.time.monotonic', return_value=1059.0):
+            assert snapshot.current() is published
+        with patch('roster_snapshot.time.monotonic', return_value=1061.0):
+            assert snapshot.current() is None
+            assert snapshot.latest() is published
+
+    def test_invalidate(self):
+        """Test that a write makes the snapshot stale immediately"""
+        snapshot = RosterSnapshot()
+        snapshot.publish(ROSTER)
+        snapshot.invalidate()
+        assert snapshot.current() is None
+
+    def test_write_during_load_keeps_stale(self):
+        """Test that a load overlapping a write does not count as fresh"""
+        snapshot = RosterSnapshot()
+        token = snapshot.begin_load()
+        snapshot.invalidate()
+        snapshot.publish(ROSTER, token)
+
+        assert snapshot.current() is None
+
+    def test_external_change_flagged(self):
+        """Test that only reloads picking up changes no local write made are flagged"""
+        renamed = [{**ROSTER[0], "name": "Raichu", "metadata": {"name": "Raichu"}}, ROSTER[1]]
+        snapshot = RosterSnapshot()
+
+        assert not snapshot.publish(ROSTER).changed_externally
+        assert not snapshot.publish(ROSTER).changed_externally
+        assert snapshot.publish(renamed).changed_externally
+
+        snapshot.invalidate()
+        assert not snapshot.publish(ROSTER, snapshot.begin_load()).changed_externally
+
+class TestRosterReadPaths:
+    """Test that read paths share the snapshot instead of scrolling"""
+
+    @pytest.fixture
+    def points(self):
+        """Scrolled points backing the roster"""
+        return [Mock(id=entry["id"], payload=entry["metadata"]) for entry in ROSTER]
+
+    def test_reads_share_one_load(self, points):
+        """Test that repeated reads scroll the collection once"""
+        with patch('vector_service.roster', RosterSnapshot()), \
+             patch('vector_service.name_index', vector_service.NameIndex()), \
+             patch('vector_service.scroll_all_points', return_value=points) as mock_scroll:
+            assert [p["name"] for p in vector_service.get_all_pokemon()] == ["Charizard", "Pikachu"]
+            assert vector_service.search_pokemon_by_name("pika")[0]["id"] == 25
+            vector_service.get_top_pokemon("speed", 5)
+
+        assert mock_scroll.call_count == 1
+
+    def test_add_pokemon_invalidates(self, points):
+        """Test that add_pokemon forces the next read to reload"""
+        store = Mock()
+        with patch('vector_service.roster', RosterSnapshot()), \
+             patch('vector_service.client', store), \
+             patch('vector_service.scroll_all_points', return_value=points) as mock_scroll:
+            first = vector_service.get_roster()
+            vector_service.add_pokemon(150, "Mewtwo", [106, 110, 90, 154, 90, 130])
+            second = vector_service.get_roster()
+
+        assert mock_scroll.call_count == 2
+        assert second.version == first.version + 1
+        store.upsert.assert_called_once()
+
+    def test_concurrent_async_reads_share_one_load(self, points):
+        """Test that concurrent async reads of a stale roster scroll the collection once"""
+        async def slow_scroll():
+            await asyncio.sleep(0.01)
+            return points
+
+        async def read_concurrently():
+            return await asyncio.gather(*(vector_service.get_roster_async() for _ in range(5)))
+
+        with patch('vector_service.roster', RosterSnapshot()), \
+             patch('vector_service._roster_async_lock', asyncio.Lock()), \
+             patch('vector_service.scroll_all_points_async', side_effect=slow_scroll) as mock_scroll:
+            snapshots = asyncio.run(read_concurrently())
+
+        assert mock_scroll.call_count == 1
+        assert len({snapshot.version for snapshot in snapshots}) == 1
+
+class TestDerivedIndexRebuild:
+    """Test that roster reloads keep the derived indexes in step"""
+
+    @staticmethod
+    def points(name):
+        return [Mock(id=25, payload={"name": name}, vector=[35, 55, 40, 50, 50, 90])]
+
+    def test_refresh_rebuilds_loaded_indexes(self):
+        """Test that an explicit refresh rebuilds the name index and leaves unloaded ones alone"""
+        index = vector_service.NameIndex()
+        with patch('vector_service.roster', RosterSnapshot()), \
+             patch('vector_service.name_index', index), \
+             patch('vector_service.scroll_all_points', return_value=self.points("Pikachu")) as mock_scroll:
+            vector_service.load_name_index()
+            mock_scroll.return_value = self.points("Raichu")
+            vector_service.refresh_roster()
+
+            assert [pokemon["name"] for pokemon in vector_service.search_pokemon_by_name("rai")] == ["Raichu"]
+            assert vector_service.search_pokemon_by_name("pika") == []
+        # Only the roster reloads were scrolled, not the unloaded similarity index
+        assert mock_scroll.call_count == 2
+
+    def test_expired_reload_with_external_changes_rebuilds(self):
+        """Test that a TTL reload picking up another process's write rebuilds the indexes"""
+        index = vector_service.NameIndex()
+        with patch('vector_service.roster', RosterSnapshot(ttl=60)), \
+             patch('vector_service.name_index', index), \
+             patch('vector_service.scroll_all_points', return_value=self.points("Pikachu")) as mock_scroll, \
+             patch('roster_snapshot.time.monotonic', return_value=1000.0) as mock_clock:
+            vector_service.load_name_index()
+            mock_scroll.return_value = self.points("Raichu")
+            mock_clock.return_value = 1061.0
+
+            assert vector_service.search_pokemon_by_name("rai")[0]["name"] == "Raichu"
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,80 @@
+"""
+Test suite for shared_artifacts.py
+Tests versioned memory-mapped artifact publishing
+"""
+
+import os
+import pytest
+import numpy as np
+import shared_artifacts
+
+@pytest.fixture
+def store(tmp_path):
+    """Artifact store rooted in a temporary directory"""
+    return shared_artifacts.ArtifactStore(str(tmp_path))
+
+class TestArtifactStore:
+    """Test publish and attach"""
+
+    def test_attach_before_publish(self, store):
+        """Test that an unpublished artifact attaches as None"""
+        assert store.attach("tournament") is None
+
+    def test_publish_and_attach(self, store):
+        """Test that published arrays are mapped read-only without copies"""
+        version = store.publish("tournament", {"win_rates": np.eye(3)}, {"names": ["a", "b", "c"]})
+        attached = store.attach("tournament")
+
+        assert version == 1
+        assert attached.version == 1
+        assert attached.metadata["names"] == ["a", "b", "c"]
+        assert isinstance(attached["win_rates"], np.memmap)
+        np.testing.assert_array_equal(attached["win_rates"], np.eye(3))
+        with pytest.raises(ValueError):
+            attached["win_rates"][0, 0] = 5.0
+
+    def test_attach_is_cached_per_version(self, store):
+        """Test that repeated attaches reuse the same mapping"""
+        store.publish("tournament", {"win_rates": np.zeros(2)})
+        assert store.attach("tournament") is store.attach("tournament")
+
+    def test_new_version_swaps_pointer(self, store):
+        """Test that readers move to the new version while old views stay valid"""
+        store.publish("tournament", {"win_rates": np.zeros(2)})
+        old = store.attach("tournament")
+
+        store.publish("tournament", {"win_rates": np.ones(2)})
+        new = store.attach("tournament")
+
+        assert new.version == 2
+        np.testing.assert_array_equal(new["win_rates"], np.ones(2))
+        np.testing.assert_array_equal(old["win_rates"], np.zeros(2))
+
+    def test_separate_stores_share_versions(self, store, tmp_path):
+        """Test that a second store on the same directory (another worker) sees the leader's version"""
+        store.publish("level_stats", {"stats": np.arange(6)})
+        worker_store = shared_artifacts.ArtifactStore(str(tmp_path))
+
+        attached = worker_store.attach("level_stats")
+        np.testing.assert_array_equal(attached["stats"], np.arange(6))
+
+    def test_separate_stores_number_versions_together(self, store, tmp_path):
+        """Test that publishers in different workers never reuse a version"""
+        worker_store = shared_artifacts.ArtifactStore(str(tmp_path))
+
+        first = store.publish("tournament", {"win_rates": np.zeros(2)}, {"version": 1})
+        second = worker_store.publish("tournament", {"win_rates": np.ones(2)}, {"version": 1})
+
+        assert (first, second) == (1, 2)
+        assert store.attach("tournament").metadata["version"] == 2
+
+    def test_old_versions_are_removed(self, store):
+        """Test that only the retention window stays on disk"""
+        for value in range(shared_artifacts.KEEP_VERSIONS + 2):
+            store.publish("tournament", {"win_rates": np.full(2, value)})
+
+        versions = [name for name in os.listdir(store.versions_dir) if name.startswith("tournament-")]
+        assert len(versions) == shared_artifacts.KEEP_VERSIONS
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,216 @@
+"""
+Test suite for similarity_index.py
+Tests the in-memory nearest-neighbour index
+"""
+
+import pytest
+import numpy as np
+from unittest.mock import patch
+import similarity_index
+from battle_service import type_profile
+
+POINTS = [
+    (6, [78, 84, 78, 109, 85, 100], {"name": "Charizard"}),
+    (25, [35, 55, 40, 50, 50, 90], {"name": "Pikachu"}),
+    (145, [90, 90, 85, 125, 90, 100], {"name": "Zapdos"}),
+    (146, [90, 100, 90, 125, 85, 90], {"name": "Moltres"}),
+    (54, [50, 52, 48, 65, 50, 55], {"name": "Psyduck"}),
+]
+
+@pytest.fixture
+def index():
+    """Index loaded with a small roster"""
+    stat_index = similarity_index.StatIndex()
+    stat_index.load(POINTS)
+    return stat_index
+
+class TestStatIndexSearch:
+    """Test k-NN queries"""
+
+    def test_empty_index(self):
+        """Test that an empty index returns no results"""
+        stat_index = similarity_index.StatIndex()
+        assert not stat_index.loaded
+        assert stat_index.search([1, 2, 3, 4, 5, 6]) == []
+
+    def test_exact_match_first(self, index):
+        """Test that an exact match is returned first with zero distance"""
+        results = index.search([90, 100, 90, 125, 85, 90], top_k=3)
+
+        assert [payload["name"] for _, _, payload in results] == ["Moltres", "Zapdos", "Charizard"]
+        assert results[0][1] == 0.0
+
+    def test_top_k_larger_than_roster(self, index):
+        """Test that top_k is capped at the roster size"""
+        assert len(index.search([50] * 6, top_k=50)) == len(POINTS)
+
+    def test_matches_brute_force(self):
+        """Test against a sorted brute-force search on a synthetic roster"""
+        rng = np.random.default_rng(0)
+        vectors = rng.integers(1, 255, size=(1000, 6))
+        stat_index = similarity_index.StatIndex()
+        stat_index.load((i, vector, {"name": str(i)}) for i, vector in enumerate(vectors))
+
+        query = rng.integers(1, 255, size=6)
+        expected = np.argsort(np.linalg.norm(vectors - query, axis=1), kind='stable')[:10]
+
+        results = stat_index.search(query, top_k=10)
+        assert [pokemon_id for pokemon_id, _, _ in results] == expected.tolist()
+
+class TestStatIndexBatchSearch:
+    """Test answering many queries in one pass"""
+
+    def test_batch_matches_single_queries(self):
+        """Test that every batch row equals the single-query result"""
+        rng = np.random.default_rng(1)
+        vectors = rng.integers(1, 255, size=(500, 6))
+        stat_index = similarity_index.StatIndex()
+        stat_index.load((i, vector, {"name": str(i)}) for i, vector in enumerate(vectors))
+        queries = rng.integers(1, 255, size=(40, 6))
+
+        # Small blocks so the batch is split across several matrix products
+        with patch('similarity_index.BATCH_BLOCK_SIZE', 500 * 7):
+            batch = stat_index.search_batch(queries, top_k=4)
+
+        assert len(batch) == len(queries)
+        for query, results in zip(queries, batch):
+            single = stat_index.search(query, top_k=4)
+            assert [pokemon_id for pokemon_id, _, _ in results] == [pokemon_id for pokemon_id, _, _ in single]
+            np.testing.assert_allclose([d for _, d, _ in results], [d for _, d, _ in single], rtol=1e-6)
+
+    def test_exact_match_has_zero_distance(self, index):
+        """Test that cancellation in the expanded form never goes negative"""
+        results = index.search_batch([[90, 100, 90, 125, 85, 90], [35, 55, 40, 50, 50, 90]], top_k=1)
+
+        assert [row[0][2]["name"] for row in results] == ["Moltres", "Pikachu"]
+        assert results[0][0][1] == 0.0
+
+    def test_empty_index(self):
+        """Test that an empty index returns one empty list per query"""
+        assert similarity_index.StatIndex().search_batch([[1] * 6, [2] * 6]) == [[], []]
+
+class TestStatIndexWrites:
+    """Test keeping the index in sync with writes"""
+
+    def test_upsert_new_point(self, index):
+        """Test that new points become searchable"""
+        index.upsert(999, [1, 1, 1, 1, 1, 1], {"name": "Tiny"})
+
+        assert len(index) == len(POINTS) + 1
+        assert index.search([1, 1, 1, 1, 1, 1], top_k=1)[0][2]["name"] == "Tiny"
+
+    def test_upsert_existing_point(self, index):
+        """Test that re-upserting an id replaces it"""
+        index.upsert(25, [200, 200, 200, 200, 200, 200], {"name": "Pikachu"})
+
+        assert len(index) == len(POINTS)
+        assert index.search([200] * 6, top_k=1)[0][0] == 25
+
+class TestStatIndexMetrics:
+    """Test standardized and Mahalanobis k-NN against direct formulas"""
+
+    @pytest.fixture
+    def roster(self):
+        rng = np.random.default_rng(11)
+        return rng.integers(20, 200, size=(300, 6)).astype(np.float64)
+
+    @pytest.fixture
+    def metric_index(self, roster):
+        stat_index = similarity_index.StatIndex()
+        stat_index.load((i, row, {"name": str(i)}) for i, row in enumerate(roster))
+        return stat_index
+
+    def test_standardized_matches_z_scores(self, metric_index, roster):
+        """Test that standardized distance is Euclidean distance between z-scores"""
+        query = np.array([100, 60, 80, 120, 90, 150])
+        mean, std = roster.mean(axis=0), roster.std(axis=0)
+        expected = np.linalg.norm((roster - mean) / std - (query - mean) / std, axis=1)
+
+        results = metric_index.search(query, top_k=5, metric="standardized")
+
+        assert [pokemon_id for pokemon_id, _, _ in results] == list(np.argsort(expected, kind='stable')[:5])
+        np.testing.assert_allclose([d for _, d, _ in results], np.sort(expected)[:5], rtol=1e-4)
+
+    def test_mahalanobis_matches_inverse_covariance(self, metric_index, roster):
+        """Test that whitened Euclidean distance equals the Mahalanobis distance"""
+        query = np.array([100, 60, 80, 120, 90, 150])
+        inverse = np.linalg.inv(np.cov(roster, rowvar=False))
+        diff = roster - query
+        expected = np.sqrt(np.einsum('ij,jk,ik->i', diff, inverse, diff))
+
+        results = metric_index.search(query, top_k=5, metric="mahalanobis")
+
+        assert [pokemon_id for pokemon_id, _, _ in results] == list(np.argsort(expected, kind='stable')[:5])
+        np.testing.assert_allclose([d for _, d, _ in results], np.sort(expected)[:5], rtol=1e-4)
+
+    def test_metric_refit_after_upsert(self, metric_index):
+        """Test that the whitening is refit when the roster changes"""
+        metric_index.search([100] * 6, metric="standardized")
+        metric_index.upsert(999, [250, 250, 250, 250, 250, 250], {"name": "Outlier"})
+
+        assert metric_index.search([250] * 6, top_k=1, metric="standardized")[0][0] == 999
+
+    def test_constant_stat_does_not_divide_by_zero(self):
+        """Test that a stat with no variance is ignored instead of producing NaNs"""
+        stat_index = similarity_index.StatIndex()
+        stat_index.load([(i, [50, i, 2 * i, 50, i % 3, 7], {}) for i in range(10)])
+
+        for metric in ("standardized", "mahalanobis"):
+            distances = [d for _, d, _ in stat_index.search([50, 4, 8, 50, 1, 7], top_k=3, metric=metric)]
+            assert np.isfinite(distances).all()
+            assert distances[0] == pytest.approx(0, abs=1e-3)
+
+class TestStatIndexHybrid:
+    """Test fused stats + type-matchup k-NN"""
+
+    @pytest.fixture
+    def typed_index(self):
+        stat_index = similarity_index.StatIndex()
+        stat_index.load([
+            (7, [44, 48, 65, 50, 64, 43], {"name": "Squirtle", "types": ["water"]}),
+            (4, [39, 52, 43, 60, 50, 65], {"name": "Charmander", "types": ["fire"]}),
+            (60, [40, 50, 40, 40, 40, 90], {"name": "Poliwag", "types": ["water"]}),
+        ])
+        return stat_index
+
+    def test_zero_weight_is_plain_euclidean(self, typed_index):
+        """Test that without a type weight the ranking matches the stats-only search"""
+        query = [39, 52, 43, 60, 50, 65]
+        hybrid = typed_index.search_hybrid(query, ["water"], 0, top_k=3)
+        plain = typed_index.search(query, top_k=3)
+
+        assert [pokemon_id for pokemon_id, _, _ in hybrid] == [pokemon_id for pokemon_id, _, _ in plain]
+        np.testing.assert_allclose([d for _, d, _ in hybrid], [d for _, d, _ in plain], rtol=1e-5)
+
+    def test_type_weight_favours_matching_types(self, typed_index):
+        """Test that weighting types pulls a same-type Pokemon ahead of a closer stat line"""
+        query = [39, 52, 43, 60, 50, 65]
+        results = typed_index.search_hybrid(query, ["water"], 30, top_k=3)
+
+        assert results[-1][2]["name"] == "Charmander"
+
+    def test_fused_distance(self, typed_index):
+        """Test that the distance combines both terms as sqrt(stat^2 + (w * type)^2)"""
+        query = [44, 48, 65, 50, 64, 43]
+        water, fire = np.array(type_profile(["water"])), np.array(type_profile(["fire"]))
+        stat_distance = np.linalg.norm(np.array([39, 52, 43, 60, 50, 65]) - query)
+
+        results = dict((pokemon_id, distance) for pokemon_id, distance, _ in typed_index.search_hybrid(query, ["water"], 10, top_k=3))
+
+        assert results[7] == pytest.approx(0, abs=1e-4)
+        assert results[4] == pytest.approx(np.sqrt(stat_distance ** 2 + (10 * np.linalg.norm(water - fire)) ** 2), rel=1e-5)
+
+    def test_columns_cached_per_state(self, typed_index):
+        """Test that queries with any weight reuse one stacked matrix until a write"""
+        query = [44, 48, 65, 50, 64, 43]
+        typed_index.search_hybrid(query, ["water"], 10)
+        columns = typed_index._hybrid_cache[1]
+        typed_index.search_hybrid(query, ["fire"], 30)
+
+        assert typed_index._hybrid_cache[1] is columns
+        typed_index.upsert(1, [45, 49, 49, 65, 65, 45], {"name": "Bulbasaur", "types": ["grass"]})
+        assert typed_index.search_hybrid([45, 49, 49, 65, 65, 45], ["grass"], 10, top_k=1)[0][0] == 1
+        assert typed_index._hybrid_cache[1] is not columns
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,122 @@
+"""
+Test suite for spatial_index.py
+Tests KD-tree k-NN, radius and box queries against brute force
+"""
+
+import pytest
+import numpy as np
+from unittest.mock import patch
+import similarity_index
+from spatial_index import KDTree
+
+@pytest.fixture
+def points():
+    """Synthetic roster large enough to build a multi-level tree"""
+    rng = np.random.default_rng(7)
+    return rng.integers(1, 256, size=(2000, 6)).astype(np.float64)
+
+class TestKDTree:
+    """Test KD-tree queries match a full scan"""
+
+    def test_knn_matches_brute_force(self, points):
+        """Test that k-NN returns the same distances as a full scan"""
+        tree = KDTree(points, leaf_size=8)
+        query = np.array([100, 90, 80, 110, 95, 70])
+
+        positions, distances = tree.query(query, k=10)
+        expected = np.sort(np.linalg.norm(points - query, axis=1))[:10]
+
+        assert len(positions) == 10
+        np.testing.assert_allclose(distances, expected)
+        np.testing.assert_allclose(np.linalg.norm(points[positions] - query, axis=1), distances)
+
+    def test_radius_matches_brute_force(self, points):
+        """Test that radius queries return exactly the points inside the ball"""
+        tree = KDTree(points, leaf_size=8)
+        query = np.array([128, 128, 128, 128, 128, 128])
+
+        positions, distances = tree.query_radius(query, 90)
+        expected = np.flatnonzero(np.linalg.norm(points - query, axis=1) <= 90)
+
+        assert sorted(positions.tolist()) == expected.tolist()
+        assert list(distances) == sorted(distances)
+
+    def test_box_matches_brute_force(self, points):
+        """Test that box queries return exactly the points inside the box"""
+        tree = KDTree(points, leaf_size=8)
+        lower = np.array([50, 0, 0, 100, 0, 0])
+        upper = np.array([200, 255, 150, 255, 255, 120])
+
+        positions = tree.query_box(lower, upper)
+        expected = np.flatnonzero(((points >= lower) & (points <= upper)).all(axis=1))
+
+        assert positions.tolist() == expected.tolist()
+
+    def test_empty_tree(self):
+        """Test that an empty tree answers every query with no results"""
+        tree = KDTree(np.empty((0, 6)))
+
+        assert len(tree.query(np.zeros(6), k=3)[0]) == 0
+        assert len(tree.query_radius(np.zeros(6), 10)[0]) == 0
+        assert len(tree.query_box(np.zeros(6), np.ones(6))) == 0
+
+    def test_identical_points(self):
+        """Test that duplicate points do not break splitting"""
+        tree = KDTree(np.full((100, 6), 50.0), leaf_size=4)
+
+        positions, distances = tree.query_radius(np.full(6, 50.0), 0)
+        assert len(positions) == 100
+        assert not distances.any()
+
+class TestStatIndexSpatialQueries:
+    """Test radius and box queries through the similarity index"""
+
+    @pytest.fixture
+    def index(self):
+        stat_index = similarity_index.StatIndex()
+        stat_index.load([
+            (25, [35, 55, 40, 50, 50, 90], {"name": "Pikachu"}),
+            (145, [90, 90, 85, 125, 90, 100], {"name": "Zapdos"}),
+            (146, [90, 100, 90, 125, 85, 90], {"name": "Moltres"}),
+            (54, [50, 52, 48, 65, 50, 55], {"name": "Psyduck"}),
+        ])
+        return stat_index
+
+    def test_radius_search(self, index):
+        """Test that only Pokemon inside the radius are returned, closest first"""
+        results = index.radius_search([90, 100, 90, 125, 85, 90], 20)
+
+        assert [payload["name"] for _, _, payload in results] == ["Moltres", "Zapdos"]
+        assert results[0][1] == 0.0
+
+    def test_box_search(self, index):
+        """Test that box results are ordered by id and respect the limit"""
+        results = index.box_search([30, 0, 0, 0, 0, 0], [100, 255, 255, 255, 255, 95])
+        assert [pokemon_id for pokemon_id, _ in results] == [25, 54, 146]
+
+        limited = index.box_search([30, 0, 0, 0, 0, 0], [100, 255, 255, 255, 255, 95], limit=1)
+        assert [payload["name"] for _, payload in limited] == ["Pikachu"]
+
+    def test_tree_rebuilt_after_upsert(self, index):
+        """Test that writes are visible to subsequent spatial queries"""
+        assert index.radius_search([10, 10, 10, 10, 10, 10], 1) == []
+
+        index.upsert(999, [10, 10, 10, 10, 10, 10], {"name": "Custom"})
+
+        assert [pokemon_id for pokemon_id, _, _ in index.radius_search([10, 10, 10, 10, 10, 10], 1)] == [999]
+
+    def test_large_index_knn_uses_tree(self, points):
+        """Test that k-NN over the tree agrees with the brute-force path"""
+        stat_index = similarity_index.StatIndex()
+        stat_index.load((i, point, {"name": str(i)}) for i, point in enumerate(points))
+        query = [100, 90, 80, 110, 95, 70]
+
+        brute = stat_index.search(query, top_k=5)
+        with patch('similarity_index.BRUTE_FORCE_LIMIT', 0):
+            tree = stat_index.search(query, top_k=5)
+
+        assert [pokemon_id for pokemon_id, _, _ in tree] == [pokemon_id for pokemon_id, _, _ in brute]
+        np.testing.assert_allclose([d for _, d, _ in tree], [d for _, d, _ in brute], rtol=1e-5)
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
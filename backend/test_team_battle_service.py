@@ -0,0 +1,107 @@
+"""
+Test suite for team_battle_service.py
+Tests the batched six-versus-six battle engine
+"""
+
+import pytest
+from concurrent.futures import ProcessPoolExecutor
+from unittest.mock import patch
+import team_battle_service
+
+def make_pokemon(name, stats, types):
+    """Build a roster entry in the shape returned by search_pokemon_by_name"""
+    keys = ['hp', 'attack', 'defense', 'special_attack', 'special_defense', 'speed']
+    return {"name": name, "metadata": {"stats": dict(zip(keys, stats)), "types": types}}
+
+PIKACHU = make_pokemon("Pikachu", [35, 55, 40, 50, 50, 90], ["electric"])
+CHARIZARD = make_pokemon("Charizard", [78, 84, 78, 109, 85, 100], ["fire", "flying"])
+BLASTOISE = make_pokemon("Blastoise", [79, 83, 100, 85, 105, 78], ["water"])
+VENUSAUR = make_pokemon("Venusaur", [80, 82, 83, 100, 100, 80], ["grass", "poison"])
+MAGIKARP = make_pokemon("Magikarp", [20, 10, 55, 15, 20, 80], ["water"])
+
+class TestTeamTables:
+    """Test per-matchup table precomputation"""
+
+    def test_tables_are_padded_to_six(self):
+        """Test that short teams are padded with fainted slots"""
+        tables = team_battle_service.build_team_tables([PIKACHU], [CHARIZARD, BLASTOISE])
+
+        assert tables["max_hp"].shape == (2, 6)
+        assert tables["max_hp"][0, 0] > 0
+        assert (tables["max_hp"][0, 1:] == 0).all()
+        assert tables["base"].shape == (2, 6, 6)
+
+    def test_team_size_is_limited(self):
+        """Test that teams larger than six are rejected"""
+        with pytest.raises(ValueError):
+            team_battle_service.build_team_tables([PIKACHU] * 7, [CHARIZARD])
+
+class TestTeamBattle:
+    """Test Monte Carlo team battles"""
+
+    def test_results_add_up(self):
+        """Test that wins and draws cover every trial"""
+        result = team_battle_service.simulate_team_battle(
+            [PIKACHU, CHARIZARD, BLASTOISE], [VENUSAUR, MAGIKARP], trials=200, seed=1
+        )
+
+        assert result["wins_a"] + result["wins_b"] + result["draws"] == 200
+        assert result["team_a"] == ["Pikachu", "Charizard", "Blastoise"]
+        assert 0 <= result["average_remaining_a"] <= 3
+
+    def test_stronger_team_wins(self):
+        """Test that a full team beats a lone Magikarp"""
+        result = team_battle_service.simulate_team_battle(
+            [CHARIZARD, BLASTOISE, VENUSAUR], [MAGIKARP], trials=100, seed=2
+        )
+        assert result["win_rate_a"] > 0.95
+
+    def test_seed_is_reproducible(self):
+        """Test that a fixed seed gives identical results"""
+        first = team_battle_service.simulate_team_battle([PIKACHU, BLASTOISE], [CHARIZARD], trials=50, seed=3)
+        second = team_battle_service.simulate_team_battle([PIKACHU, BLASTOISE], [CHARIZARD], trials=50, seed=3)
+        assert first == second
+
+    def test_matchup_switching(self):
+        """Test the best-matchup replacement policy"""
+        result = team_battle_service.simulate_team_battle(
+            [MAGIKARP, CHARIZARD, BLASTOISE], [VENUSAUR, PIKACHU], trials=100, switching="matchup", seed=4
+        )
+        assert result["wins_a"] + result["wins_b"] + result["draws"] == 100
+
+    def test_unknown_switching_policy(self):
+        """Test that an unknown switching policy is rejected"""
+        with pytest.raises(ValueError):
+            team_battle_service.simulate_team_battle([PIKACHU], [CHARIZARD], trials=10, switching="random")
+
+    def test_batch_of_matchups(self):
+        """Test several matchups in one batch call"""
+        results = team_battle_service.simulate_team_battle_batch(
+            [([PIKACHU], [CHARIZARD]), ([BLASTOISE, VENUSAUR], [CHARIZARD, PIKACHU])], trials=50, seed=5
+        )
+
+        assert len(results) == 2
+        assert results[1]["team_b"] == ["Charizard", "Pikachu"]
+
+    def test_process_pool(self):
+        """Test that splitting trials across workers keeps the trial count"""
+        result = team_battle_service.simulate_team_battle([PIKACHU], [CHARIZARD], trials=40, workers=2, seed=6)
+        assert result["wins_a"] + result["wins_b"] + result["draws"] == 40
+
+    def test_default_workers_from_env(self):
+        """Test that batches share one pool sized by TEAM_BATTLE_WORKERS when workers is not given"""
+        team_battle_service.close_pool()
+        try:
+            with patch('team_battle_service.TEAM_BATTLE_WORKERS', 2), \
+                 patch('team_battle_service.ProcessPoolExecutor', wraps=ProcessPoolExecutor) as mock_pool:
+                first = team_battle_service.simulate_team_battle([PIKACHU], [CHARIZARD], trials=40, seed=6)
+                second = team_battle_service.simulate_team_battle([PIKACHU], [CHARIZARD], trials=40, seed=6)
+        finally:
+            team_battle_service.close_pool()
+
+        mock_pool.assert_called_once_with(max_workers=2)
+        assert first == second
+        assert first["wins_a"] + first["wins_b"] + first["draws"] == 40
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,151 @@
+"""
+Test suite for tournament_service.py
+Tests fingerprinting and incremental win-rate matrix updates
+"""
+
+import pytest
+import numpy as np
+from unittest.mock import patch
+import shared_artifacts
+import tournament_service
+
+def make_pokemon(pokemon_id, name, stats, types):
+    """Build a roster entry in the shape returned by get_all_pokemon"""
+    keys = ['hp', 'attack', 'defense', 'special_attack', 'special_defense', 'speed']
+    return {
+        "id": pokemon_id,
+        "name": name,
+        "metadata": {"name": name, "stats": dict(zip(keys, stats)), "types": types}
+    }
+
+ROSTER = [
+    make_pokemon(25, "Pikachu", [35, 55, 40, 50, 50, 90], ["electric"]),
+    make_pokemon(6, "Charizard", [78, 84, 78, 109, 85, 100], ["fire", "flying"]),
+    make_pokemon(9, "Blastoise", [79, 83, 100, 85, 105, 78], ["water"]),
+]
+
+@pytest.fixture(autouse=True)
+def reset_tournament():
+    """Start each test without a published matrix"""
+    tournament_service._current_matrix = None
+    tournament_service._attached_matrix = None
+    yield
+    tournament_service._current_matrix = None
+    tournament_service._attached_matrix = None
+
+class TestFingerprint:
+    """Test species content hashing"""
+
+    def test_fingerprint_is_stable(self):
+        """Test that identical species hash identically"""
+        assert tournament_service.species_fingerprint(ROSTER[0]) == tournament_service.species_fingerprint(dict(ROSTER[0]))
+
+    def test_fingerprint_changes_with_stats(self):
+        """Test that editing a stat changes the fingerprint"""
+        edited = make_pokemon(25, "Pikachu", [35, 55, 40, 50, 50, 110], ["electric"])
+        assert tournament_service.species_fingerprint(ROSTER[0]) != tournament_service.species_fingerprint(edited)
+
+class TestIncrementalUpdate:
+    """Test that only affected rows and columns are simulated"""
+
+    @patch('tournament_service.simulate_matchup', return_value=0.75)
+    def test_full_build(self, mock_simulate):
+        """Test that the first build simulates every pairing once"""
+        matrix, summary = tournament_service.update_tournament(ROSTER, trials=2)
+
+        assert matrix.version == 1
+        assert summary["simulated_pairs"] == 3
+        assert mock_simulate.call_count == 3
+        assert matrix.win_rates[0, 1] == pytest.approx(0.75)
+        assert matrix.win_rates[1, 0] == pytest.approx(0.25)
+
+    @patch('tournament_service.simulate_matchup', return_value=0.6)
+    def test_unchanged_roster_keeps_version(self, mock_simulate):
+        """Test that an unchanged roster does not publish a new version"""
+        first, _ = tournament_service.update_tournament(ROSTER, trials=2)
+        second, summary = tournament_service.update_tournament(ROSTER, trials=2)
+
+        assert second is first
+        assert summary["simulated_pairs"] == 0
+
+    @patch('tournament_service.simulate_matchup', return_value=0.6)
+    def test_edited_species_only_resimulates_its_row(self, mock_simulate):
+        """Test that editing one species simulates n - 1 pairings"""
+        first, _ = tournament_service.update_tournament(ROSTER, trials=2)
+
+        edited = ROSTER[:2] + [make_pokemon(9, "Blastoise", [79, 83, 100, 85, 105, 120], ["water"])]
+        second, summary = tournament_service.update_tournament(edited, trials=2)
+
+        assert second.version == first.version + 1
+        assert summary["changed"] == ["Blastoise"]
+        assert summary["simulated_pairs"] == 2
+        # The old version stays intact for readers still holding it
+        assert first.fingerprints[2] != second.fingerprints[2]
+
+    @patch('tournament_service.simulate_matchup', return_value=0.5)
+    def test_damage_computed_once_per_visited_pair(self, mock_simulate):
+        """Test that profiles are built once per species and each ordered pair is scored once"""
+        with patch('tournament_service._battle_profile', wraps=tournament_service._battle_profile) as mock_profile, \
+             patch('tournament_service._profile_damage', wraps=tournament_service._profile_damage) as mock_damage:
+            matrix, _ = tournament_service.update_tournament(ROSTER, trials=1)
+
+        assert mock_profile.call_count == len(ROSTER)
+        assert mock_damage.call_count == len(ROSTER) * (len(ROSTER) - 1)
+        assert matrix.expected_damage[0, 1] == pytest.approx(tournament_service.best_expected_damage(ROSTER[0], ROSTER[1]))
+        assert matrix.expected_damage[1, 0] == pytest.approx(tournament_service.best_expected_damage(ROSTER[1], ROSTER[0]))
+
+    @patch('tournament_service.simulate_matchup', return_value=0.5)
+    def test_incomplete_entries_are_skipped(self, mock_simulate):
+        """Test that roster entries without stats or types are ignored"""
+        roster = ROSTER + [{"id": 999, "name": "Custom", "metadata": {"name": "Custom"}}]
+        matrix, _ = tournament_service.update_tournament(roster, trials=1)
+
+        assert "Custom" not in matrix.names
+
+    def test_published_matrix_is_read_only(self):
+        """Test that readers cannot mutate a published version"""
+        with patch('tournament_service.simulate_matchup', return_value=0.5):
+            matrix, _ = tournament_service.update_tournament(ROSTER[:2], trials=1)
+
+        with pytest.raises(ValueError):
+            matrix.win_rates[0, 1] = 1.0
+
+class TestSharedMatrix:
+    """Test publishing the matrix through the shared artifact store"""
+
+    @patch('tournament_service.simulate_matchup', return_value=0.7)
+    def test_workers_attach_to_published_matrix(self, mock_simulate, tmp_path):
+        """Test that a fresh worker sees the published version read-only"""
+        store = shared_artifacts.ArtifactStore(str(tmp_path))
+
+        with patch('tournament_service.get_artifact_store', return_value=store):
+            built, _ = tournament_service.update_tournament(ROSTER, trials=1)
+
+            # Simulate a fresh worker that never built the matrix itself
+            tournament_service._current_matrix = None
+            tournament_service._attached_matrix = None
+            attached = tournament_service.get_tournament()
+
+        assert attached.version == built.version
+        assert attached.names == built.names
+        assert isinstance(attached.win_rates, np.memmap)
+        assert attached.win_rates[0, 1] == pytest.approx(0.7)
+        assert attached.expected_damage.shape == (3, 3)
+        assert attached.level_stats.shape == (3, 6)
+
+    @patch('tournament_service.simulate_matchup', return_value=0.7)
+    def test_concurrent_workers_get_distinct_versions(self, mock_simulate, tmp_path):
+        """Test that two workers building from the same state publish different versions"""
+        store = shared_artifacts.ArtifactStore(str(tmp_path))
+
+        # Both workers read the store before either has published
+        with patch('tournament_service.get_artifact_store', return_value=store), \
+             patch('tournament_service.get_tournament', return_value=None):
+            first, _ = tournament_service.update_tournament(ROSTER, trials=1)
+            second, _ = tournament_service.update_tournament(ROSTER, trials=1)
+
+        assert (first.version, second.version) == (1, 2)
+        assert store.attach(tournament_service.TOURNAMENT_ARTIFACT).metadata["version"] == 2
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -3,9 +3,20 @@ Test suite for vector_service.py
 Tests vector database operations and Pokemon data management
 """
 
+import asyncio
+import os
+import subprocess
+import sys
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 import vector_service
+import similarity_index
+from qdrant_client.models import PointStruct
+from vector_store import NumpyVectorStore, AsyncStoreAdapter
+from roster_snapshot import RosterSnapshot
+
+# Cold import of the API (which imports vector_service) must stay under this
+IMPORT_TIME_BUDGET_SECONDS = 3.0
 
 class TestVectorServiceConnection:
     """Test vector database connection and setup"""
@@ -304,5 +315,164 @@ class TestVectorServiceUtilities:
             assert vector_service.normalize_name("  Charizard  ") == "charizard"
             assert vector_service.normalize_name("Mr. Mime") == "mr. mime"
 
+class TestLazyConnection:
+    """Test that the vector store is only created when first used"""
+
+    def test_import_has_no_network_io(self):
+        """Test that a cold import stays within budget against an unreachable Qdrant"""
+        script = (
+            "import time; start = time.perf_counter(); import api, vector_service; "
+            "print(time.perf_counter() - start, vector_service.client is None)"
+        )
+        # A non-routable address would hang any connection attempt made at import
+        env = dict(os.environ, QDRANT_URL="http://10.255.255.1:6333", VECTOR_STORE="qdrant")
+        output = subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env=env, capture_output=True, text=True, timeout=60, check=True
+        ).stdout.split()
+
+        elapsed, client_is_unset = float(output[-2]), output[-1]
+        assert client_is_unset == "True"
+        assert elapsed < IMPORT_TIME_BUDGET_SECONDS
+
+    def test_client_created_once_on_first_use(self):
+        """Test that get_client builds the store once and reuses it"""
+        store = Mock()
+        with patch('vector_service.client', None), patch('vector_service.create_vector_store', return_value=store) as mock_create:
+            assert vector_service.get_client() is store
+            assert vector_service.get_client() is store
+
+        assert mock_create.call_count == 1
+        store.ensure_collection.assert_called_once_with("pokemon_stats", size=6, distance="Euclid")
+        assert {call.args[1] for call in store.create_payload_index.call_args_list} == set(vector_service.PAYLOAD_INDEXES)
+
+class TestFilteredSimilarity:
+    """Test similarity searches restricted by type, ability and stat ranges"""
+
+    @pytest.fixture
+    def store(self):
+        """NumPy store holding three Pokemon with types and abilities"""
+        store = NumpyVectorStore()
+        store.ensure_collection("pokemon_stats", size=6)
+        roster = [
+            (25, "Pikachu", [35, 55, 40, 50, 50, 90], ["electric"], ["static", "lightning-rod"]),
+            (7, "Squirtle", [44, 48, 65, 50, 64, 43], ["water"], ["torrent", "rain-dish"]),
+            (54, "Psyduck", [50, 52, 48, 65, 50, 55], ["water"], ["damp", "swift-swim"]),
+        ]
+        store.upsert("pokemon_stats", [
+            PointStruct(id=pokemon_id, vector=stats, payload={
+                "name": name,
+                "types": types,
+                "abilities": abilities,
+                "stats": dict(zip(vector_service.STAT_PAYLOAD_KEYS, stats))
+            })
+            for pokemon_id, name, stats, types, abilities in roster
+        ])
+        with patch('vector_service.client', store):
+            yield store
+
+    def test_type_filter(self, store):
+        """Test that only Pokemon of the requested type are returned"""
+        query_filter = vector_service.similarity_filter(types=["water"])
+        results = vector_service.search_similar([35, 55, 40, 50, 50, 90], top_k=5, query_filter=query_filter)
+
+        assert [result["name"] for result in results] == ["Psyduck", "Squirtle"]
+
+    def test_ability_and_stat_range_filter(self, store):
+        """Test that ability and per-stat bounds combine"""
+        query_filter = vector_service.similarity_filter(abilities=["swift-swim", "static"], min_stats=[0, 0, 0, 0, 0, 60])
+        results = vector_service.search_similar([50, 52, 48, 65, 50, 55], top_k=5, query_filter=query_filter)
+
+        assert [result["name"] for result in results] == ["Pikachu"]
+
+    def test_filter_bypasses_loaded_index(self, store):
+        """Test that filtered searches go to the store even with the index loaded"""
+        with patch.object(vector_service.similarity_index, 'loaded', True), \
+             patch.object(vector_service.similarity_index, 'search') as mock_search:
+            results = vector_service.search_similar([35, 55, 40, 50, 50, 90], query_filter=vector_service.similarity_filter(types=["water"]))
+
+        mock_search.assert_not_called()
+        assert len(results) == 2
+
+    def test_no_filters(self):
+        """Test that an empty restriction builds no filter"""
+        assert vector_service.similarity_filter() is None
+
+    def test_metric_search_loads_index_on_demand(self, store):
+        """Test that standardized search builds the in-memory index when it is missing"""
+        with patch('vector_service.similarity_index', similarity_index.StatIndex()):
+            results = vector_service.search_similar([44, 48, 65, 50, 64, 43], top_k=1, metric="standardized")
+
+            assert vector_service.similarity_index.loaded
+        assert results[0]["name"] == "Squirtle"
+        assert results[0]["score"] == 1.0
+
+class TestAsyncDataPath:
+    """Test the coroutine counterparts used by async handlers"""
+
+    @pytest.fixture
+    def async_store(self):
+        """Async adapter over a NumPy store holding two Pokemon"""
+        store = NumpyVectorStore()
+        store.ensure_collection("pokemon_stats", size=6)
+        store.upsert("pokemon_stats", [
+            PointStruct(id=25, vector=[35, 55, 40, 50, 50, 90], payload={
+                "name": "Pikachu",
+                "stats": {"hp": 35, "attack": 55, "defense": 40, "special_attack": 50, "special_defense": 50, "speed": 90}
+            }),
+            PointStruct(id=6, vector=[78, 84, 78, 109, 85, 100], payload={
+                "name": "Charizard",
+                "stats": {"hp": 78, "attack": 84, "defense": 78, "special_attack": 109, "special_defense": 85, "speed": 100}
+            })
+        ])
+        with patch('vector_service.async_client', AsyncStoreAdapter(store)), patch('vector_service.roster', RosterSnapshot()):
+            yield store
+
+    def test_async_search_by_name(self, async_store):
+        """Test that the async name search matches partially and case-insensitively"""
+        results = asyncio.run(vector_service.search_pokemon_by_name_async("PIKA"))
+        assert [pokemon["name"] for pokemon in results] == ["Pikachu"]
+
+    def test_async_similarity_search(self, async_store):
+        """Test async similarity search when the in-memory index is not loaded"""
+        with patch.object(vector_service.similarity_index, 'loaded', False):
+            results = asyncio.run(vector_service.search_similar_async([78, 84, 78, 109, 85, 100], top_k=1))
+
+        assert results[0]["name"] == "Charizard"
+        assert results[0]["distance"] == 0.0
+
+    def test_async_top_pokemon_matches_sync_ranking(self, async_store):
+        """Test that async and sync rankings share the same scoring"""
+        all_pokemon = asyncio.run(vector_service.get_all_pokemon_async())
+        top = asyncio.run(vector_service.get_top_pokemon_async("speed", 2))
+
+        assert top == vector_service.rank_pokemon(all_pokemon, "speed", 2)
+        assert [pokemon["name"] for pokemon in top] == ["Charizard", "Pikachu"]
+
+    def test_pages_follow_scroll_offsets(self, async_store):
+        """Test that paging without a snapshot forwards the store's scroll offsets"""
+        first, next_offset = asyncio.run(vector_service.get_pokemon_page_async(limit=1))
+        assert [pokemon["id"] for pokemon in first] == [6]
+        assert next_offset == 25
+
+        second, next_offset = asyncio.run(vector_service.get_pokemon_page_async(limit=1, offset=next_offset))
+        assert [pokemon["id"] for pokemon in second] == [25]
+        assert next_offset is None
+
+    def test_snapshot_pages_match_scroll_pages(self, async_store):
+        """Test that snapshot pages use the same offsets as the store"""
+        scrolled = asyncio.run(vector_service.get_pokemon_page_async(limit=1))
+        asyncio.run(vector_service.get_roster_async())
+
+        assert vector_service.get_pokemon_page(limit=1) == scrolled
+
+    def test_iter_pokemon_walks_every_page(self, async_store):
+        """Test that the lazy iterator yields the whole roster in id order"""
+        async def collect():
+            return [pokemon["id"] async for pokemon in vector_service.iter_pokemon_async(page_size=1)]
+
+        assert asyncio.run(collect()) == [6, 25]
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,126 @@
+"""
+Test suite for vector_store.py
+Tests the NumPy vector store backend and payload filters
+"""
+
+import pytest
+from qdrant_client.models import PointStruct, Filter, FieldCondition, MatchValue, MatchAny, Range
+from vector_store import NumpyVectorStore, VectorStore
+
+POKEMON = [
+    (6, [78, 84, 78, 109, 85, 100], {"name": "Charizard", "types": ["fire", "flying"], "stats": {"speed": 100}}),
+    (25, [35, 55, 40, 50, 50, 90], {"name": "Pikachu", "types": ["electric"], "stats": {"speed": 90}}),
+    (145, [90, 90, 85, 125, 90, 100], {"name": "Zapdos", "types": ["electric", "flying"], "stats": {"speed": 100}}),
+    (146, [90, 100, 90, 125, 85, 90], {"name": "Moltres", "types": ["fire", "flying"], "stats": {"speed": 90}}),
+]
+
+def make_store(path=None):
+    """Store with the sample roster loaded"""
+    store = NumpyVectorStore(path)
+    store.ensure_collection("pokemon_stats", size=6)
+    store.upsert("pokemon_stats", [PointStruct(id=pid, vector=vector, payload=payload) for pid, vector, payload in POKEMON])
+    return store
+
+class TestNumpyStoreSearch:
+    """Test nearest-neighbour queries"""
+
+    def test_search_closest_first(self):
+        """Test that Euclid search returns distances in ascending order"""
+        results = make_store().search("pokemon_stats", [90, 100, 90, 125, 85, 90], limit=2)
+
+        assert [point.payload["name"] for point in results] == ["Moltres", "Zapdos"]
+        assert results[0].score == 0.0
+
+    def test_score_threshold_is_max_distance(self):
+        """Test that score_threshold bounds the distance for Euclid"""
+        results = make_store().search("pokemon_stats", [90, 100, 90, 125, 85, 90], limit=10, score_threshold=20)
+        assert [point.id for point in results] == [146, 145]
+
+    def test_filtered_search(self):
+        """Test match and range conditions, including array payloads"""
+        fire_and_fast = Filter(must=[
+            FieldCondition(key="types", match=MatchValue(value="fire")),
+            FieldCondition(key="stats.speed", range=Range(gte=95))
+        ])
+        results = make_store().search("pokemon_stats", [90] * 6, limit=10, query_filter=fire_and_fast)
+        assert [point.payload["name"] for point in results] == ["Charizard"]
+
+        not_electric = Filter(must_not=[FieldCondition(key="types", match=MatchAny(any=["electric"]))])
+        results = make_store().search("pokemon_stats", [90] * 6, limit=10, query_filter=not_electric)
+        assert sorted(point.id for point in results) == [6, 146]
+
+    def test_search_batch(self):
+        """Test that batches return one list per query"""
+        results = make_store().search_batch("pokemon_stats", [[35, 55, 40, 50, 50, 90], [90, 90, 85, 125, 90, 100]], limit=1)
+        assert [[point.id for point in row] for row in results] == [[25], [145]]
+
+    def test_cosine_collection(self):
+        """Test that cosine collections rank by direction, best first"""
+        store = NumpyVectorStore()
+        store.ensure_collection("moves", size=2, distance="Cosine")
+        store.upsert("moves", [PointStruct(id=1, vector=[1, 0], payload={}), PointStruct(id=2, vector=[0, 5], payload={})])
+
+        assert [point.id for point in store.search("moves", [0, 1], limit=2)] == [2, 1]
+
+class TestNumpyStoreScroll:
+    """Test paging, retrieval and persistence"""
+
+    def test_scroll_pages_in_id_order(self):
+        """Test that next_page_offset walks the whole collection once"""
+        store = make_store()
+        seen, offset = [], None
+        while True:
+            page, offset = store.scroll("pokemon_stats", limit=3, offset=offset)
+            seen.extend(point.id for point in page)
+            if offset is None:
+                break
+
+        assert seen == [6, 25, 145, 146]
+
+    def test_upsert_replaces_and_retrieve(self):
+        """Test that re-upserting an id replaces its vector and payload"""
+        store = make_store()
+        store.upsert("pokemon_stats", [PointStruct(id=25, vector=[1] * 6, payload={"name": "Raichu"})])
+
+        points = store.retrieve("pokemon_stats", [25, 999], with_vectors=True)
+        assert [(point.id, point.payload["name"], point.vector) for point in points] == [(25, "Raichu", [1.0] * 6)]
+
+    def test_set_payload_merges_fields(self):
+        """Test that set_payload adds fields to the given points only"""
+        store = make_store()
+        store.set_payload("pokemon_stats", {"archetype": 3}, [25, 145])
+
+        points = store.retrieve("pokemon_stats", [6, 25, 145])
+        assert [point.payload.get("archetype") for point in points] == [None, 3, 3]
+        assert points[1].payload["name"] == "Pikachu"
+
+    def test_persisted_to_disk(self, tmp_path):
+        """Test that a new store reloads the collection from its file"""
+        path = str(tmp_path / "store.npz")
+        make_store(path)
+
+        reloaded = NumpyVectorStore(path)
+        page, _ = reloaded.scroll("pokemon_stats", limit=10, with_vectors=True)
+
+        assert [point.payload["name"] for point in page] == ["Charizard", "Pikachu", "Zapdos", "Moltres"]
+        assert page[0].vector == [78.0, 84.0, 78.0, 109.0, 85.0, 100.0]
+
+    def test_unknown_collection(self):
+        """Test that using a missing collection fails clearly"""
+        with pytest.raises(ValueError):
+            NumpyVectorStore().search("missing", [0] * 6)
+
+class TestVectorStoreInterface:
+    """Test the backend base class"""
+
+    def test_incomplete_backend_fails_on_construction(self):
+        """Test that a backend missing an operation cannot be instantiated"""
+        class PartialStore(VectorStore):
+            def search(self, collection_name, query_vector, limit=10, score_threshold=None, query_filter=None):
+                return []
+
+        with pytest.raises(TypeError):
+            PartialStore()
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,269 @@
+"""
+Round-robin tournament win-rate matrix with incremental recomputation.
+
+Species are fingerprinted by a content hash of their stats, types and moveset.
+When the roster changes only the rows and columns of new or edited species are
+re-simulated; the finished matrix is published as a new immutable version so
+readers holding the previous version are never blocked. When ARTIFACT_DIR is
+configured the matrix is also published to the shared artifact store so every
+worker process maps the same copy.
+"""
+
+import hashlib
+import json
+import threading
+import numpy as np
+from battle_service import simulate_battle_trials, get_pokemon_moveset, calculate_level_stats, build_damage_table
+from shared_artifacts import get_artifact_store
+
+STAT_KEYS = ['hp', 'attack', 'defense', 'special_attack', 'special_defense', 'speed']
+
+# Battles simulated per pairing
+TOURNAMENT_TRIALS = 10
+# Name of the matrix in the shared artifact store
+TOURNAMENT_ARTIFACT = "tournament"
+
+class TournamentMatrix:
+    """Immutable published version of the win-rate matrix"""
+
+    def __init__(self, version, ids, names, fingerprints, win_rates, level_stats, expected_damage, trials, level, ai):
+        self.version = version
+        self.ids = tuple(ids)
+        self.names = tuple(names)
+        self.fingerprints = tuple(fingerprints)
+        # win_rates[i, j] is the probability that species i beats species j
+        self.win_rates = win_rates
+        # Stats of each species at the tournament level
+        self.level_stats = level_stats
+        # expected_damage[i, j] is the greedy move's expected damage from i to j
+        self.expected_damage = expected_damage
+        for array in (self.win_rates, self.level_stats, self.expected_damage):
+            array.setflags(write=False)
+        self.trials = trials
+        self.level = level
+        self.ai = ai
+
+    def overall_win_rates(self):
+        """Average win rate of each species against the rest of the roster"""
+        n = len(self.ids)
+        if n < 2:
+            return np.full(n, 0.5)
+        # Diagonal is 0.5 by definition, remove it from the average
+        return (self.win_rates.sum(axis=1) - 0.5) / (n - 1)
+
+    def to_dict(self):
+        """Serialize the matrix for API responses"""
+        overall = self.overall_win_rates()
+        return {
+            "version": self.version,
+            "trials": self.trials,
+            "level": self.level,
+            "ai": self.ai,
+            "pokemon": [
+                {"id": pokemon_id, "name": name, "win_rate": round(float(rate), 4)}
+                for pokemon_id, name, rate in zip(self.ids, self.names, overall)
+            ],
+            "win_rates": np.round(self.win_rates, 4).tolist()
+        }
+
+# Currently published matrix; swapped by reference so readers never need a lock
+_current_matrix = None
+# Matrix built from the shared artifact store, cached per store version
+_attached_matrix = None
+# Serializes writers in this process so two refreshes never publish out of order
+_update_lock = threading.Lock()
+
+def has_battle_stats(pokemon):
+    """Check that a roster entry carries the stats and types needed for battle"""
+    metadata = pokemon.get('metadata') or {}
+    stats = metadata.get('stats') or {}
+    return 'types' in metadata and all(stat_key in stats for stat_key in STAT_KEYS)
+
+def species_fingerprint(pokemon, level=50):
+    """Content hash of a species' stats, types and moveset"""
+    metadata = pokemon['metadata']
+    stats = [metadata['stats'][stat_key] for stat_key in STAT_KEYS]
+    types = metadata.get('types', [])
+    moveset = get_pokemon_moveset(pokemon['name'], types, calculate_level_stats(stats, level))
+
+    content = json.dumps({
+        "name": pokemon['name'],
+        "stats": stats,
+        "types": types,
+        "moves": [move['name'] for move in moveset]
+    }, sort_keys=True)
+    return hashlib.sha256(content.encode()).hexdigest()
+
+def best_expected_damage(attacker, defender, level=50):
+    """Expected damage of the attacker's greedy move choice against the defender"""
+    return _profile_damage(_battle_profile(attacker, level), _battle_profile(defender, level), level)
+
+def _profile_damage(attacker_profile, defender_profile, level):
+    """best_expected_damage from precomputed _battle_profile tuples"""
+    attacker_stats, attacker_types, moveset = attacker_profile
+    defender_stats, defender_types, _ = defender_profile
+    return max(build_damage_table(moveset, attacker_stats, defender_stats, attacker_types, defender_types, level))
+
+def _battle_profile(pokemon, level):
+    """Level stats, types and moveset used by the battle simulator"""
+    metadata = pokemon['metadata']
+    stats = calculate_level_stats([metadata['stats'][stat_key] for stat_key in STAT_KEYS], level)
+    types = metadata.get('types', [])
+    return stats, types, get_pokemon_moveset(pokemon['name'], types, stats)
+
+def simulate_matchup(pokemon_a, pokemon_b, trials=TOURNAMENT_TRIALS, level=50, ai="greedy"):
+    """Fraction of battles won by pokemon_a (draws and timeouts count as half)"""
+    summary = simulate_battle_trials(pokemon_a, pokemon_b, trials, level, level, ai)
+    return (summary["wins_a"] + 0.5 * summary["draws"]) / trials
+
+def _matrix_from_artifact(artifact):
+    """Wrap a memory-mapped artifact version as a TournamentMatrix"""
+    metadata = artifact.metadata
+    return TournamentMatrix(
+        artifact.version,
+        artifact["ids"].tolist(),
+        metadata["names"],
+        metadata["fingerprints"],
+        artifact["win_rates"],
+        artifact["level_stats"],
+        artifact["expected_damage"],
+        metadata["trials"],
+        metadata["level"],
+        metadata["ai"]
+    )
+
+def _publish_artifact(matrix):
+    """Write the matrix to the shared artifact store and return the version it was given (None without a store)"""
+    store = get_artifact_store()
+    if store is None:
+        return None
+
+    return store.publish(
+        TOURNAMENT_ARTIFACT,
+        {
+            "ids": np.array(matrix.ids, dtype=np.int64),
+            "win_rates": matrix.win_rates,
+            "level_stats": matrix.level_stats,
+            "expected_damage": matrix.expected_damage
+        },
+        {
+            "names": list(matrix.names),
+            "fingerprints": list(matrix.fingerprints),
+            "trials": matrix.trials,
+            "level": matrix.level,
+            "ai": matrix.ai
+        }
+    )
+
+def get_tournament():
+    """Get the currently published tournament matrix (None until first build)"""
+    global _attached_matrix
+
+    store = get_artifact_store()
+    if store is None:
+        return _current_matrix
+
+    # Workers attach to the shared copy published by whichever process built it
+    artifact = store.attach(TOURNAMENT_ARTIFACT)
+    if artifact is None:
+        return _current_matrix
+
+    cached = _attached_matrix
+    if cached is None or cached[0] != artifact.version:
+        cached = (artifact.version, _matrix_from_artifact(artifact))
+        _attached_matrix = cached
+    return cached[1]
+
+def update_tournament(roster, trials=TOURNAMENT_TRIALS, level=50, ai="greedy", progress=None):
+    """
+    Bring the tournament matrix up to date with the roster.
+
+    Only pairings that involve a new or changed species are simulated; all other
+    cells are copied from the previous version. Returns the published matrix and
+    a summary of the work done. progress, if given, is called as
+    progress(simulated_pairs, total_pairs) after each pairing.
+    """
+    global _current_matrix
+
+    with _update_lock:
+        previous = get_tournament()
+        roster = [pokemon for pokemon in roster if has_battle_stats(pokemon)]
+
+        ids = [pokemon['id'] for pokemon in roster]
+        names = [pokemon['name'] for pokemon in roster]
+        fingerprints = [species_fingerprint(pokemon, level) for pokemon in roster]
+        n = len(roster)
+
+        # A different trial count, level or policy invalidates every cell
+        reusable = (
+            previous is not None and
+            (previous.trials, previous.level, previous.ai) == (trials, level, ai)
+        )
+        previous_index = {}
+        if reusable:
+            previous_index = {
+                (pokemon_id, fingerprint): index
+                for index, (pokemon_id, fingerprint) in enumerate(zip(previous.ids, previous.fingerprints))
+            }
+
+        old_positions = np.array(
+            [previous_index.get((pokemon_id, fingerprint), -1) for pokemon_id, fingerprint in zip(ids, fingerprints)],
+            dtype=np.int64
+        )
+        unchanged = np.flatnonzero(old_positions >= 0)
+        changed = np.flatnonzero(old_positions < 0)
+
+        level_stats = np.array(
+            [calculate_level_stats([pokemon['metadata']['stats'][stat_key] for stat_key in STAT_KEYS], level) for pokemon in roster],
+            dtype=np.int32
+        ).reshape(n, len(STAT_KEYS))
+
+        win_rates = np.full((n, n), 0.5)
+        expected_damage = np.zeros((n, n))
+        if len(unchanged):
+            kept = old_positions[unchanged]
+            win_rates[np.ix_(unchanged, unchanged)] = previous.win_rates[np.ix_(kept, kept)]
+            expected_damage[np.ix_(unchanged, unchanged)] = previous.expected_damage[np.ix_(kept, kept)]
+
+        # Simulate the rows and columns of changed species (mirror matches stay unsimulated)
+        simulated_pairs = 0
+        changed_set = set(changed.tolist())
+        total_pairs = len(changed) * (n - 1) - len(changed) * (len(changed) - 1) // 2
+        # Stats, types and moveset of every species, built once rather than per pairing
+        profiles = [_battle_profile(pokemon, level) for pokemon in roster] if len(changed) else []
+        for i in changed:
+            for j in range(n):
+                if i == j or (j in changed_set and j < i):
+                    continue
+                expected_damage[i, j] = _profile_damage(profiles[i], profiles[j], level)
+                expected_damage[j, i] = _profile_damage(profiles[j], profiles[i], level)
+                rate = simulate_matchup(roster[i], roster[j], trials, level, ai)
+                win_rates[i, j] = rate
+                win_rates[j, i] = 1.0 - rate
+                simulated_pairs += 1
+                if progress is not None:
+                    progress(simulated_pairs, total_pairs)
+
+        removed = 0
+        if previous is not None:
+            removed = len(set(previous.ids) - set(ids))
+
+        if previous is not None and reusable and not len(changed) and not removed:
+            # Nothing changed, keep serving the current version
+            matrix = previous
+        else:
+            version = previous.version + 1 if previous is not None else 1
+            matrix = TournamentMatrix(version, ids, names, fingerprints, win_rates, level_stats, expected_damage, trials, level, ai)
+            # _update_lock only serializes this process; with a shared store the
+            # version is numbered by the store under its file lock instead
+            published = _publish_artifact(matrix)
+            if published is not None:
+                matrix.version = published
+            _current_matrix = matrix
+
+    return matrix, {
+        "version": matrix.version,
+        "changed": [names[i] for i in changed],
+        "removed": removed,
+        "simulated_pairs": simulated_pairs
+    }
@@ -1,8 +1,20 @@
+import asyncio
 import os
+import threading
+import httpx
 import numpy as np
 from dotenv import load_dotenv
-from qdrant_client import QdrantClient
-from qdrant_client.models import VectorParams, PointStruct
+from qdrant_client import QdrantClient, AsyncQdrantClient
+from qdrant_client.models import PointStruct, Filter, FieldCondition, Range, MatchAny, MatchValue, PayloadSchemaType
+from similarity_index import StatIndex
+from name_index import NameIndex
+from move_index import MoveIndex
+from move_vectors import MoveVectors, MOVE_VECTOR_SIZE
+from archetypes import ArchetypeTable, ARCHETYPE_COUNT
+from distance_matrix import PairwiseDistances
+from rank_index import RankIndex, ranked_stats, ranked_entry, weighted_ranking
+from roster_snapshot import RosterSnapshot
+from vector_store import QdrantVectorStore, NumpyVectorStore, AsyncQdrantVectorStore, AsyncStoreAdapter
 
 # Load .env variables
 load_dotenv()
@@ -11,22 +23,308 @@ load_dotenv()
 QDRANT_URL = os.getenv("QDRANT_URL")
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
 
-# Connect to Qdrant Cloud
-client = QdrantClient(
-    url=QDRANT_URL,
-    api_key=QDRANT_API_KEY
-)
-
-# Create collection only if it doesn't exist
-try:
-    client.get_collection("pokemon_stats")
-    print("Collection 'pokemon_stats' already exists")
-except Exception:
-    print("Creating collection 'pokemon_stats'")
-    client.create_collection(
-        collection_name="pokemon_stats",
-        vectors_config=VectorParams(size=6, distance="Euclid")
-    )
+# Backend selection: qdrant (remote), qdrant_local (embedded) or numpy
+VECTOR_STORE = os.getenv("VECTOR_STORE", "qdrant").lower()
+# Embedded Qdrant location, ":memory:" or a directory
+QDRANT_PATH = os.getenv("QDRANT_PATH", ":memory:")
+# NumPy store file (kept in memory only when unset)
+VECTOR_STORE_PATH = os.getenv("VECTOR_STORE_PATH")
+
+# Async path: gRPC transport and connection pool size for AsyncQdrantClient
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "false").lower() == "true"
+QDRANT_POOL_SIZE = int(os.getenv("QDRANT_POOL_SIZE", "100"))
+
+STAT_PAYLOAD_KEYS = ['hp', 'attack', 'defense', 'special_attack', 'special_defense', 'speed']
+
+# Payload fields indexed so filtered similarity searches stay server-side
+PAYLOAD_INDEXES = {
+    "types": PayloadSchemaType.KEYWORD,
+    "abilities": PayloadSchemaType.KEYWORD,
+    "archetype": PayloadSchemaType.INTEGER,
+    **{f"stats.{key}": PayloadSchemaType.INTEGER for key in STAT_PAYLOAD_KEYS}
+}
+
+# Archetype centroids, one point per archetype id
+ARCHETYPE_COLLECTION = "pokemon_archetypes"
+# Move feature vectors, one point per move table position
+MOVE_COLLECTION = "moves"
+
+def create_vector_store(backend=VECTOR_STORE):
+    """Build the configured vector store backend"""
+    if backend == "qdrant":
+        # Connect to Qdrant Cloud
+        return QdrantVectorStore(QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY))
+    if backend == "qdrant_local":
+        if QDRANT_PATH == ":memory:":
+            return QdrantVectorStore(QdrantClient(location=":memory:"))
+        return QdrantVectorStore(QdrantClient(path=QDRANT_PATH))
+    if backend == "numpy":
+        return NumpyVectorStore(VECTOR_STORE_PATH)
+    raise ValueError(f"Unknown VECTOR_STORE '{backend}' (expected qdrant, qdrant_local or numpy)")
+
+# Created on first use (or by init_vector_store at startup) so importing this
+# module never touches the network
+client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """Return the shared vector store, connecting on first use"""
+    global client
+    if client is None:
+        with _client_lock:
+            if client is None:
+                store = create_vector_store()
+                # Create collection only if it doesn't exist
+                store.ensure_collection("pokemon_stats", size=6, distance="Euclid")
+                ensure_payload_indexes(store)
+                client = store
+    return client
+
+def ensure_payload_indexes(store, collection_name="pokemon_stats"):
+    """Create the payload indexes used by filtered searches"""
+    for field_name, field_schema in PAYLOAD_INDEXES.items():
+        store.create_payload_index(collection_name, field_name, field_schema)
+
+def init_vector_store():
+    """Connect and check the collection up front (call once at startup)"""
+    return get_client()
+
+def create_async_vector_store(backend=VECTOR_STORE):
+    """Build the async store used by async request handlers"""
+    if backend == "qdrant":
+        # One pooled connection set shared by every in-flight request
+        return AsyncQdrantVectorStore(AsyncQdrantClient(
+            url=QDRANT_URL,
+            api_key=QDRANT_API_KEY,
+            prefer_grpc=QDRANT_PREFER_GRPC,
+            limits=httpx.Limits(max_connections=QDRANT_POOL_SIZE, max_keepalive_connections=QDRANT_POOL_SIZE)
+        ))
+    # In-process backends have no I/O to wait on
+    return AsyncStoreAdapter(get_client())
+
+async_client = None
+
+def get_async_client():
+    """Return the shared async store, creating it on first use"""
+    global async_client
+    if async_client is None:
+        async_client = create_async_vector_store()
+    return async_client
+
+async def close_async_client():
+    """Release pooled connections (call at shutdown)"""
+    global async_client
+    if async_client is not None:
+        await async_client.close()
+        async_client = None
+
+# In-memory mirror of the collection used to answer similarity searches locally
+similarity_index = StatIndex()
+# In-memory name index used for name lookups and autocomplete
+name_index = NameIndex()
+# Pre-sorted rankings answering /pokemon/top/ without rescoring the roster
+rank_index = RankIndex()
+# All-pairs stat distances behind neighbour, uniqueness and closest-pair queries
+pairwise_distances = PairwiseDistances()
+# Stat archetype clusters for browse-by-archetype and cluster-restricted search
+archetypes = ArchetypeTable()
+# Keyword postings and attribute bonuses behind move search
+move_index = MoveIndex()
+# Move feature matrix behind similar-move and free-text move search
+move_vectors = MoveVectors()
+# Versioned roster shared by every read path (TTL + invalidated on writes)
+roster = RosterSnapshot()
+# Serializes async reloads so concurrent requests trigger a single scroll
+_roster_async_lock = asyncio.Lock()
+# Serializes first-use index loads so concurrent requests build each index once
+_index_load_lock = threading.RLock()
+
+def ensure_loaded(index, load):
+    """Run load() unless index is already loaded, once even under concurrent callers"""
+    if not index.loaded:
+        with _index_load_lock:
+            # Another thread may have loaded it while we waited
+            if not index.loaded:
+                load()
+
+def scroll_all_points(with_vectors=False, page_size=256):
+    """Page through the whole collection, following next_page_offset"""
+    points = []
+    offset = None
+    while True:
+        page, offset = get_client().scroll(
+            collection_name="pokemon_stats",
+            limit=page_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=with_vectors
+        )
+        points.extend(page)
+        if offset is None:
+            return points
+
+async def scroll_all_points_async(page_size=256):
+    """Non-blocking scroll_all_points (payloads only)"""
+    points = []
+    offset = None
+    while True:
+        page, offset = await get_async_client().scroll(
+            collection_name="pokemon_stats",
+            limit=page_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=False
+        )
+        points.extend(page)
+        if offset is None:
+            return points
+
+def roster_entry(point):
+    """Shape a scrolled point like get_all_pokemon results"""
+    return {"id": point.id, "name": point.payload["name"], "metadata": point.payload}
+
+def get_roster():
+    """Current roster snapshot, reloading from Qdrant only when stale"""
+    snapshot = roster.current()
+    if snapshot is not None:
+        return snapshot
+
+    with roster.refresh_lock:
+        # Another thread may have reloaded while we waited
+        snapshot = roster.current()
+        if snapshot is not None:
+            return snapshot
+        token = roster.begin_load()
+        snapshot = roster.publish([roster_entry(point) for point in scroll_all_points()], token)
+
+    # Another process changed the collection since the indexes were built
+    if snapshot.changed_externally:
+        rebuild_derived_indexes()
+    return snapshot
+
+async def get_roster_async():
+    """Non-blocking get_roster for async request handlers"""
+    snapshot = roster.current()
+    if snapshot is not None:
+        return snapshot
+
+    async with _roster_async_lock:
+        # Another request may have reloaded while we waited
+        snapshot = roster.current()
+        if snapshot is not None:
+            return snapshot
+        token = roster.begin_load()
+        snapshot = roster.publish([roster_entry(point) for point in await scroll_all_points_async()], token)
+
+    if snapshot.changed_externally:
+        await asyncio.to_thread(rebuild_derived_indexes)
+    return snapshot
+
+def refresh_roster():
+    """Reload the roster now (explicit refresh signal), rebuilding the loaded indexes"""
+    roster.invalidate()
+    snapshot = get_roster()
+    rebuild_derived_indexes()
+    return snapshot
+
+def rebuild_derived_indexes():
+    """Rebuild every loaded in-memory index from the current roster and collection"""
+    if similarity_index.loaded:
+        load_similarity_index()
+    if name_index.loaded:
+        load_name_index()
+    if rank_index.loaded:
+        load_rank_index()
+    if pairwise_distances.loaded:
+        load_pairwise_distances()
+    if archetypes.loaded:
+        load_archetypes()
+
+def load_similarity_index():
+    """Load the in-memory similarity index from Qdrant (call once at startup)"""
+    points = scroll_all_points(with_vectors=True)
+    similarity_index.load((point.id, point.vector, point.payload) for point in points)
+    print(f"Loaded {len(similarity_index)} Pokemon into the similarity index")
+
+def load_pairwise_distances():
+    """Build (or attach to a published copy of) the all-pairs distance matrix"""
+    points = scroll_all_points(with_vectors=True)
+    pairwise_distances.load((point.id, point.vector, point.payload) for point in points)
+    print(f"Loaded pairwise distances for {len(pairwise_distances)} Pokemon")
+
+def ensure_pairwise_distances():
+    """Load the distance matrix on first use"""
+    ensure_loaded(pairwise_distances, load_pairwise_distances)
+
+def publish_pending_artifacts():
+    """Publish shared artifacts with writes still held back (call at shutdown)"""
+    if pairwise_distances.loaded:
+        pairwise_distances.publish_pending()
+
+def load_name_index():
+    """Build the in-memory name index from the roster (call once at startup)"""
+    snapshot = get_roster()
+    name_index.load(zip(snapshot.ids.tolist(), snapshot.pokemon.names))
+    print(f"Loaded {len(name_index)} Pokemon names into the name index")
+
+def load_rank_index():
+    """Build the per-criteria rankings from the roster (call once at startup)"""
+    rank_index.load(get_roster().pokemon)
+    print(f"Loaded {len(rank_index)} Pokemon into the rank index")
+
+def build_archetypes(k=ARCHETYPE_COUNT):
+    """Cluster the roster into k archetypes and store them in the vector store"""
+    points = scroll_all_points(with_vectors=True)
+    archetypes.fit(((point.id, point.vector) for point in points), k)
+    if not len(archetypes):
+        return archetypes.summary()
+
+    store = get_client()
+    store.ensure_collection(ARCHETYPE_COLLECTION, size=6, distance="Euclid")
+    # Ids at or above count are leftovers of an earlier fit with more clusters
+    store.upsert(ARCHETYPE_COLLECTION, [
+        PointStruct(id=archetype, vector=centroid.tolist(), payload={"name": archetypes.label(archetype), "count": len(archetypes)})
+        for archetype, centroid in enumerate(archetypes.centroids())
+    ])
+    for archetype in range(len(archetypes)):
+        store.set_payload(
+            "pokemon_stats",
+            {"archetype": archetype, "archetype_name": archetypes.label(archetype)},
+            archetypes.members(archetype)
+        )
+
+    # Payloads changed under every reader
+    roster.invalidate()
+    print(f"Clustered {len(points)} Pokemon into {len(archetypes)} archetypes")
+    return archetypes.summary()
+
+def load_archetypes():
+    """Load stored archetypes, clustering the roster if none are stored yet"""
+    store = get_client()
+    store.ensure_collection(ARCHETYPE_COLLECTION, size=6, distance="Euclid")
+    centroids, _ = store.scroll(collection_name=ARCHETYPE_COLLECTION, limit=1000, with_payload=True, with_vectors=True)
+    if not centroids:
+        build_archetypes()
+        return
+
+    count = next((point.payload["count"] for point in centroids if point.id == 0), len(centroids))
+    centroids = sorted((point for point in centroids if point.id < count), key=lambda point: point.id)
+    assignments = [
+        (pokemon["id"], pokemon["metadata"]["archetype"])
+        for pokemon in get_roster().pokemon
+        if pokemon["metadata"].get("archetype") is not None
+    ]
+    archetypes.load([point.vector for point in centroids], [point.payload["name"] for point in centroids], assignments)
+    print(f"Loaded {len(archetypes)} archetypes")
+
+def ensure_archetypes():
+    """Load the archetype table on first use"""
+    ensure_loaded(archetypes, load_archetypes)
+
+def get_archetypes():
+    """Every archetype as {id, name, size, centroid}"""
+    ensure_archetypes()
+    return archetypes.summary()
 
 def add_pokemon(pokemon_id, name, stats, metadata=None):
     # Store raw stats without normalization for better similarity matching
@@ -37,282 +335,441 @@ def add_pokemon(pokemon_id, name, stats, metadata=None):
     if metadata:
         payload.update(metadata)
 
+    # New Pokemon join the nearest existing archetype without refitting
+    if archetypes.loaded and len(archetypes):
+        archetype = archetypes.assign(pokemon_id, vector)
+        payload.update({"archetype": archetype, "archetype_name": archetypes.label(archetype)})
+
     point = PointStruct(
         id=pokemon_id,
         vector=vector.tolist(),
         payload=payload
     )
-    client.upsert(collection_name="pokemon_stats", points=[point])
+    get_client().upsert(collection_name="pokemon_stats", points=[point])
+
+    # Keep the local index in sync with the source of truth
+    if similarity_index.loaded:
+        similarity_index.upsert(pokemon_id, vector, payload)
+    if name_index.loaded:
+        name_index.upsert(pokemon_id, name)
+    if rank_index.loaded:
+        rank_index.upsert({"id": pokemon_id, "name": name, "metadata": payload})
+    if pairwise_distances.loaded:
+        pairwise_distances.upsert(pokemon_id, vector, payload)
+    # Readers reload the roster on their next request
+    roster.invalidate()
+
+# Distance at which similarity bottoms out at 0% for each metric; standardized
+# and Mahalanobis distances are in standard deviations rather than stat points
+METRIC_MAX_DISTANCES = {"euclidean": 200, "standardized": 5, "mahalanobis": 5}
+
+def format_similarity_result(distance, payload, metric="euclidean"):
+    """Convert a Euclidean distance hit into the similarity response shape"""
+    # Euclidean distance - lower is better (0 = perfect match)
+    # Convert to similarity percentage
+    # For Pokemon stats, calculate a more intuitive similarity score
+    # Perfect match = 100%, completely different = 0%
+    max_reasonable_distance = METRIC_MAX_DISTANCES[metric]  # Adjusted for better scaling
+    similarity_percentage = max(0, (max_reasonable_distance - distance) / max_reasonable_distance)
+
+    return {
+        "name": payload["name"],
+        "score": similarity_percentage,  # Now represents similarity (higher = more similar)
+        "distance": distance,  # Raw distance for debugging
+        "metadata": payload
+    }
 
-def search_similar(stats, top_k=5):
+def similarity_filter(types=None, abilities=None, min_stats=None, max_stats=None, archetype=None):
+    """Payload filter restricting a similarity search, or None for no restriction"""
+    conditions = []
+    if archetype is not None:
+        conditions.append(FieldCondition(key="archetype", match=MatchValue(value=archetype)))
+    # A Pokemon matches when it has any of the requested types / abilities
+    if types:
+        conditions.append(FieldCondition(key="types", match=MatchAny(any=list(types))))
+    if abilities:
+        conditions.append(FieldCondition(key="abilities", match=MatchAny(any=list(abilities))))
+
+    for position, key in enumerate(STAT_PAYLOAD_KEYS):
+        low = min_stats[position] if min_stats else None
+        high = max_stats[position] if max_stats else None
+        if low is not None or high is not None:
+            conditions.append(FieldCondition(key=f"stats.{key}", range=Range(gte=low, lte=high)))
+
+    return Filter(must=conditions) if conditions else None
+
+def search_similar(stats, top_k=5, query_filter=None, metric="euclidean", archetype=None):
     # Use raw stats for search
     query_vector = np.array(stats, dtype=float)
-    results = client.search(collection_name="pokemon_stats", query_vector=query_vector.tolist(), limit=top_k)
 
-    # Convert Euclidean distance to similarity percentage
-    formatted_results = []
-    for res in results:
-        # Euclidean distance - lower is better (0 = perfect match)
-        distance = res.score
+    # Standardized and Mahalanobis columns only exist in the in-memory index
+    if metric != "euclidean":
+        ensure_similarity_index()
+        return search_metric_index(query_vector, top_k, metric)
 
-        # Convert to similarity percentage
-        # For Pokemon stats, calculate a more intuitive similarity score
-        # Perfect match = 100%, completely different = 0%
-        max_reasonable_distance = 200  # Adjusted for better scaling
-        similarity_percentage = max(0, (max_reasonable_distance - distance) / max_reasonable_distance)
+    # One archetype on its own only needs a pass over that cluster's members
+    if archetype is not None:
+        if similarity_index.loaded and archetypes.loaded and query_filter is None:
+            return search_archetype_index(query_vector, archetype, top_k)
+        query_filter = with_archetype(query_filter, archetype)
 
-        formatted_results.append({
-            "name": res.payload["name"],
-            "score": similarity_percentage,  # Now represents similarity (higher = more similar)
-            "distance": distance,  # Raw distance for debugging
-            "metadata": res.payload
-        })
+    # Answer unfiltered searches from the in-memory index when it has been loaded
+    if similarity_index.loaded and query_filter is None:
+        return [format_similarity_result(distance, payload) for _, distance, payload in similarity_index.search(query_vector, top_k)]
 
-    return formatted_results
+    # Filters are applied by the store during the search, backed by payload indexes
+    results = get_client().search(collection_name="pokemon_stats", query_vector=query_vector.tolist(), limit=top_k, query_filter=query_filter)
+    return [format_similarity_result(res.score, res.payload) for res in results]
 
-def search_pokemon_by_name(name, limit=10):
-    """Search Pokemon by name using simple text matching"""
-    # Get all Pokemon and filter by name on the client side
-    all_results = client.scroll(
+async def search_similar_async(stats, top_k=5, query_filter=None, metric="euclidean", archetype=None):
+    """Non-blocking search_similar for async request handlers"""
+    query_vector = np.array(stats, dtype=float)
+
+    if metric != "euclidean":
+        await asyncio.to_thread(ensure_similarity_index)
+        return search_metric_index(query_vector, top_k, metric)
+
+    if archetype is not None:
+        if similarity_index.loaded and archetypes.loaded and query_filter is None:
+            return search_archetype_index(query_vector, archetype, top_k)
+        query_filter = with_archetype(query_filter, archetype)
+
+    if similarity_index.loaded and query_filter is None:
+        return [format_similarity_result(distance, payload) for _, distance, payload in similarity_index.search(query_vector, top_k)]
+
+    results = await get_async_client().search(collection_name="pokemon_stats", query_vector=query_vector.tolist(), limit=top_k, query_filter=query_filter)
+    return [format_similarity_result(res.score, res.payload) for res in results]
+
+def ensure_similarity_index():
+    """Load the in-memory index on first use by searches that only it can answer"""
+    ensure_loaded(similarity_index, load_similarity_index)
+
+def with_archetype(query_filter, archetype):
+    """Add an archetype restriction to a similarity filter"""
+    conditions = list(query_filter.must) if query_filter is not None else []
+    return Filter(must=conditions + similarity_filter(archetype=archetype).must)
+
+def search_archetype_index(query_vector, archetype, top_k):
+    """k-NN over one archetype's members in the in-memory index"""
+    return [
+        format_similarity_result(distance, payload)
+        for _, distance, payload in similarity_index.search_subset(query_vector, archetypes.members(archetype), top_k)
+    ]
+
+def search_metric_index(query_vector, top_k, metric):
+    """Standardized or Mahalanobis k-NN from the in-memory index"""
+    return [
+        format_similarity_result(distance, payload, metric)
+        for _, distance, payload in similarity_index.search(query_vector, top_k, metric)
+    ]
+
+# Stat points charged per log2 step of type-matchup difference in hybrid search
+HYBRID_TYPE_WEIGHT = 20
+
+def search_similar_hybrid(stats, query_types, type_weight=HYBRID_TYPE_WEIGHT, top_k=5):
+    """Similar Pokemon by stats and type matchups, fused with type_weight"""
+    ensure_similarity_index()
+    return [
+        format_similarity_result(distance, payload)
+        for _, distance, payload in similarity_index.search_hybrid(np.array(stats, dtype=float), query_types, type_weight, top_k)
+    ]
+
+def get_archetype_members(archetype, limit=100):
+    """Roster entries in one archetype, in id order"""
+    ensure_archetypes()
+    snapshot = get_roster()
+    positions = (snapshot.pokemon.position(pokemon_id) for pokemon_id in archetypes.members(archetype))
+    return snapshot.pokemon.view(sorted(position for position in positions if position is not None))[:limit]
+
+def get_pokemon_neighbours(pokemon_id, k=5):
+    """(nearest, farthest) k Pokemon by stat distance, or None if the id is unknown"""
+    ensure_pairwise_distances()
+    found = pairwise_distances.neighbours(pokemon_id, k)
+    if found is None:
+        return None
+    nearest, farthest = found
+    return (
+        [format_similarity_result(distance, payload) for _, distance, payload in nearest],
+        [format_similarity_result(distance, payload) for _, distance, payload in farthest]
+    )
+
+def get_unique_pokemon(limit=10, most_unique=True):
+    """Pokemon ranked by mean stat distance to their nearest neighbours"""
+    ensure_pairwise_distances()
+    return [
+        {"id": pokemon_id, "name": payload.get("name", "Unknown"), "uniqueness": score, "metadata": payload}
+        for pokemon_id, score, payload in pairwise_distances.uniqueness(limit, most_unique)
+    ]
+
+def get_closest_pairs(limit=10):
+    """The most similar pairs of Pokemon in the roster, closest first"""
+    ensure_pairwise_distances()
+    return [
+        {
+            "distance": distance,
+            "pokemon": [{"id": pokemon_id, "name": payload.get("name", "Unknown")} for pokemon_id, payload in pair]
+        }
+        for distance, *pair in pairwise_distances.closest_pairs(limit)
+    ]
+
+def search_similar_batch(stats_list, top_k=5):
+    """Top-k similar Pokemon for many stat vectors, one result list per query"""
+    query_vectors = np.array(stats_list, dtype=float)
+
+    # One matrix-vs-matrix distance pass over the in-memory index
+    if similarity_index.loaded:
+        return [
+            [format_similarity_result(distance, payload) for _, distance, payload in hits]
+            for hits in similarity_index.search_batch(query_vectors, top_k)
+        ]
+
+    # Otherwise a single round-trip for the whole batch
+    batch_results = get_client().search_batch(collection_name="pokemon_stats", query_vectors=query_vectors.tolist(), limit=top_k)
+    return [[format_similarity_result(res.score, res.payload) for res in results] for results in batch_results]
+
+def search_similar_radius(stats, radius, limit=100, query_filter=None):
+    """Find every Pokemon within a Euclidean stat distance, closest first"""
+    query_vector = np.array(stats, dtype=float)
+
+    if similarity_index.loaded and query_filter is None:
+        return [format_similarity_result(distance, payload) for _, distance, payload in similarity_index.radius_search(query_vector, radius, limit)]
+
+    # Qdrant applies score_threshold as a maximum distance for Euclid collections
+    results = get_client().search(
         collection_name="pokemon_stats",
-        limit=1000,  # Get a large number to search through
+        query_vector=query_vector.tolist(),
+        limit=limit,
+        score_threshold=radius,
+        query_filter=query_filter
+    )
+    return [format_similarity_result(res.score, res.payload) for res in results]
+
+def search_stat_box(min_stats, max_stats, limit=100, types=None, abilities=None, archetype=None):
+    """Find every Pokemon whose stats all fall inside [min_stats, max_stats]"""
+    if similarity_index.loaded and not types and not abilities and archetype is None:
+        return [
+            {"id": pokemon_id, "name": payload.get("name", "Unknown"), "metadata": payload}
+            for pokemon_id, payload in similarity_index.box_search(min_stats, max_stats, limit)
+        ]
+
+    # Fall back to payload range filters on the stored stats
+    points, _ = get_client().scroll(
+        collection_name="pokemon_stats",
+        scroll_filter=similarity_filter(types, abilities, min_stats, max_stats, archetype),
+        limit=limit,
         with_payload=True,
         with_vectors=False
     )
+    return [{"id": point.id, "name": point.payload.get("name", "Unknown"), "metadata": point.payload} for point in points]
 
-    # Filter results by name (case-insensitive partial matching)
-    name_lower = name.lower()
-    filtered_results = []
-
-    for point in all_results[0]:
-        pokemon_name = point.payload.get("name", "").lower()
-        if name_lower in pokemon_name:
-            filtered_results.append({
-                "id": point.id,
-                "name": point.payload["name"],
-                "metadata": point.payload
-            })
-            if len(filtered_results) >= limit:
-                break
+def search_name_index(name, limit, rows):
+    """Ranked matches from the in-memory name index, as rows from an id -> roster entry mapping"""
+    return [
+        {**rows[pokemon_id], "match": match}
+        for pokemon_id, _, match in name_index.search(name, limit)
+        if pokemon_id in rows
+    ]
 
-    return filtered_results
+def search_pokemon_by_name(name, limit=10):
+    """Search Pokemon by name using simple text matching"""
+    # Ranked prefix / word-start / substring matches without touching Qdrant
+    snapshot = get_roster()
+    if name_index.loaded:
+        return search_name_index(name, limit, snapshot.by_id)
+
+    # Filter the roster snapshot by name
+    return snapshot.pokemon.filter_by_name(name, limit)
+
+async def search_pokemon_by_name_async(name, limit=10):
+    """Non-blocking search_pokemon_by_name for async request handlers"""
+    snapshot = await get_roster_async()
+    if name_index.loaded:
+        return search_name_index(name, limit, snapshot.by_id)
+
+    return snapshot.pokemon.filter_by_name(name, limit)
+
+def fuzzy_results(index, name, max_distance, limit, rows):
+    """Edit-distance ranked matches from a name index, as rows from an id -> roster entry mapping"""
+    return [
+        {**rows[pokemon_id], "distance": distance}
+        for pokemon_id, _, distance in index.fuzzy_search(name, max_distance, limit)
+        if pokemon_id in rows
+    ]
+
+def fuzzy_search_pokemon_by_name(name, max_distance=2, limit=10):
+    """Typo-tolerant name search ranked by edit distance"""
+    snapshot = get_roster()
+    if name_index.loaded:
+        return fuzzy_results(name_index, name, max_distance, limit, snapshot.by_id)
+
+    # Index not loaded yet: build a temporary one from the roster
+    index = NameIndex()
+    index.load(zip(snapshot.ids.tolist(), snapshot.pokemon.names))
+    return fuzzy_results(index, name, max_distance, limit, snapshot.by_id)
 
 def get_all_pokemon(limit=1000):
     """Get all Pokemon in the database"""
-    results = client.scroll(
+    return get_roster().pokemon[:limit]
+
+async def get_all_pokemon_async(limit=1000):
+    """Non-blocking get_all_pokemon for async request handlers"""
+    snapshot = await get_roster_async()
+    return snapshot.pokemon[:limit]
+
+def get_pokemon_page(limit=100, offset=None):
+    """One page of the roster in id order as (pokemon, next_page_offset)"""
+    snapshot = roster.current()
+    if snapshot is not None:
+        return snapshot.page(offset, limit)
+
+    # No current snapshot: forward the offset to a single Qdrant scroll page
+    points, next_offset = get_client().scroll(
         collection_name="pokemon_stats",
         limit=limit,
+        offset=offset,
         with_payload=True,
         with_vectors=False
     )
+    return [roster_entry(point) for point in points], next_offset
 
-    return [{"id": point.id, "name": point.payload["name"], "metadata": point.payload} for point in results[0]]
-
-def calculate_pokemon_power_score(pokemon):
-    """Calculate a weighted power score for a Pokemon"""
-    # Check if Pokemon has proper stats structure
-    if 'metadata' not in pokemon or 'stats' not in pokemon['metadata']:
-        return 0.0  # Return 0 for Pokemon without proper stats
-
-    stats = pokemon['metadata']['stats']
-
-    # Check if all required stat keys exist
-    required_stats = ['hp', 'attack', 'defense', 'special_attack', 'special_defense', 'speed']
-    for stat_key in required_stats:
-        if stat_key not in stats:
-            return 0.0  # Return 0 for Pokemon with incomplete stats
-
-    # Weight offensive stats higher as they're generally more valuable
-    stat_weights = {
-        'hp': 1.0,
-        'attack': 1.2,
-        'defense': 1.0,
-        'special_attack': 1.2,
-        'special_defense': 1.0,
-        'speed': 1.1
-    }
+async def get_pokemon_page_async(limit=100, offset=None):
+    """Non-blocking get_pokemon_page for async request handlers"""
+    snapshot = roster.current()
+    if snapshot is not None:
+        return snapshot.page(offset, limit)
 
-    score = (
-        stats['hp'] * stat_weights['hp'] +
-        stats['attack'] * stat_weights['attack'] +
-        stats['defense'] * stat_weights['defense'] +
-        stats['special_attack'] * stat_weights['special_attack'] +
-        stats['special_defense'] * stat_weights['special_defense'] +
-        stats['speed'] * stat_weights['speed']
+    points, next_offset = await get_async_client().scroll(
+        collection_name="pokemon_stats",
+        limit=limit,
+        offset=offset,
+        with_payload=True,
+        with_vectors=False
     )
-    return round(score, 2)
+    return [roster_entry(point) for point in points], next_offset
+
+async def iter_pokemon_async(offset=None, page_size=256):
+    """Yield roster entries lazily, one page in memory at a time"""
+    while True:
+        page, offset = await get_pokemon_page_async(page_size, offset)
+        for pokemon in page:
+            yield pokemon
+        if offset is None:
+            return
 
 def get_top_pokemon(criteria='power', limit=10):
     """Get top Pokemon by different criteria"""
-    all_pokemon = get_all_pokemon(1000)
-
+    if rank_index.loaded:
+        return rank_index.top(get_roster().by_id, criteria, limit)
+    return rank_pokemon(get_all_pokemon(1000), criteria, limit)
+
+async def get_top_pokemon_async(criteria='power', limit=10):
+    """Non-blocking get_top_pokemon for async request handlers"""
+    if rank_index.loaded:
+        return rank_index.top((await get_roster_async()).by_id, criteria, limit)
+    return rank_pokemon(await get_all_pokemon_async(1000), criteria, limit)
+
+def get_pokemon_rank(pokemon_id, criteria='power'):
+    """1-based (rank, ranked entry) of a Pokemon under a criteria, or None"""
+    if rank_index.loaded:
+        return rank_index.rank(get_roster().by_id, pokemon_id, criteria)
+
+    # Without the index, score the roster once
+    snapshot = get_roster()
+    for position, pokemon in enumerate(rank_pokemon(snapshot.pokemon, criteria, len(snapshot)), 1):
+        if pokemon['id'] == pokemon_id:
+            return position, pokemon
+    return None
+
+def rank_pokemon_by_weights(weights, constraints=(), limit=10):
+    """Top Pokemon by a custom per-stat weighting, as (results, matching count)"""
+    entries, matrix = get_roster().stat_matrix()
+    return weighted_ranking(entries, matrix, weights, constraints, limit)
+
+async def rank_pokemon_by_weights_async(weights, constraints=(), limit=10):
+    """Non-blocking rank_pokemon_by_weights for async request handlers"""
+    entries, matrix = (await get_roster_async()).stat_matrix()
+    return weighted_ranking(entries, matrix, weights, constraints, limit)
+
+def rank_pokemon(all_pokemon, criteria='power', limit=10):
+    """Score and sort Pokemon by a ranking criteria"""
     pokemon_with_scores = []
 
     for pokemon in all_pokemon:
-        # Skip Pokemon without proper stats structure
-        if 'metadata' not in pokemon or 'stats' not in pokemon['metadata']:
-            continue
-
-        stats = pokemon['metadata']['stats']
-
-        # Check if all required stat keys exist
-        required_stats = ['hp', 'attack', 'defense', 'special_attack', 'special_defense', 'speed']
-        if not all(stat_key in stats for stat_key in required_stats):
+        # Skip Pokemon without proper or complete stats
+        stats = ranked_stats(pokemon)
+        if stats is None:
             continue
-
-        if criteria == 'power':
-            score = calculate_pokemon_power_score(pokemon)
-        elif criteria == 'total':
-            score = sum(stats.values())
-        elif criteria == 'offensive':
-            score = stats['attack'] + stats['special_attack'] + (stats['speed'] * 0.5)
-        elif criteria == 'defensive':
-            score = stats['hp'] + stats['defense'] + stats['special_defense']
-        elif criteria == 'speed':
-            score = stats['speed']
-        else:
-            score = calculate_pokemon_power_score(pokemon)
-
-        pokemon_with_scores.append({
-            **pokemon,
-            'power_score': calculate_pokemon_power_score(pokemon),
-            'total_stats': sum(stats.values()),
-            'ranking_score': score
-        })
+        pokemon_with_scores.append(ranked_entry(pokemon, stats, criteria))
 
     # Sort by ranking score (descending)
     pokemon_with_scores.sort(key=lambda x: x['ranking_score'], reverse=True)
 
     return pokemon_with_scores[:limit]
 
+def load_move_index():
+    """Build the move search index from the move table"""
+    from battle_service import MOVE_DATABASE
+
+    move_index.load(MOVE_DATABASE.values())
+    print(f"Loaded {len(move_index)} moves into the move index")
+
+def ensure_move_index():
+    """Build the move index on first use"""
+    ensure_loaded(move_index, load_move_index)
+
+def load_move_vectors():
+    """Encode the move table into the move feature matrix"""
+    from battle_service import MOVE_DATABASE
+
+    move_vectors.load(MOVE_DATABASE.values())
+    print(f"Loaded {len(move_vectors)} move vectors")
+
+def ensure_move_vectors():
+    """Build the move feature matrix on first use"""
+    ensure_loaded(move_vectors, load_move_vectors)
+
+def sync_move_collection():
+    """Mirror the move feature matrix into the moves collection"""
+    ensure_move_vectors()
+    store = get_client()
+    store.ensure_collection(MOVE_COLLECTION, size=MOVE_VECTOR_SIZE, distance="Euclid")
+    store.upsert(MOVE_COLLECTION, [
+        PointStruct(id=position, vector=vector.tolist(), payload=move)
+        for position, vector, move in move_vectors.points()
+    ])
+    print(f"Synced {len(move_vectors)} moves to the '{MOVE_COLLECTION}' collection")
+
 def search_moves(query, limit=20):
-    """Search for Pokemon moves using vector similarity"""
+    """Search for Pokemon moves by feature vector, falling back to keywords for names"""
     try:
-        # For now, return mock data since we haven't populated move data yet
-        # This will be replaced with actual vector search once we populate the database
-
-        from battle_service import MOVE_DATABASE
-
-        # Simple text matching for now - will be replaced with vector search
-        query_lower = query.lower()
-        matching_moves = []
-
-        for move_key, move_data in MOVE_DATABASE.items():
-            score = 0
-            max_possible_score = 10  # For better normalization
-
-            # Create comprehensive move text for matching
-            move_text = f"{move_data['name']} {move_data['type']} {move_data['category']}".lower()
-            if move_data.get('effect'):
-                move_text += f" {move_data['effect']}"
-
-            # Keyword matching with different weights
-            query_words = query_lower.split()
-            for word in query_words:
-                # Exact name matches (highest priority)
-                if word in move_data['name'].lower():
-                    score += 3
-                # Type matches
-                elif word == move_data['type']:
-                    score += 2
-                # Category matches
-                elif word == move_data['category']:
-                    score += 2
-                # Effect matches
-                elif move_data.get('effect') and word in move_data['effect']:
-                    score += 2
-                # General text matches
-                elif word in move_text:
-                    score += 1
-
-            # Power-based matching (more specific)
-            if any(word in query_lower for word in ['powerful', 'strong', 'high damage', 'devastating']):
-                if move_data['power'] and move_data['power'] >= 120:
-                    score += 4
-                elif move_data['power'] and move_data['power'] >= 100:
-                    score += 3
-                elif move_data['power'] and move_data['power'] >= 80:
-                    score += 1
-
-            # Critical hit matching
-            if any(word in query_lower for word in ['critical', 'crit', 'high crit']):
-                if move_data.get('crit_ratio', 1) > 1:
-                    score += 4  # High score for actual high-crit moves
-
-            # Accuracy matching (fixed logic)
-            if any(word in query_lower for word in ['accurate', 'reliable', 'sure hit']):
-                if move_data['accuracy'] >= 95:
-                    score += 2
-            if any(word in query_lower for word in ['miss', 'unreliable', 'low accuracy', 'inaccurate']):
-                if move_data['accuracy'] <= 80:
-                    score += 3
-
-            # Status effect matching (more comprehensive)
-            status_keywords = {
-                'paralysis': ['paralysis', 'paralyze', 'thunder wave'],
-                'burn': ['burn', 'fire'],
-                'freeze': ['freeze', 'ice'],
-                'poison': ['poison', 'toxic'],
-                'sleep': ['sleep'],
-                'confusion': ['confusion', 'confuse'],
-                'flinch': ['flinch']
-            }
-
-            for effect, keywords in status_keywords.items():
-                if any(keyword in query_lower for keyword in keywords):
-                    if move_data.get('effect') == effect:
-                        score += 3
-
-            # Category-specific matching
-            if 'physical' in query_lower and move_data['category'] == 'physical':
-                score += 2
-            if any(word in query_lower for word in ['special', 'ranged', 'projectile']) and move_data['category'] == 'special':
-                score += 2
-            if 'status' in query_lower and move_data['category'] == 'status':
-                score += 2
-
-            if score > 0:
-                matching_moves.append({
-                    'name': move_data['name'],
-                    'type': move_data['type'],
-                    'category': move_data['category'],
-                    'power': move_data['power'],
-                    'accuracy': move_data['accuracy'],
-                    'effect': move_data.get('effect'),
-                    'crit_ratio': move_data.get('crit_ratio', 1),
-                    'similarity': min(score / max_possible_score, 1.0),  # Better normalization
-                    'description': f"A {move_data['category']} {move_data['type']}-type move" +
-                                 (f" with {move_data['power']} power" if move_data['power'] else "") +
-                                 (f" and {move_data['accuracy']}% accuracy" if move_data['accuracy'] else "") +
-                                 (f". Has a chance to cause {move_data['effect']}" if move_data.get('effect') else "") +
-                                 (f". High critical hit ratio" if move_data.get('crit_ratio', 1) > 1 else "") + "."
-                })
-
-        # Sort by similarity score and limit results
-        matching_moves.sort(key=lambda x: x['similarity'], reverse=True)
-        return matching_moves[:limit]
+        # Queries naming types, categories, power, accuracy, crit or effects become a target vector
+        ensure_move_vectors()
+        results = move_vectors.search(query, limit)
+        if results:
+            return results
+
+        ensure_move_index()
+        return move_index.search(query, limit)
 
     except Exception as e:
         print(f"Error searching moves: {e}")
         return []
 
+def search_similar_moves(move_name, limit=10):
+    """Moves nearest to a move in feature space, or None if the move is unknown"""
+    ensure_move_vectors()
+    return move_vectors.similar(move_name, limit)
+
 def get_move_details(move_name):
     """Get detailed information about a specific move"""
     try:
-        from battle_service import MOVE_DATABASE
-
         # Find move in database (case-insensitive)
-        move_key = None
-        for key, move_data in MOVE_DATABASE.items():
-            if move_data['name'].lower() == move_name.lower():
-                move_key = key
-                break
+        ensure_move_index()
+        move_data = move_index.get(move_name)
 
-        if not move_key:
+        if not move_data:
             return None
 
-        move_data = MOVE_DATABASE[move_key]
-
         # Get Pokemon that can learn this move (mock data for now)
         learners = [
             {'name': 'Pikachu', 'sprite_url': 'https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/25.png'},
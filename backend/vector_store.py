@@ -0,0 +1,376 @@
+"""
+Vector store backends for the Pokemon collections.
+
+vector_service talks to a VectorStore rather than a QdrantClient directly, so the
+same code runs against Qdrant Cloud, an embedded Qdrant (":memory:" or a local
+path) or a pure NumPy store persisted to one .npz file. Method names and
+keyword arguments follow the classic QdrantClient API so call sites read the
+same whichever backend is configured. Async stores expose the read methods as
+coroutines for the async request path.
+"""
+
+import json
+import os
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+import numpy as np
+from qdrant_client.models import VectorParams, QueryRequest
+
+class StoredPoint:
+    """Point returned by the NumPy store (same attributes as Qdrant records)"""
+    __slots__ = ("id", "payload", "vector", "score")
+
+    def __init__(self, id, payload, vector=None, score=None):
+        self.id = id
+        self.payload = payload
+        self.vector = vector
+        self.score = score
+
+class VectorStore(ABC):
+    """Operations vector_service needs from a backend"""
+
+    @abstractmethod
+    def ensure_collection(self, collection_name, size, distance="Euclid"):
+        """Create the collection if it does not exist yet"""
+
+    @abstractmethod
+    def create_payload_index(self, collection_name, field_name, field_schema):
+        """Index a payload field so filtered searches stay fast (idempotent)"""
+
+    @abstractmethod
+    def upsert(self, collection_name, points):
+        """Insert or replace PointStruct points"""
+
+    @abstractmethod
+    def set_payload(self, collection_name, payload, points):
+        """Merge payload fields into existing points by id"""
+
+    @abstractmethod
+    def search(self, collection_name, query_vector, limit=10, score_threshold=None, query_filter=None):
+        """Nearest points to one vector, best first"""
+
+    @abstractmethod
+    def search_batch(self, collection_name, query_vectors, limit=10):
+        """Nearest points for many vectors, one result list per vector"""
+
+    @abstractmethod
+    def scroll(self, collection_name, limit=256, offset=None, with_payload=True, with_vectors=False, scroll_filter=None):
+        """One page of points in id order as (points, next_page_offset)"""
+
+    @abstractmethod
+    def retrieve(self, collection_name, ids, with_vectors=False):
+        """Points by id (unknown ids are skipped)"""
+
+class QdrantVectorStore(VectorStore):
+    """Qdrant backend, remote (url) or embedded (":memory:" / local path)"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def ensure_collection(self, collection_name, size, distance="Euclid"):
+        try:
+            self.client.get_collection(collection_name)
+            print(f"Collection '{collection_name}' already exists")
+        except Exception:
+            print(f"Creating collection '{collection_name}'")
+            self.client.create_collection(
+                collection_name=collection_name,
+                vectors_config=VectorParams(size=size, distance=distance)
+            )
+
+    def create_payload_index(self, collection_name, field_name, field_schema):
+        self.client.create_payload_index(collection_name=collection_name, field_name=field_name, field_schema=field_schema)
+
+    def upsert(self, collection_name, points):
+        self.client.upsert(collection_name=collection_name, points=points)
+
+    def set_payload(self, collection_name, payload, points):
+        self.client.set_payload(collection_name=collection_name, payload=payload, points=list(points))
+
+    def search(self, collection_name, query_vector, limit=10, score_threshold=None, query_filter=None):
+        # For Euclid collections score_threshold is a maximum distance
+        return self.client.query_points(
+            collection_name=collection_name,
+            query=list(query_vector),
+            limit=limit,
+            score_threshold=score_threshold,
+            query_filter=query_filter,
+            with_payload=True
+        ).points
+
+    def search_batch(self, collection_name, query_vectors, limit=10):
+        requests = [QueryRequest(query=list(vector), limit=limit, with_payload=True) for vector in query_vectors]
+        responses = self.client.query_batch_points(collection_name=collection_name, requests=requests)
+        return [response.points for response in responses]
+
+    def scroll(self, collection_name, limit=256, offset=None, with_payload=True, with_vectors=False, scroll_filter=None):
+        return self.client.scroll(
+            collection_name=collection_name,
+            scroll_filter=scroll_filter,
+            limit=limit,
+            offset=offset,
+            with_payload=with_payload,
+            with_vectors=with_vectors
+        )
+
+    def retrieve(self, collection_name, ids, with_vectors=False):
+        return self.client.retrieve(collection_name=collection_name, ids=list(ids), with_payload=True, with_vectors=with_vectors)
+
+class AsyncQdrantVectorStore:
+    """Non-blocking reads against remote Qdrant through AsyncQdrantClient"""
+
+    def __init__(self, client):
+        self.client = client
+
+    async def search(self, collection_name, query_vector, limit=10, score_threshold=None, query_filter=None):
+        response = await self.client.query_points(
+            collection_name=collection_name,
+            query=list(query_vector),
+            limit=limit,
+            score_threshold=score_threshold,
+            query_filter=query_filter,
+            with_payload=True
+        )
+        return response.points
+
+    async def scroll(self, collection_name, limit=256, offset=None, with_payload=True, with_vectors=False, scroll_filter=None):
+        return await self.client.scroll(
+            collection_name=collection_name,
+            scroll_filter=scroll_filter,
+            limit=limit,
+            offset=offset,
+            with_payload=with_payload,
+            with_vectors=with_vectors
+        )
+
+    async def close(self):
+        await self.client.close()
+
+class AsyncStoreAdapter:
+    """Async facade over an in-process store (NumPy or embedded Qdrant)"""
+
+    def __init__(self, store):
+        # Shares the synchronous store so both paths see the same data
+        self.store = store
+
+    async def search(self, collection_name, query_vector, limit=10, score_threshold=None, query_filter=None):
+        return self.store.search(collection_name, query_vector, limit, score_threshold, query_filter)
+
+    async def scroll(self, collection_name, limit=256, offset=None, with_payload=True, with_vectors=False, scroll_filter=None):
+        return self.store.scroll(collection_name, limit, offset, with_payload, with_vectors, scroll_filter)
+
+    async def close(self):
+        pass
+
+def payload_value(payload, key):
+    """Look up a dotted payload key such as 'stats.speed'"""
+    value = payload
+    for part in key.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+def condition_matches(payload, condition):
+    """Evaluate one FieldCondition (match value/any or range) or nested Filter"""
+    if hasattr(condition, "must") or hasattr(condition, "should"):
+        return filter_matches(payload, condition)
+
+    value = payload_value(payload, condition.key)
+    # Array payloads match when any element does, as in Qdrant
+    values = value if isinstance(value, list) else [value]
+    values = [v for v in values if v is not None]
+
+    if condition.match is not None:
+        if getattr(condition.match, "any", None) is not None:
+            return any(v in condition.match.any for v in values)
+        return any(v == condition.match.value for v in values)
+
+    if condition.range is not None:
+        bounds = condition.range
+        return any(
+            (bounds.gt is None or v > bounds.gt) and (bounds.gte is None or v >= bounds.gte) and
+            (bounds.lt is None or v < bounds.lt) and (bounds.lte is None or v <= bounds.lte)
+            for v in values
+        )
+
+    return False
+
+def filter_matches(payload, query_filter):
+    """Evaluate a qdrant Filter (must / should / must_not) against a payload"""
+    if query_filter is None:
+        return True
+    if query_filter.must and not all(condition_matches(payload, c) for c in query_filter.must):
+        return False
+    if query_filter.should and not any(condition_matches(payload, c) for c in query_filter.should):
+        return False
+    if query_filter.must_not and any(condition_matches(payload, c) for c in query_filter.must_not):
+        return False
+    return True
+
+class NumpyVectorStore(VectorStore):
+    """Pure NumPy backend, optionally persisted to a single .npz file"""
+
+    def __init__(self, path=None):
+        self.path = path
+        # name -> (ids, vectors, payloads, distance), swapped as one tuple per write
+        self._collections = {}
+        self._write_lock = threading.Lock()
+        if path and os.path.exists(path):
+            self._load()
+
+    def ensure_collection(self, collection_name, size, distance="Euclid"):
+        with self._write_lock:
+            if collection_name in self._collections:
+                print(f"Collection '{collection_name}' already exists")
+                return
+            print(f"Creating collection '{collection_name}'")
+            self._collections[collection_name] = (np.empty(0, dtype=np.int64), np.empty((0, size), dtype=np.float32), [], distance)
+            self._save()
+
+    def create_payload_index(self, collection_name, field_name, field_schema):
+        # Filters are evaluated against every payload, so there is nothing to build
+        self._collection(collection_name)
+
+    def _collection(self, collection_name):
+        if collection_name not in self._collections:
+            raise ValueError(f"Collection '{collection_name}' does not exist")
+        return self._collections[collection_name]
+
+    def upsert(self, collection_name, points):
+        with self._write_lock:
+            ids, vectors, payloads, distance = self._collection(collection_name)
+            ids, vectors, payloads = list(ids), list(vectors), list(payloads)
+            positions = {pokemon_id: position for position, pokemon_id in enumerate(ids)}
+
+            for point in points:
+                vector = np.asarray(point.vector, dtype=np.float32)
+                if point.id in positions:
+                    vectors[positions[point.id]] = vector
+                    payloads[positions[point.id]] = point.payload or {}
+                else:
+                    positions[point.id] = len(ids)
+                    ids.append(point.id)
+                    vectors.append(vector)
+                    payloads.append(point.payload or {})
+
+            # Keep id order so scroll pages are stable
+            order = np.argsort(ids, kind='stable')
+            size = self._collections[collection_name][1].shape[1]
+            self._collections[collection_name] = (
+                np.array(ids, dtype=np.int64)[order],
+                np.array(vectors, dtype=np.float32).reshape(len(ids), size)[order],
+                [payloads[i] for i in order],
+                distance
+            )
+            self._save()
+
+    def set_payload(self, collection_name, payload, points):
+        with self._write_lock:
+            ids, vectors, payloads, distance = self._collection(collection_name)
+            targets = set(points)
+            payloads = [
+                {**point_payload, **payload} if pokemon_id in targets else point_payload
+                for pokemon_id, point_payload in zip(ids.tolist(), payloads)
+            ]
+            self._collections[collection_name] = (ids, vectors, payloads, distance)
+            self._save()
+
+    def _scores(self, vectors, distance, query_vectors):
+        """(queries, points) score matrix and whether lower scores are better"""
+        query_vectors = np.asarray(query_vectors, dtype=np.float64)
+        vectors = vectors.astype(np.float64)
+        if distance == "Euclid":
+            squared = (query_vectors ** 2).sum(axis=1)[:, None] + (vectors ** 2).sum(axis=1)[None, :] - 2.0 * query_vectors @ vectors.T
+            return np.sqrt(np.maximum(squared, 0.0)), True
+        if distance == "Cosine":
+            query_vectors = query_vectors / np.maximum(np.linalg.norm(query_vectors, axis=1, keepdims=True), 1e-12)
+            vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return query_vectors @ vectors.T, False
+
+    def _ranked(self, collection_name, query_vectors, limit, score_threshold=None, query_filter=None):
+        ids, vectors, payloads, distance = self._collection(collection_name)
+        if query_filter is not None:
+            allowed = np.array([filter_matches(payload, query_filter) for payload in payloads], dtype=bool)
+        else:
+            allowed = np.ones(len(ids), dtype=bool)
+
+        scores, ascending = self._scores(vectors, distance, query_vectors)
+        results = []
+        for row in scores:
+            candidates = np.flatnonzero(allowed)
+            if score_threshold is not None:
+                keep = row[candidates] <= score_threshold if ascending else row[candidates] >= score_threshold
+                candidates = candidates[keep]
+            order = np.argsort(row[candidates] if ascending else -row[candidates], kind='stable')[:limit]
+            results.append([StoredPoint(int(ids[i]), payloads[i], score=float(row[i])) for i in candidates[order]])
+        return results
+
+    def search(self, collection_name, query_vector, limit=10, score_threshold=None, query_filter=None):
+        return self._ranked(collection_name, [query_vector], limit, score_threshold, query_filter)[0]
+
+    def search_batch(self, collection_name, query_vectors, limit=10):
+        return self._ranked(collection_name, query_vectors, limit)
+
+    def scroll(self, collection_name, limit=256, offset=None, with_payload=True, with_vectors=False, scroll_filter=None):
+        ids, vectors, payloads, _ = self._collection(collection_name)
+        # The offset is the first id of the page, as in Qdrant
+        start = 0 if offset is None else int(np.searchsorted(ids, offset))
+
+        page = []
+        position = start
+        while position < len(ids) and len(page) < limit:
+            if filter_matches(payloads[position], scroll_filter):
+                page.append(StoredPoint(
+                    int(ids[position]),
+                    payloads[position] if with_payload else None,
+                    vectors[position].tolist() if with_vectors else None
+                ))
+            position += 1
+
+        # Skip ahead to the next matching point so an exhausted scroll returns None
+        while position < len(ids) and not filter_matches(payloads[position], scroll_filter):
+            position += 1
+        next_offset = int(ids[position]) if position < len(ids) else None
+        return page, next_offset
+
+    def retrieve(self, collection_name, ids, with_vectors=False):
+        stored_ids, vectors, payloads, _ = self._collection(collection_name)
+        positions = {pokemon_id: position for position, pokemon_id in enumerate(stored_ids.tolist())}
+        return [
+            StoredPoint(pokemon_id, payloads[positions[pokemon_id]], vectors[positions[pokemon_id]].tolist() if with_vectors else None)
+            for pokemon_id in ids if pokemon_id in positions
+        ]
+
+    def _save(self):
+        """Atomically write every collection to the .npz file (caller holds the lock)"""
+        if not self.path:
+            return
+
+        arrays = {}
+        manifest = {}
+        for index, (name, (ids, vectors, payloads, distance)) in enumerate(self._collections.items()):
+            manifest[name] = {"key": str(index), "distance": distance, "size": vectors.shape[1]}
+            arrays[f"ids_{index}"] = ids
+            arrays[f"vectors_{index}"] = vectors
+            arrays[f"payloads_{index}"] = np.array(json.dumps(payloads))
+        arrays["manifest"] = np.array(json.dumps(manifest))
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        handle, staging_path = tempfile.mkstemp(dir=directory, suffix=".npz")
+        with os.fdopen(handle, "wb") as staging:
+            np.savez(staging, **arrays)
+        os.replace(staging_path, self.path)
+
+    def _load(self):
+        """Read every collection from the .npz file"""
+        with np.load(self.path, allow_pickle=False) as data:
+            manifest = json.loads(str(data["manifest"]))
+            for name, entry in manifest.items():
+                key = entry["key"]
+                vectors = data[f"vectors_{key}"].astype(np.float32).reshape(-1, entry["size"])
+                payloads = json.loads(str(data[f"payloads_{key}"]))
+                self._collections[name] = (data[f"ids_{key}"].astype(np.int64), vectors, payloads, entry["distance"])
+        print(f"Loaded {len(self._collections)} collection(s) from {self.path}")